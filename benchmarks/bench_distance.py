@@ -0,0 +1,93 @@
+"""
+Micro-benchmark of the distance kernels against the DataFrame based haversine distance the merger used before.
+
+Start from Project Root:
+    python -m benchmarks.bench_distance --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List
+import numpy as np
+import pandas as pd
+from charging_stations.helpers import paired_distances, radian_points
+
+
+def dataframe_haversine_distance(
+    coords: pd.DataFrame, to_radians: bool = True, earth_radius: int = 6371
+) -> pd.Series:
+    # former Merger.haversine_distance
+    if to_radians:
+        coords = coords.apply(np.radians)
+    coords["delta_lat_sin_squared"] = np.sin((coords["lat2"] - coords["lat1"]) / 2) ** 2
+    coords["delta_lon_sin_squared"] = np.sin((coords["lon2"] - coords["lon1"]) / 2) ** 2
+    coords["a"] = (
+        coords["delta_lat_sin_squared"]
+        + np.cos(coords["lat1"])
+        * np.cos(coords["lat2"])
+        * coords["delta_lon_sin_squared"]
+    )
+    return earth_radius * 2 * np.arcsin(np.sqrt(coords["a"])) * 1000
+
+
+def best_time(fn: Callable, repeat: int) -> float:
+    times: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        fn()
+        times += [time.perf_counter() - start]
+    return min(times)
+
+
+def run(size: int, repeat: int) -> Dict[str, float]:
+    rng: np.random.Generator = np.random.default_rng(0)
+    lon1, lon2 = rng.uniform(6, 15, size), rng.uniform(6, 15, size)
+    lat1, lat2 = rng.uniform(47, 55, size), rng.uniform(47, 55, size)
+    coords: pd.DataFrame = pd.DataFrame(
+        dict(lon1=lon1, lat1=lat1, lon2=lon2, lat2=lat2)
+    )
+    points, other_points = radian_points(lon1, lat1), radian_points(lon2, lat2)
+    points32 = radian_points(lon1, lat1, dtype=np.float32)
+    other_points32 = radian_points(lon2, lat2, dtype=np.float32)
+    out: np.ndarray = np.empty(size, dtype=np.float64)
+    out32: np.ndarray = np.empty(size, dtype=np.float32)
+    expected: np.ndarray = dataframe_haversine_distance(coords.copy()).values
+    assert np.allclose(paired_distances(points, other_points), expected)
+    return dict(
+        dataframe=best_time(
+            lambda: dataframe_haversine_distance(coords.copy()), repeat
+        ),
+        degrees_float64=best_time(
+            lambda: paired_distances(
+                radian_points(lon1, lat1), radian_points(lon2, lat2)
+            ),
+            repeat,
+        ),
+        radians_float64=best_time(
+            lambda: paired_distances(points, other_points, out=out), repeat
+        ),
+        radians_float32=best_time(
+            lambda: paired_distances(points32, other_points32, out=out32), repeat
+        ),
+    )
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args: argparse.Namespace = parser.parse_args()
+    results: pd.DataFrame = pd.DataFrame(
+        {size: run(size, args.repeat) for size in args.sizes}
+    ).T
+    results.index.name = "pairs"
+    print("Best wall time in seconds:")
+    print(results.to_string(float_format="{:.5f}".format))
+    print("Speedup over dataframe:")
+    print(
+        results.rdiv(results["dataframe"], axis=0).to_string(
+            float_format="{:.1f}x".format
+        )
+    )
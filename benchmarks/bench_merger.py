@@ -0,0 +1,226 @@
+"""
+Benchmark of Merger.merge on synthetic stations, see tests/station_generator.py. Reports wall time, peak memory and
+throughput of every stage and compares them with a committed baseline.
+
+Start from Project Root:
+    python -m benchmarks.bench_merger --sizes 1000 10000 100000
+    python -m benchmarks.bench_merger --sizes 1000 10000 100000 --save-baseline
+    python -m benchmarks.bench_merger --sizes 1000 10000 100000 --compare
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from charging_stations.connectors import Merger
+from tests.station_generator import generate_stations
+
+BASELINE_PATH: str = os.path.join(os.path.dirname(__file__), "baselines")
+NOISE_FLOOR: Dict[str, float] = dict(wall_time=0.05, peak_memory_mb=5.0)
+
+
+def run_merge(
+    stations: List[Dict], method: str, n_jobs: int, trace_memory: bool
+) -> Dict:
+    merger: Merger = Merger(base_path=os.path.dirname(__file__))
+    if trace_memory:
+        tracemalloc.start()
+    start: float = time.perf_counter()
+    try:
+        merger.merge(stations_list=stations, method=method, n_jobs=n_jobs)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    run_stats: Dict = merger.run_stats.to_dict()
+    run_stats["stages"]["total"] = dict(
+        wall_time=time.perf_counter() - start,
+        peak_memory_mb=max(
+            [s.get("peak_memory_mb", 0.0) for s in run_stats["stages"].values()]
+        ),
+    )
+    return run_stats
+
+
+def benchmark(
+    size: int,
+    method: str,
+    n_jobs: int,
+    repeat: int,
+    trace_memory: bool,
+    generator_options: Dict,
+) -> Tuple[Dict[str, Dict], Dict[str, int]]:
+    """
+    Merges size synthetic stations repeat times and keeps the best wall time of every stage, see Merger.run_stats.
+    Peak memory is measured in a separate run, since tracing allocations slows down the merge. The peak memory of
+    total is the largest peak of all stages.
+
+    :return: Tuple of a dictionary with wall time, peak memory and throughput of every stage and the counters of the
+        merge, e.g. the number of candidate pairs
+    """
+    stations, _ = generate_stations(size, **generator_options)
+    wall_time: Dict[str, float] = {}
+    counters: Dict[str, int] = {}
+    for _ in range(repeat):
+        run_stats: Dict = run_merge(stations, method, n_jobs, False)
+        counters = run_stats["counters"]
+        for stage, stats in run_stats["stages"].items():
+            wall_time[stage] = min(wall_time.get(stage, np.inf), stats["wall_time"])
+    peak_memory: Dict[str, float] = (
+        {
+            stage: stats["peak_memory_mb"]
+            for stage, stats in run_merge(stations, method, n_jobs, True)[
+                "stages"
+            ].items()
+        }
+        if trace_memory
+        else {}
+    )
+    return (
+        {
+            stage: dict(
+                wall_time=seconds,
+                peak_memory_mb=peak_memory.get(stage),
+                stations_per_second=size / seconds if seconds > 0 else None,
+            )
+            for stage, seconds in wall_time.items()
+        },
+        counters,
+    )
+
+
+def baseline_file(method: str, n_jobs: int) -> str:
+    return os.path.join(BASELINE_PATH, f"merger__{method}__{n_jobs}.json")
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict]],
+    baseline: Dict[str, Dict[str, Dict]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Compares results with a baseline and lists all stages which got slower or need more memory than tolerance allows.
+
+    :return: List of regressions
+    """
+    regressions: List[str] = []
+    for size, stages in results.items():
+        for stage, metrics in stages.items():
+            baseline_metrics: Optional[Dict] = baseline.get(size, {}).get(stage)
+            if baseline_metrics is None:
+                continue
+            for metric in ["wall_time", "peak_memory_mb"]:
+                if (metrics[metric] is None) | (baseline_metrics[metric] is None):
+                    continue
+                # stages taking a few milliseconds or megabytes are dominated by noise
+                if metrics[metric] < NOISE_FLOOR[metric]:
+                    continue
+                ratio: float = metrics[metric] / max(baseline_metrics[metric], 1e-9)
+                if ratio > 1 + tolerance:
+                    regressions += [
+                        f"{size} stations, {stage}: {metric} {baseline_metrics[metric]:.4f} -> "
+                        f"{metrics[metric]:.4f} ({ratio:.2f}x)"
+                    ]
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Dict]]):
+    print(
+        f"{'stations':>10} {'stage':<28} {'wall time [s]':>14} {'peak memory [MB]':>17} {'stations/s':>12}"
+    )
+    for size, stages in results.items():
+        for stage, metrics in stages.items():
+            peak_memory: str = (
+                f"{metrics['peak_memory_mb']:.1f}"
+                if metrics["peak_memory_mb"] is not None
+                else "-"
+            )
+            throughput: str = (
+                f"{metrics['stations_per_second']:.0f}"
+                if metrics["stations_per_second"] is not None
+                else "-"
+            )
+            print(
+                f"{size:>10} {stage:<28} {metrics['wall_time']:>14.4f} {peak_memory:>17} {throughput:>12}"
+            )
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--method", choices=["greedy", "cluster"], default="cluster")
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the memory run")
+    parser.add_argument("--duplicate-rate", type=float, default=0.4)
+    parser.add_argument("--jitter-meters", type=float, default=15.0)
+    parser.add_argument("--operator-noise", type=float, default=0.2)
+    parser.add_argument("--urban-share", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slow down tolerated before a stage counts as regression",
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    generator_options: Dict = dict(
+        duplicate_rate=args.duplicate_rate,
+        jitter_meters=args.jitter_meters,
+        operator_noise=args.operator_noise,
+        urban_share=args.urban_share,
+        seed=args.seed,
+    )
+    results: Dict[str, Dict[str, Dict]] = {}
+    counters: Dict[str, Dict[str, int]] = {}
+    for size in args.sizes:
+        results[str(size)], counters[str(size)] = benchmark(
+            size,
+            args.method,
+            args.n_jobs,
+            args.repeat,
+            not args.no_memory,
+            generator_options,
+        )
+    print_results(results)
+    for size, size_counters in counters.items():
+        print(f"{size:>10} {size_counters}")
+    # ru_maxrss is reported in kilobytes on linux
+    print(
+        f"Peak resident memory of the process: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10:.0f} MB"
+    )
+
+    file_path: str = baseline_file(args.method, args.n_jobs)
+    if args.compare:
+        with open(file_path, "r", encoding="utf-8") as f:
+            baseline: Dict = json.load(f)
+        regressions: List[str] = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+    if args.save_baseline:
+        os.makedirs(BASELINE_PATH, exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(
+                dict(
+                    machine=dict(
+                        python=platform.python_version(),
+                        processor=platform.processor() or platform.machine(),
+                        cpu_count=os.cpu_count(),
+                    ),
+                    generator_options=generator_options,
+                    results=results,
+                    counters=counters,
+                ),
+                f,
+                indent=4,
+            )
@@ -45,6 +45,7 @@ packages = find_packages(where="src")
 package_dir = {"": "src"}
 python_requires = ">=3.5, <4"
 install_requirements = read("requirements.txt")
+extras_require = {"parquet": ["pyarrow"], "pbf": ["osmium>=3.7"]}
 package_data = {
     "data": [
         "data/test_BNA__processed.json",
@@ -77,6 +78,7 @@ setup(
     package_dir=package_dir,
     python_requires=python_requires,
     install_requires=install_requirements,  # Optional
+    extras_require=extras_require,  # Optional
     package_data=package_data,  # Optional
     project_urls=project_urls,
 )
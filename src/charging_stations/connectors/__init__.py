@@ -3,4 +3,7 @@ from ._ocm import OCMConnector
 from ._osm import OSMConnector
 from ._connector import Connector
 from ._merger import Merger
+from ._export import export_stations
+from ._pipeline import Pipeline
+from ._run_stats import RunStats
 from . import _config as Config
@@ -2,119 +2,152 @@ import hashlib
 import io
 import json
 import math
+import numpy as np
 import os
 import pandas as pd
-import requests
 import yarl
-from typing import Dict, List, Optional
+from datetime import datetime
+from itertools import chain, filterfalse, islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 from numbers import Number
 from bs4 import BeautifulSoup, ResultSet
+from ._http_cache import CachedResponse
 from ._ocm import OCMConnector
-from ..helpers import get_logger
+from ..helpers import get_logger, iter_xlsx_records
 from ..helpers import default
 
 log = get_logger(os.path.basename(__file__))
 
+# number of rows processed column by column at once
+COLUMNAR_BLOCK_SIZE: int = 10000
+# types of cell values, which the columnar processing handles exactly like _process_station
+COLUMN_TYPES: Set[type] = {str, int, float, bool, datetime, type(None)}
+
 
 class BNAConnector(OCMConnector):
     __data_source__: str = "BNA"
 
-    def get_data(self, to_disk: bool = False):
+    def _get_xlsx(self) -> CachedResponse:
         """
-        Retrieves charging station data in excel format from Bundesnetzagentur and converts it first to a pd.DataFrame
-        (for some easy plausibility checks and transformations) and then to dictionary for further processing.
+        Resolves the link of the excel file from the page of Bundesnetzagentur and downloads it.
 
-        :param to_disk: If true, will save data to file.
-        :return:
+        :return: Response of the excel file
         """
         headers = {"User-Agent": "Mozilla/5.0"}
-        response: requests.Response = self.http_method_fn(
+        page: CachedResponse = self._get(
             self.url, params=self.query_params, headers=headers
         )
-        if response.status_code != 200:
-            raise RuntimeError(
-                f"Failed to get data! Status Code: {response.status_code}"
+        # the link of the excel file is only resolved again if the page changed
+        xlsx_url: Optional[str] = self.cache.get_value(
+            "xlsx_url"
+        ) if (self.cache is not None) and (not page.is_modified) else None
+        if xlsx_url is None:
+            result: ResultSet = BeautifulSoup(page.content, "html.parser").find_all(
+                "a", class_="downloadLink Publication " + "FTxlsx"
             )
-        result: ResultSet = BeautifulSoup(response.content, "html.parser").find_all(
-            "a", class_="downloadLink Publication " + "FTxlsx"
-        )
-        if len(result) != 1:
-            raise RuntimeError("Could not identify link!")
-        rel_link: str = result[0].get("href", None)
-        if rel_link is None:
-            raise RuntimeError("Could not retrieve href from link!")
-        url: yarl.URL = yarl.URL(self.url)
-        xlsx_file: requests.Response = self.http_method_fn(
-            f"{url.scheme}://{url.host}{rel_link}",
-            params=self.query_params,
-            headers=headers,
-        )
-        xlsx_pd: pd.DataFrame = pd.read_excel(
-            io.BytesIO(xlsx_file.content), engine="xlrd"
-        )
-        data_columns: pd.DataFrame = xlsx_pd.loc[
-            xlsx_pd[xlsx_pd.columns[0]] == "Betreiber"
-        ]
-        if data_columns.shape[0] != 1:
-            raise RuntimeError("Could not find start of data!")
+            if len(result) != 1:
+                raise RuntimeError("Could not identify link!")
+            rel_link: str = result[0].get("href", None)
+            if rel_link is None:
+                raise RuntimeError("Could not retrieve href from link!")
+            url: yarl.URL = yarl.URL(self.url)
+            xlsx_url = f"{url.scheme}://{url.host}{rel_link}"
+            if self.cache is not None:
+                self.cache.set_value("xlsx_url", xlsx_url)
+        return self._get(xlsx_url, params=self.query_params, headers=headers,)
+
+    def get_data(self, to_disk: bool = False):
+        """
+        Retrieves charging station data in excel format from Bundesnetzagentur and reads the rows below the header row
+        of the sheet as records for further processing, see iter_xlsx_records.
 
-        bna_data: pd.DataFrame = pd.DataFrame(
-            xlsx_pd.iloc[data_columns.index[0] + 1 :, : data_columns.shape[1]].values,
-            columns=list(data_columns.values[0]),
+        :param to_disk: If true, will save data to file.
+        :return:
+        """
+        xlsx_file: CachedResponse = self._get_xlsx()
+        if self._reuse_raw_data(xlsx_file):
+            return
+        self.raw_data: List[Dict] = list(
+            iter_xlsx_records(io.BytesIO(xlsx_file.content), first_header="Betreiber")
         )
-        self.raw_data: List[Dict] = bna_data.to_dict(orient="record")
         if to_disk:
             file_path: str = os.path.join(
                 self.base_path, f"{self.__data_source__}__raw.json"
             )
             self._save(file_path=file_path, content_list=self.raw_data)
 
-    def process(self, to_disk: bool = False):
-        if not self.raw_data:
-            raise RuntimeError("Load or get raw data first!")
-        station_raw: Dict
-        for station_raw in self.raw_data:
-            raw_data: str = json.dumps(
-                station_raw, sort_keys=True, ensure_ascii=True, default=default
-            )
-            id_hash: hashlib._Hash = hashlib.sha256(
-                f"{station_raw['Längengrad [DG]']}{station_raw['Breitengrad [DG]']}".encode(
-                    "utf8"
-                )
-            )
-            identifier: bytes = id_hash.hexdigest().encode("utf8")
-            try:
-                address: Dict = self._create_address(identifier, station_raw)
-            except Exception as addressConversionErr:
-                log.error(
-                    f"Failed to create address object: {addressConversionErr}! Will skip this station!"
-                )
-                continue
-            try:
-                charging: Dict = self._create_charging(identifier, station_raw)
-            except Exception as chargingConversionErr:
-                log.error(
-                    f"Failed to create charging object: {chargingConversionErr}! Will skip this station!"
-                )
-                continue
+    def stream_data(
+        self, file_path: Optional[str] = None, to_disk: bool = False
+    ) -> Iterator[Dict]:
+        """
+        Streams raw stations one row at a time, parsed incrementally from the sheet of the downloaded excel file or of
+        a local xlsx file, such that process can start before the sheet is read completely. The excel file is
+        downloaded once the first station is requested.
 
-            try:
-                station: Dict = self._create_station(
-                    address, charging, identifier, raw_data, station_raw
-                )
-            except Exception as stationConversionErr:
-                log.error(
-                    f"Failed to create station object: {stationConversionErr}! Will skip this station!"
-                )
-                continue
+        :param file_path: Path of a xlsx file to read instead of downloading it
+        :param to_disk: If True, raw stations are also written to the raw file while streaming
+        :return: Iterator over raw stations
+        """
+        source: Union[str, io.BytesIO] = (
+            file_path
+            if file_path is not None
+            else io.BytesIO(self._get_xlsx().content)
+        )
+        stations_raw: Iterator[Dict] = iter_xlsx_records(
+            source, first_header="Betreiber"
+        )
+        yield from (
+            self._stream_to_raw_file(stations_raw) if to_disk else stations_raw
+        )
 
-            self.processed_data += [station]
+    def _process_station(
+        self, station_raw: Dict
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        raw_data: str = json.dumps(
+            station_raw, sort_keys=True, ensure_ascii=True, default=default
+        )
+        id_hash: hashlib._Hash = hashlib.sha256(
+            f"{station_raw['Längengrad [DG]']}{station_raw['Breitengrad [DG]']}".encode(
+                "utf8"
+            )
+        )
+        identifier: bytes = id_hash.hexdigest().encode("utf8")
+        try:
+            address: Dict = self._create_address(identifier, station_raw)
+        except Exception as addressConversionErr:
+            log.error(
+                f"Failed to create address object: {addressConversionErr}! Will skip this station!"
+            )
+            return None, "address"
+        try:
+            charging: Dict = self._create_charging(identifier, station_raw)
+        except Exception as chargingConversionErr:
+            log.error(
+                f"Failed to create charging object: {chargingConversionErr}! Will skip this station!"
+            )
+            return None, "charging"
 
-        if to_disk:
-            file_path: str = os.path.join(
-                self.base_path, f"{self.__data_source__}__processed.json"
+        try:
+            station: Dict = self._create_station(
+                address, charging, identifier, raw_data, station_raw
             )
-            self._save(file_path=file_path, content_list=self.processed_data)
+        except Exception as stationConversionErr:
+            log.error(
+                f"Failed to create station object: {stationConversionErr}! Will skip this station!"
+            )
+            return None, "station"
+        return station, None
 
     def _create_station(
         self,
@@ -138,6 +171,8 @@ class BNAConnector(OCMConnector):
             payment=payment,
             authentication=authentication,
             coordinates=coordinates,
+            lon=longitude,
+            lat=latitude,
             raw_data=raw_data,
         )
         return station
@@ -264,6 +299,342 @@ class BNAConnector(OCMConnector):
         )
         return address
 
+    def _process_chunk(
+        self, stations_raw: Iterable[Dict]
+    ) -> Tuple[List[Dict], Dict[str, int]]:
+        """
+        Processes raw stations column by column in blocks of COLUMNAR_BLOCK_SIZE rows, see _process_columns, such that
+        streamed stations are still not held in memory all at once.
+
+        :param stations_raw: Raw stations
+        :return: Tuple of processed stations and number of skipped stations per failed step
+        """
+        stations: List[Dict] = []
+        errors: Dict[str, int] = {}
+        stations_raw = iter(stations_raw)
+        while True:
+            block: List[Dict] = list(islice(stations_raw, COLUMNAR_BLOCK_SIZE))
+            if not block:
+                break
+            block_stations, block_errors = self._process_columns(block)
+            stations += block_stations
+            for step, no_errors in block_errors.items():
+                errors[step] = errors.get(step, 0) + no_errors
+        return stations, errors
+
+    def _process_columns(
+        self, stations_raw: List[Dict]
+    ) -> Tuple[List[Dict], Dict[str, int]]:
+        """
+        Processes raw stations, which are rows of the same sheet, column by column. The kw and socket type columns are
+        resolved once from the header, strings are converted once per distinct value, and max_kw, dc_support and
+        whether a station fails its address or station step are computed for whole columns. Dicts are only created for
+        the stations which are not skipped. The result is identical to processing the stations one after another with
+        _process_station, which is still done if the rows differ in their columns or hold other types than
+        COLUMN_TYPES.
+
+        :param stations_raw: Raw stations
+        :return: Tuple of processed stations and number of skipped stations per failed step
+        """
+        header: Tuple[str, ...] = tuple(stations_raw[0])
+        if any(tuple(station_raw) != header for station_raw in stations_raw) or (
+            not {type(v) for station_raw in stations_raw for v in station_raw.values()}
+            <= COLUMN_TYPES
+        ):
+            log.debug(
+                "Rows differ in their columns or types! Will process them row by row!"
+            )
+            return super()._process_chunk(stations_raw)
+
+        columns: Dict[str, np.ndarray] = {
+            k: self._object_array([station_raw[k] for station_raw in stations_raw])
+            for k in header
+        }
+        empty_column: np.ndarray = self._object_array([None] * len(stations_raw))
+        longitudes_raw: np.ndarray = columns["Längengrad [DG]"]
+        latitudes_raw: np.ndarray = columns["Breitengrad [DG]"]
+
+        # address
+        postcode_towns: np.ndarray = columns.get("Postleitzahl Ort", empty_column)
+        has_address: np.ndarray = self._map_strings(
+            postcode_towns, lambda s: True, default=False
+        ).astype(bool)
+        postcodes_towns: np.ndarray = self._map_strings(
+            postcode_towns, self._split_postcode_town
+        )
+
+        # charging
+        total_kw_column: np.ndarray = columns.get(
+            "Anschlussleistung [kW]", empty_column
+        )
+        total_kws: np.ndarray = np.where(
+            self._is_number(total_kw_column),
+            total_kw_column,
+            self._map_strings(total_kw_column, self._total_kw_from_string),
+        )
+        # kw of every row and kw column, None if the row has no kw in the column
+        kws: np.ndarray = self._stack(
+            [
+                np.where(
+                    self._is_number(columns[k]),
+                    columns[k],
+                    self._map_strings(columns[k], self._kw_from_string),
+                )
+                for k in header
+                if ("P" in k) & ("[kW]" in k)
+            ],
+            len(stations_raw),
+        )
+        max_kws: np.ndarray = self._max_kw(kws)
+        socket_columns: List[np.ndarray] = [
+            columns[k] for k in header if "Steckertypen" in k
+        ]
+        dc_support: np.ndarray = np.zeros(len(stations_raw), dtype=bool)
+        for socket_column in socket_columns:
+            dc_support |= self._map_strings(
+                socket_column, lambda s: "DC" in s, default=False
+            ).astype(bool)
+        socket_types: np.ndarray = self._stack(
+            [
+                self._map_strings(socket_column, lambda s: s.split(","), default=())
+                for socket_column in socket_columns
+            ],
+            len(stations_raw),
+        )
+
+        # station
+        latitudes: np.ndarray = self._coordinates(latitudes_raw)
+        longitudes: np.ndarray = self._coordinates(longitudes_raw)
+        has_station: np.ndarray = (
+            self._is_present(latitudes)
+            & self._is_present(longitudes)
+            & ("Betreiber" in header)
+        )
+
+        # the charging step does not fail for values of COLUMN_TYPES
+        failures: Dict[str, np.ndarray] = dict(
+            address=~has_address, station=has_address & ~has_station
+        )
+        # steps are counted in the order of their first failure, like row by row
+        errors: Dict[str, int] = {
+            step: int(np.count_nonzero(failures[step]))
+            for step in sorted(
+                [step for step, failed in failures.items() if failed.any()],
+                key=lambda step: np.argmax(failures[step]),
+            )
+        }
+        for step, no_errors in errors.items():
+            log.error(
+                f"Failed to create {step} object of {no_errors} stations! Will skip these stations!"
+            )
+
+        encoder: json.JSONEncoder = json.JSONEncoder(
+            sort_keys=True, ensure_ascii=True, default=default
+        )
+        is_valid: np.ndarray = has_address & has_station
+        stations: List[Dict] = []
+        for (
+            station_raw,
+            longitude_raw,
+            latitude_raw,
+            longitude,
+            latitude,
+            (postcode, town),
+            row_kws,
+            row_socket_types,
+            row_dc_support,
+            total_kw,
+            max_kw,
+        ) in zip(
+            [stations_raw[i] for i in np.flatnonzero(is_valid)],
+            *[
+                column[is_valid].tolist()
+                for column in [
+                    longitudes_raw,
+                    latitudes_raw,
+                    longitudes,
+                    latitudes,
+                    postcodes_towns,
+                    kws,
+                    socket_types,
+                    dc_support,
+                    total_kws,
+                    max_kws,
+                ]
+            ],
+        ):
+            identifier: bytes = (
+                hashlib.sha256(f"{longitude_raw}{latitude_raw}".encode("utf8"))
+                .hexdigest()
+                .encode("utf8")
+            )
+            stations += [
+                dict(
+                    id=identifier,
+                    data_source=self.__data_source__,
+                    address=dict(
+                        station_id=identifier,
+                        street=station_raw.get("Adresse"),
+                        town=town,
+                        postcode=postcode,
+                        district=None,
+                        state=station_raw.get("Bundesland"),
+                        country="DE",
+                    ),
+                    charging=dict(
+                        station_id=identifier,
+                        capacity=station_raw.get("Anzahl Ladepunkte"),
+                        kw_list=[kw for kw in row_kws if kw is not None],
+                        ampere_list=None,
+                        volt_list=None,
+                        socket_type_list=list(chain.from_iterable(row_socket_types)),
+                        dc_support=row_dc_support,
+                        total_kw=total_kw,
+                        max_kw=max_kw,
+                    ),
+                    operator=station_raw["Betreiber"],
+                    payment=None,
+                    authentication=None,
+                    coordinates=f"POINT({longitude} {latitude})",
+                    lon=longitude,
+                    lat=latitude,
+                    raw_data=encoder.encode(station_raw),
+                )
+            ]
+        return stations, errors
+
+    @staticmethod
+    def _object_array(values: List[Any]) -> np.ndarray:
+        array: np.ndarray = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+    @staticmethod
+    def _stack(columns: List[np.ndarray], no_rows: int) -> np.ndarray:
+        """
+        :return: Matrix of the columns, with no_rows rows also if there is no column
+        """
+        if not columns:
+            return np.empty((no_rows, 0), dtype=object)
+        return np.stack(columns, axis=1)
+
+    @staticmethod
+    def _map_strings(
+        column: np.ndarray, fn: Callable[[str], Any], default: Any = None
+    ) -> np.ndarray:
+        """
+        Applies fn once per distinct string of a column.
+
+        :param column: Values of a column
+        :param fn: Function of a string
+        :param default: Result for values which are no strings
+        :return: Results of fn for strings and default for other values
+        """
+        codes, uniques = pd.factorize(column)
+        # the last result is taken by the code -1 of None and nan
+        results: np.ndarray = np.empty(len(uniques) + 1, dtype=object)
+        for i, unique in enumerate(uniques):
+            results[i] = fn(unique) if isinstance(unique, str) else default
+        results[-1] = default
+        return results[codes]
+
+    @staticmethod
+    def _is_present(column: np.ndarray) -> np.ndarray:
+        """
+        :param column: Values of a column
+        :return: Mask of the values which are not None, nan is present
+        """
+        return pd.notna(column) | (column != column)
+
+    @staticmethod
+    def _is_number(column: np.ndarray) -> np.ndarray:
+        """
+        :param column: Values of a column
+        :return: Mask of the values which are numbers and not nan
+        """
+        types: np.ndarray = np.frompyfunc(type, 1, 1)(column)
+        return ((types == int) | (types == float) | (types == bool)) & pd.notna(column)
+
+    @staticmethod
+    def _split_postcode_town(
+        postcode_town: str,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        :return: Tuple of the digits and of the other characters without spaces, each None if invalid, see
+            _create_address
+        """
+        postcode: str = "".join(filter(str.isdigit, postcode_town))
+        # split removes the characters for which isspace is true
+        town: str = "".join(filterfalse(str.isdigit, "".join(postcode_town.split())))
+        return (
+            postcode if len(postcode) == 5 else None,
+            town if len(town) >= 2 else None,
+        )
+
+    @staticmethod
+    def _total_kw_from_string(total_kw: str) -> Optional[float]:
+        try:
+            value: float = float(total_kw.replace(",", "."))
+        except ValueError:
+            return None
+        return None if math.isnan(value) else value
+
+    @staticmethod
+    def _kw_from_string(kw: str) -> Optional[float]:
+        try:
+            return float(kw.replace(",", "."))
+        except ValueError:
+            return None
+
+    def _coordinates(self, column: np.ndarray) -> np.ndarray:
+        """
+        :param column: Values of a coordinate column
+        :return: Coordinates like check_coordinates, None for coordinates which cannot be read
+        """
+
+        def from_string(coordinate: str) -> Optional[float]:
+            try:
+                return self.check_coordinates(coordinate)
+            except ValueError:
+                return None
+
+        types: np.ndarray = np.frompyfunc(type, 1, 1)(column)
+        is_number: np.ndarray = (types == int) | (types == float) | (types == bool)
+        return np.where(is_number, column, self._map_strings(column, from_string))
+
+    @staticmethod
+    def _max_kw(kws: np.ndarray) -> np.ndarray:
+        """
+        Selects the maximum kw of every row exactly like max of its kw_list: the first of equal maximums, nan if the
+        first kw is nan as nothing compares greater than nan, and None if there is no kw.
+
+        :param kws: kw of every row and kw column, None if the row has no kw in the column
+        :return: Maximum kw of every row
+        """
+        if kws.shape[1] == 0:
+            return np.full(kws.shape[0], None, dtype=object)
+        has_kw: np.ndarray = BNAConnector._is_present(kws)
+        values: np.ndarray = np.where(has_kw, kws, np.nan).astype(float)
+        candidates: np.ndarray = np.where(np.isnan(values), -np.inf, values)
+        if np.any(np.abs(candidates[has_kw]) >= 2 ** 53):
+            # large integers and infinity are only compared exactly in python
+            return BNAConnector._object_array(
+                [
+                    max(kw_list) if kw_list else None
+                    for kw_list in ([v for v in row if v is not None] for row in kws)
+                ]
+            )
+        rows: np.ndarray = np.arange(kws.shape[0])
+        first: np.ndarray = np.argmax(has_kw, axis=1)
+        best: np.ndarray = np.argmax(candidates, axis=1)
+        # if the first kw is nan, or if all kw are nan, it is the maximum
+        best = np.where(
+            np.isnan(values[rows, first]) | (candidates[rows, best] == -np.inf),
+            first,
+            best,
+        )
+        return np.where(has_kw.any(axis=1), kws[rows, best], None)
+
 
 if __name__ == "__main__":
     print("done")
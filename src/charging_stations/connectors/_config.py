@@ -1,4 +1,8 @@
 import requests
+from ..helpers import BBox
+
+# bounding box of Germany, e.g. for OCMConnector.get_data_tiled
+BBOX_DE = BBox(min_lon=5.8, min_lat=47.2, max_lon=15.1, max_lat=55.1)
 
 OCM = {
     "url": "https://api.openchargemap.io/v3/poi/",
@@ -7,9 +11,11 @@ OCM = {
         "opendata": True,
         "output": "json",
         "countrycode": "DE",
-        "compact": False,
+        "compact": True,
+        "verbose": False,
         "maxresults": int(1e5),
     },
+    "reference_data_url": "https://api.openchargemap.io/v3/referencedata/",
 }
 
 OSM = {
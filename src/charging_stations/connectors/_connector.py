@@ -1,4 +1,5 @@
 import json
+import os
 from abc import ABC, abstractmethod
 from typing import List
 from ..helpers import default, object_hook
@@ -31,10 +32,12 @@ class Connector(ABC):
 
     @staticmethod
     def _save(file_path: str, content_list: List[any]):
-        with open(file_path, "w", encoding="utf-8") as f:
+        # written to a temporary file first, such that a failed run never leaves a broken file behind
+        with open(f"{file_path}.tmp", "w", encoding="utf-8") as f:
             json.dump(
                 content_list, f, ensure_ascii=False, indent=4, default=default,
             )
+        os.replace(f"{file_path}.tmp", file_path)
 
     @staticmethod
     def _load(file_path: str) -> List[any]:
@@ -0,0 +1,254 @@
+import json
+import os
+from typing import Callable, Dict, Iterator, List, Optional
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from ..helpers import get_logger
+
+log = get_logger(os.path.basename(__file__))
+
+# columns only needed for matching, which are not exported by default
+INTERNAL_COLUMNS: List[str] = [
+    "operator_key",
+    "address_key",
+    "block_key",
+    "source_row",
+]
+FILE_EXTENSIONS: Dict[str, str] = {
+    ".parquet": "geoparquet",
+    ".geoparquet": "geoparquet",
+    ".geojsonl": "geojsonseq",
+    ".geojsons": "geojsonseq",
+    ".geojsonseq": "geojsonseq",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+}
+# value type of the list columns, which cannot be inferred from an empty list, e.g. kw_list of OSM stations
+LIST_COLUMN_TYPES: Dict[str, str] = dict(
+    kw_list="float64",
+    ampere_list="float64",
+    volt_list="float64",
+    socket_type_list="string",
+)
+# largest precision supported by pandas, keeps coordinates at sub millimeter accuracy
+JSON_DOUBLE_PRECISION: int = 15
+
+
+def _chunks(
+    stations_gdf: gpd.GeoDataFrame,
+    columns: List[str],
+    chunk_size: int,
+    raw_data_fn: Optional[Callable[[List[bytes]], List[Optional[str]]]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields plain DataFrames of at most chunk_size stations with the projected columns plus lon & lat taken from the
+    geometry. Only one chunk is copied at a time, the raw data of its stations is looked up by raw_data_fn if given.
+    """
+    for start in range(0, stations_gdf.shape[0], chunk_size):
+        chunk_gdf: gpd.GeoDataFrame = stations_gdf.iloc[start : start + chunk_size]
+        chunk: pd.DataFrame = pd.DataFrame(
+            {
+                column: chunk_gdf[column].values
+                for column in columns
+                if column not in ["lon", "lat"]
+            }
+        )
+        chunk["lon"] = chunk_gdf.geometry.x.values
+        chunk["lat"] = chunk_gdf.geometry.y.values
+        if raw_data_fn is not None:
+            chunk["raw_data"] = raw_data_fn(list(chunk_gdf["id"].values))
+        if "id" in chunk:
+            chunk["id"] = [
+                i.decode("utf8") if isinstance(i, bytes) else i for i in chunk["id"]
+            ]
+        yield chunk
+
+
+def _to_csv(chunks: Iterator[pd.DataFrame], file_path: str):
+    for number, chunk in enumerate(chunks):
+        chunk.to_csv(
+            file_path,
+            mode="w" if number == 0 else "a",
+            header=number == 0,
+            index=False,
+            encoding="utf-8",
+        )
+
+
+def _to_ndjson(chunks: Iterator[pd.DataFrame], file_path: str):
+    with open(file_path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(
+                chunk.to_json(
+                    orient="records",
+                    lines=True,
+                    force_ascii=False,
+                    date_format="iso",
+                    double_precision=JSON_DOUBLE_PRECISION,
+                ).rstrip("\n")
+                + "\n"
+            )
+
+
+def _to_geojsonseq(chunks: Iterator[pd.DataFrame], file_path: str):
+    with open(file_path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            geometries: List[str] = [
+                json.dumps(dict(type="Point", coordinates=[lon, lat]))
+                for lon, lat in zip(chunk["lon"].values, chunk["lat"].values)
+            ]
+            properties: List[str] = (
+                chunk.drop(columns=["lon", "lat"])
+                .to_json(
+                    orient="records",
+                    lines=True,
+                    force_ascii=False,
+                    date_format="iso",
+                    double_precision=JSON_DOUBLE_PRECISION,
+                )
+                .rstrip("\n")
+                .split("\n")
+            )
+            f.writelines(
+                f'{{"type": "Feature", "geometry": {geometry}, "properties": {feature_properties}}}\n'
+                for geometry, feature_properties in zip(geometries, properties)
+            )
+
+
+def _point_wkb(lon: np.ndarray, lat: np.ndarray) -> List[bytes]:
+    # little endian WKB points: byte order, geometry type 1 and both coordinates, built for all points at once
+    points: np.ndarray = np.empty(
+        len(lon), dtype=[("order", "u1"), ("type", "<u4"), ("x", "<f8"), ("y", "<f8")]
+    )
+    points["order"], points["type"], points["x"], points["y"] = 1, 1, lon, lat
+    buffer: bytes = points.tobytes()
+    return [buffer[i : i + 21] for i in range(0, len(buffer), 21)]
+
+
+def _sample_frame(stations_gdf: gpd.GeoDataFrame, columns: List[str]) -> pd.DataFrame:
+    # one row holding the first valid value of each column, such that the parquet schema does not depend on a chunk
+    sample: Dict[str, np.ndarray] = {}
+    for column in columns:
+        if column in ["lon", "lat"]:
+            continue
+        valid_positions: np.ndarray = np.flatnonzero(stations_gdf[column].notna().values)
+        sample[column] = stations_gdf[column].iloc[valid_positions[:1]].values
+        if len(valid_positions) == 0:
+            sample[column] = stations_gdf[column].iloc[:1].values
+    return pd.DataFrame(sample)
+
+
+def _to_geoparquet(
+    chunks: Iterator[pd.DataFrame], file_path: str, sample: pd.DataFrame
+):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(
+            "Exporting GeoParquet requires pyarrow, install it with: pip install pyarrow"
+        )
+    sample = sample.assign(lon=[0.0], lat=[0.0])
+    if "id" in sample:
+        sample["id"] = [
+            i.decode("utf8") if isinstance(i, bytes) else i for i in sample["id"]
+        ]
+    schema: pa.Schema = pa.Schema.from_pandas(sample, preserve_index=False).append(
+        pa.field("geometry", pa.binary())
+    )
+    for column, value_type in LIST_COLUMN_TYPES.items():
+        if column in schema.names:
+            schema = schema.set(
+                schema.get_field_index(column),
+                pa.field(column, pa.list_(getattr(pa, value_type)())),
+            )
+    # GeoParquet 1.0 metadata, coordinates are longitude & latitude, which is the default crs OGC:CRS84
+    schema = schema.with_metadata(
+        {
+            **(schema.metadata or {}),
+            b"geo": json.dumps(
+                dict(
+                    version="1.0.0",
+                    primary_column="geometry",
+                    columns=dict(
+                        geometry=dict(encoding="WKB", geometry_types=["Point"])
+                    ),
+                )
+            ).encode("utf8"),
+        }
+    )
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for chunk in chunks:
+            chunk["geometry"] = _point_wkb(chunk["lon"].values, chunk["lat"].values)
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+
+
+def export_stations(
+    stations_gdf: gpd.GeoDataFrame,
+    file_path: str,
+    file_format: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    chunk_size: int = 50000,
+    raw_data_fn: Optional[Callable[[List[bytes]], List[Optional[str]]]] = None,
+) -> str:
+    """
+    Streams stations to disk in chunks of chunk_size, such that memory use does not double during export. Every row
+    gets numeric lon & lat columns read from the geometry in bulk.
+
+    :param stations_gdf: gpd.GeoDataFrame of stations, e.g. Merger.merged_stations_gdf
+    :param file_path: Path of the output file
+    :param file_format: One of "geoparquet", "geojsonseq" (one GeoJSON feature per line), "ndjson" (one json object
+        per line) or "csv". If None, derived from the file extension
+    :param columns: Columns to export, lon & lat are always added. If None, all columns except geometry and columns
+        only needed for matching
+    :param chunk_size: Number of stations converted at once
+    :param raw_data_fn: Function returning the raw data of a list of station ids, e.g. Merger.get_raw_data. If given,
+        a raw_data column is added, which is only looked up for one chunk at a time
+    :return: file_path
+    """
+    file_format = (
+        file_format
+        if file_format
+        else FILE_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+    )
+    if file_format not in FILE_EXTENSIONS.values():
+        raise ValueError(
+            f"Unknown export format {file_format}, use one of {sorted(set(FILE_EXTENSIONS.values()))}!"
+        )
+    columns = (
+        columns
+        if columns is not None
+        else [
+            c
+            for c in stations_gdf.columns
+            if c not in INTERNAL_COLUMNS + ["geometry", "lon", "lat"]
+        ]
+    )
+    missing_columns: List[str] = [
+        c for c in columns if (c not in stations_gdf.columns) & (c not in ["lon", "lat"])
+    ]
+    if (raw_data_fn is not None) & ("id" not in stations_gdf.columns):
+        missing_columns += ["id"]
+    if missing_columns:
+        raise ValueError(f"Columns {missing_columns} do not exist!")
+    chunks: Iterator[pd.DataFrame] = _chunks(
+        stations_gdf, columns, chunk_size, raw_data_fn
+    )
+    writers: Dict[str, Callable] = dict(
+        csv=_to_csv, ndjson=_to_ndjson, geojsonseq=_to_geojsonseq
+    )
+    if file_format == "geoparquet":
+        sample: pd.DataFrame = _sample_frame(stations_gdf, columns)
+        if raw_data_fn is not None:
+            sample["raw_data"] = [""]
+        _to_geoparquet(chunks, file_path, sample)
+    else:
+        writers[file_format](chunks, file_path)
+    log.debug(
+        f"Exported {stations_gdf.shape[0]} stations as {file_format} to {file_path}!"
+    )
+    return file_path
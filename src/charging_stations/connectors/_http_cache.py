@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import requests
+import threading
+from typing import Callable, Dict, Optional
+from ..helpers import get_logger
+
+log = get_logger(os.path.basename(__file__))
+
+
+class CachedResponse(object):
+    """
+    Body of a response, either received or read from the cache on first access.
+    """
+
+    def __init__(
+        self,
+        is_modified: bool,
+        content: Optional[bytes] = None,
+        body_path: Optional[str] = None,
+    ):
+        """
+        :param is_modified: False if the body equals the cached body of the last request
+        :param content: Received body
+        :param body_path: Path of the cached body, read if no body was received
+        """
+        self.is_modified: bool = is_modified
+        self._content: Optional[bytes] = content
+        self.body_path: Optional[str] = body_path
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            with open(self.body_path, "rb") as f:
+                self._content = f.read()
+        return self._content
+
+
+class HTTPCache(object):
+    """
+    On-disk cache of http responses. Requests are sent conditionally with the ETag and Last-Modified validators of the
+    cached response, such that an unchanged body is answered with 304 and not downloaded again. Servers without
+    validators still send the whole body, which is then compared with the cached body by its sha256 hash. Additionally,
+    arbitrary json values can be cached alongside, e.g. a link resolved from a cached page. Requests may be sent from
+    several threads at once.
+    """
+
+    def __init__(self, cache_path: str):
+        """
+        :param cache_path: Folder of the cached bodies and the index of their validators
+        """
+        if not os.path.exists(cache_path):
+            os.makedirs(cache_path)
+        self.cache_path: str = cache_path
+        self.index_path: str = os.path.join(cache_path, "index.json")
+        self.lock: threading.Lock = threading.Lock()
+        self.index: Dict[str, Dict] = dict(responses={}, values={})
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def __getstate__(self) -> Dict[str, any]:
+        # the lock cannot be pickled, a copy of the cache sent to another process gets its own
+        state: Dict[str, any] = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, any]):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def _save_index(self):
+        # called with lock held
+        with open(f"{self.index_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=4)
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+
+    @staticmethod
+    def request_key(url: str, params: Optional[Dict[str, any]] = None) -> str:
+        return hashlib.sha256(
+            json.dumps([url, params], sort_keys=True, default=str).encode("utf8")
+        ).hexdigest()
+
+    def get(
+        self,
+        http_method_fn: Callable,
+        url: str,
+        params: Optional[Dict[str, any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> CachedResponse:
+        """
+        Requests url conditionally and caches the body of the response.
+
+        :param http_method_fn: Function sending the request, e.g. requests.get
+        :param url: Url
+        :param params: Query parameters
+        :param headers: Additional request headers
+        :param timeout: Timeout of the request in seconds, None waits forever
+        :return: Response whose body is only read from disk if it was not received
+        """
+        key: str = self.request_key(url, params)
+        body_path: str = os.path.join(self.cache_path, f"{key}.body")
+        with self.lock:
+            entry: Optional[Dict[str, str]] = self.index["responses"].get(key)
+        if not os.path.exists(body_path):
+            entry = None
+        request_headers: Dict[str, str] = dict(headers) if headers else {}
+        if entry is not None:
+            if entry.get("etag") is not None:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified") is not None:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        timeout_kwargs: Dict[str, float] = (
+            dict(timeout=timeout) if timeout is not None else {}
+        )
+        response: requests.Response = http_method_fn(
+            url, params=params, headers=request_headers, **timeout_kwargs
+        )
+        if (response.status_code == 304) & (entry is not None):
+            log.debug(f"{url} is not modified! Will use cached body!")
+            return CachedResponse(is_modified=False, body_path=body_path)
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Failed to get data! Status Code: {response.status_code}"
+            )
+
+        content: bytes = response.content
+        content_hash: str = hashlib.sha256(content).hexdigest()
+        is_modified: bool = (entry is None) or (entry["content_hash"] != content_hash)
+        if is_modified:
+            with open(f"{body_path}.tmp", "wb") as f:
+                f.write(content)
+            os.replace(f"{body_path}.tmp", body_path)
+        else:
+            log.debug(f"Body of {url} is unchanged!")
+        with self.lock:
+            self.index["responses"][key] = dict(
+                url=url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                content_hash=content_hash,
+            )
+            self._save_index()
+        return CachedResponse(
+            is_modified=is_modified, content=content, body_path=body_path
+        )
+
+    def get_value(self, name: str) -> any:
+        with self.lock:
+            return self.index["values"].get(name)
+
+    def set_value(self, name: str, value: any):
+        with self.lock:
+            self.index["values"][name] = value
+            self._save_index()
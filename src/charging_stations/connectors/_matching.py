@@ -0,0 +1,422 @@
+import itertools
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from ..helpers import RadianPoints, paired_distances, radian_points
+
+
+@lru_cache(maxsize=2 ** 18)
+def _sequence_ratio(key: str, other_key: str) -> float:
+    return SequenceMatcher(None, key, other_key).ratio()
+
+
+def key_similarity(key: Optional[str], other_key: Optional[str]) -> float:
+    """
+    Similarity of two normalized keys. Each distinct pair of keys is only compared once, since results are memoized
+    in a bounded cache, which is cleared at the start of every merge.
+
+    :param key: Normalized key e.g. operator name
+    :param other_key: Normalized key to compare with
+    :return: Similarity between 0 and 1, or 0 if any of the keys is missing
+    """
+    if (not isinstance(key, str)) | (not isinstance(other_key, str)):
+        return 0.0
+    if key == other_key:
+        return 1.0
+    return (
+        _sequence_ratio(key, other_key)
+        if key < other_key
+        else _sequence_ratio(other_key, key)
+    )
+
+
+def haversine_distance(
+    coords: pd.DataFrame, to_radians: bool = True, earth_radius: int = 6371
+) -> pd.Series:
+    """
+    Vectorized haversine distance computation between two points. Kept for the DataFrame interface, see
+    paired_distances for the array kernel.
+
+    :param coords: pd.DataFrame with ordered columns ["lon1", "lat1", "lon2", "lat2"]
+    :param to_radians: If True, coordinates are converted to radiants
+    :param earth_radius: Earth radius
+    :return: pd.Series containing haversine distances
+    """
+    lon1, lat1, lon2, lat2 = (
+        coords[column].values.astype(float)
+        for column in ["lon1", "lat1", "lon2", "lat2"]
+    )
+    if to_radians:
+        points, other_points = radian_points(lon1, lat1), radian_points(lon2, lat2)
+    else:
+        points = RadianPoints(lon=lon1, lat=lat1, cos_lat=np.cos(lat1))
+        other_points = RadianPoints(lon=lon2, lat=lat2, cos_lat=np.cos(lat2))
+    return pd.Series(
+        paired_distances(points, other_points, earth_radius=earth_radius),
+        index=coords.index,
+    )
+
+
+def _to_cartesian(
+    lon: np.ndarray, lat: np.ndarray, earth_radius: int = 6371
+) -> np.ndarray:
+    return _points_to_cartesian(radian_points(lon, lat), earth_radius)
+
+
+def _points_to_cartesian(points: RadianPoints, earth_radius: int = 6371) -> np.ndarray:
+    return np.column_stack(
+        [
+            points.cos_lat * np.cos(points.lon),
+            points.cos_lat * np.sin(points.lon),
+            np.sin(points.lat),
+        ]
+    ) * (earth_radius * 1000)
+
+
+def _chord_length(max_distance: float, earth_radius: int = 6371) -> float:
+    # chord length of an arc of max_distance, slightly widened to not lose pairs due to rounding
+    chord: float = (
+        2 * earth_radius * 1000 * np.sin(max_distance / (2 * earth_radius * 1000))
+    )
+    return chord * (1 + 1e-9) + 1e-6
+
+
+def _pair_distances(
+    points: RadianPoints,
+    left: np.ndarray,
+    right: np.ndarray,
+    max_distance: int = 100,
+    earth_radius: int = 6371,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    distance: np.ndarray = paired_distances(
+        points.take(left), points.take(right), earth_radius=earth_radius
+    )
+    is_candidate: np.ndarray = distance < max_distance
+    return left[is_candidate], right[is_candidate], distance[is_candidate]
+
+
+def candidate_pairs(
+    lon: np.ndarray, lat: np.ndarray, max_distance: int = 100, earth_radius: int = 6371
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Determines all pairs of points which are closer than max_distance to each other. Coordinates are projected
+    once onto a sphere in cartesian space, where all pairs within the corresponding chord length are found by a
+    single bulk cKDTree query. Exact haversine distances are only computed for these pairs.
+
+    :param lon: Longitudes in degrees
+    :param lat: Latitudes in degrees
+    :param max_distance: Maximum distance in meters for a pair of points to be a potential duplicate candidate
+    :param earth_radius: Earth radius in kilometers
+    :return: Tuple of positional indices of the first and second point of each pair (first < second) and their
+        distance in meters
+    """
+    points: RadianPoints = radian_points(lon, lat)
+    tree: cKDTree = cKDTree(_points_to_cartesian(points, earth_radius))
+    radius: float = _chord_length(max_distance, earth_radius)
+    try:
+        pairs: np.ndarray = tree.query_pairs(r=radius, output_type="ndarray")
+    except TypeError:
+        # output_type requires scipy 1.6, older versions only return a set of pairs
+        pair_set: Set[Tuple[int, int]] = tree.query_pairs(r=radius)
+        pairs = np.fromiter(
+            itertools.chain.from_iterable(pair_set),
+            dtype=np.int64,
+            count=2 * len(pair_set),
+        ).reshape(-1, 2)
+    # both are unordered, sorted such that the result does not depend on the scipy version
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    return _pair_distances(
+        points,
+        pairs[:, 0].astype(np.int64),
+        pairs[:, 1].astype(np.int64),
+        max_distance=max_distance,
+        earth_radius=earth_radius,
+    )
+
+
+def candidate_pairs_around(
+    lon: np.ndarray,
+    lat: np.ndarray,
+    positions: np.ndarray,
+    max_distance: int = 100,
+    earth_radius: int = 6371,
+    tree: Optional[cKDTree] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Determines all pairs of points closer than max_distance to each other, where at least one point is one of
+    positions. Like candidate_pairs, but only queries the neighbourhood of some points.
+
+    :param lon: Longitudes in degrees
+    :param lat: Latitudes in degrees
+    :param positions: Positional indices of the points whose neighbourhood is queried
+    :param max_distance: Maximum distance in meters for a pair of points to be a potential duplicate candidate
+    :param earth_radius: Earth radius in kilometers
+    :param tree: cKDTree of all points in cartesian space, see cartesian_tree. Built if not provided
+    :return: Tuple of positional indices of the first and second point of each pair (first < second) and their
+        distance in meters
+    """
+    points: RadianPoints = radian_points(lon, lat)
+    positions = np.asarray(positions, dtype=np.int64)
+    tree = tree if tree is not None else cartesian_tree(lon, lat, earth_radius)
+    neighbors: List[List[int]] = (
+        tree.query_ball_point(
+            _points_to_cartesian(points.take(positions), earth_radius),
+            r=_chord_length(max_distance, earth_radius),
+        )
+        if len(positions) > 0
+        else []
+    )
+    sources: np.ndarray = np.repeat(positions, [len(n) for n in neighbors])
+    targets: np.ndarray = (
+        np.concatenate([np.asarray(n, dtype=np.int64) for n in neighbors])
+        if len(neighbors) > 0
+        else np.zeros(0, dtype=np.int64)
+    )
+    is_pair: np.ndarray = sources != targets
+    pairs: np.ndarray = np.unique(
+        np.column_stack(
+            [
+                np.minimum(sources[is_pair], targets[is_pair]),
+                np.maximum(sources[is_pair], targets[is_pair]),
+            ]
+        ),
+        axis=0,
+    )
+    return _pair_distances(
+        points,
+        pairs[:, 0],
+        pairs[:, 1],
+        max_distance=max_distance,
+        earth_radius=earth_radius,
+    )
+
+
+def cartesian_tree(
+    lon: np.ndarray, lat: np.ndarray, earth_radius: int = 6371
+) -> cKDTree:
+    """
+    Builds a cKDTree of points projected onto a sphere in cartesian space.
+
+    :param lon: Longitudes in degrees
+    :param lat: Latitudes in degrees
+    :param earth_radius: Earth radius in kilometers
+    :return: cKDTree
+    """
+    return cKDTree(_to_cartesian(lon, lat, earth_radius))
+
+
+def match_keys(
+    codes: np.ndarray, categories: np.ndarray, left: np.ndarray, right: np.ndarray
+) -> np.ndarray:
+    """
+    Computes key_similarity of categorical keys for all pairs, comparing each distinct pair of keys once.
+
+    :param codes: Category codes of the keys, -1 for missing keys
+    :param categories: Distinct keys
+    :param left: Positional indices of the first station of each pair
+    :param right: Positional indices of the second station of each pair
+    :return: np.ndarray containing the similarity of each pair
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    left_codes, right_codes = codes[left], codes[right]
+    is_valid: np.ndarray = (left_codes >= 0) & (right_codes >= 0)
+    code_pairs, inverse = np.unique(
+        left_codes[is_valid] * len(categories) + right_codes[is_valid],
+        return_inverse=True,
+    )
+    similarities: np.ndarray = np.array(
+        [
+            key_similarity(
+                categories[code_pair // len(categories)],
+                categories[code_pair % len(categories)],
+            )
+            for code_pair in code_pairs
+        ],
+        dtype=float,
+    )
+    matches: np.ndarray = np.zeros(len(left_codes), dtype=float)
+    matches[is_valid] = similarities[inverse.reshape(-1)]
+    return matches
+
+
+def key_lengths(codes: np.ndarray, categories: np.ndarray) -> np.ndarray:
+    """
+    Length of the categorical key of every station.
+
+    :param codes: Category codes of the keys, -1 for missing keys
+    :param categories: Distinct keys
+    :return: np.ndarray containing the length of each key, 0 for missing keys
+    """
+    lengths: np.ndarray = np.fromiter(
+        (len(c) for c in categories), dtype=np.int64, count=len(categories)
+    )
+    return np.append(lengths, 0)[np.asarray(codes, dtype=np.int64)]
+
+
+def address_match_bounds(
+    lengths: np.ndarray,
+    other_lengths: np.ndarray,
+    is_same_key: np.ndarray,
+    is_same_block: np.ndarray,
+    block_lengths: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lower and upper bound of the address similarity of pairs, known without comparing the addresses. The ratio of
+    SequenceMatcher is 2 * M / T, where T is the total length of both keys and M the number of matching characters,
+    which cannot exceed the length of the shorter key. Address keys end with their block key, i.e. normalized postcode
+    and town, hence keys of the same block share it as a common substring and the longest match found covers at least
+    its length. SequenceMatcher only drops popular characters for keys of 200 characters or more, which therefore
+    get no lower bound.
+
+    :param lengths: Length of the address key of the first station of each pair, 0 if missing
+    :param other_lengths: Length of the address key of the second station of each pair, 0 if missing
+    :param is_same_key: True for pairs with equal address keys
+    :param is_same_block: True for pairs with equal block keys
+    :param block_lengths: Length of the block key of each pair
+    :return: Tuple of lower and upper bound of the address similarity of each pair
+    """
+    total: np.ndarray = lengths + other_lengths
+    is_valid: np.ndarray = (lengths > 0) & (other_lengths > 0)
+    lower: np.ndarray = np.zeros(len(total), dtype=float)
+    upper: np.ndarray = np.zeros(len(total), dtype=float)
+    upper[is_valid] = (
+        2.0 * np.minimum(lengths, other_lengths)[is_valid] / total[is_valid]
+    )
+    has_lower: np.ndarray = (
+        is_valid & is_same_block & (np.maximum(lengths, other_lengths) < 200)
+    )
+    lower[has_lower] = 2.0 * block_lengths[has_lower] / total[has_lower]
+    lower[is_valid & is_same_key] = upper[is_valid & is_same_key] = 1.0
+    return lower, upper
+
+
+def undecided_pairs(
+    operator_match: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    distance: np.ndarray,
+    max_distance: int = 100,
+    score_weights: Optional[Dict[str, float]] = None,
+    score_threshold: float = 0.49,
+) -> np.ndarray:
+    """
+    Determines the pairs whose duplicate decision depends on the exact address similarity. Pairs scoring above
+    score_threshold with the lower bound are duplicates and pairs not scoring above it with the upper bound are not,
+    whatever their addresses are.
+
+    :param operator_match: Operator similarity of each pair
+    :param lower: Lower bound of the address similarity of each pair
+    :param upper: Upper bound of the address similarity of each pair
+    :param distance: Distance in meters of each pair
+    :param max_distance: Maximum distance used for normalizing the distance score
+    :param score_weights: Weights of operator, address and distance score
+    :param score_threshold: Minimum score for a pair to be considered a duplicate
+    :return: np.ndarray, True for pairs whose addresses need to be compared
+    """
+    return (
+        matching_scores(
+            operator_match,
+            lower,
+            distance,
+            max_distance=max_distance,
+            score_weights=score_weights,
+        )
+        <= score_threshold
+    ) & (
+        matching_scores(
+            operator_match,
+            upper,
+            distance,
+            max_distance=max_distance,
+            score_weights=score_weights,
+        )
+        > score_threshold
+    )
+
+
+def bounded_address_matches(
+    address_codes: np.ndarray,
+    address_categories: np.ndarray,
+    block_codes: np.ndarray,
+    block_categories: np.ndarray,
+    operator_match: np.ndarray,
+    left: np.ndarray,
+    right: np.ndarray,
+    distance: np.ndarray,
+    max_distance: int = 100,
+    score_weights: Optional[Dict[str, float]] = None,
+    score_threshold: float = 0.49,
+) -> np.ndarray:
+    """
+    Computes the address similarity of all pairs like match_keys, but only compares the addresses of pairs whose
+    duplicate decision depends on it, see address_match_bounds and undecided_pairs. All other pairs get the lower
+    bound of their address similarity, which keeps their matching score on the same side of score_threshold.
+
+    :param address_codes: Category codes of the address keys, -1 for missing keys
+    :param address_categories: Distinct address keys
+    :param block_codes: Category codes of the block keys (normalized postcode and town), -1 for missing keys
+    :param block_categories: Distinct block keys
+    :param operator_match: Operator similarity of each pair
+    :param left: Positional indices of the first station of each pair
+    :param right: Positional indices of the second station of each pair
+    :param distance: Distance in meters of each pair
+    :param max_distance: Maximum distance used for normalizing the distance score
+    :param score_weights: Weights of operator, address and distance score
+    :param score_threshold: Minimum score for a pair to be considered a duplicate
+    :return: np.ndarray containing the (bounded) address similarity of each pair
+    """
+    address_codes = np.asarray(address_codes, dtype=np.int64)
+    block_codes = np.asarray(block_codes, dtype=np.int64)
+    address_lengths: np.ndarray = key_lengths(address_codes, address_categories)
+    matches, upper = address_match_bounds(
+        address_lengths[left],
+        address_lengths[right],
+        address_codes[left] == address_codes[right],
+        (block_codes[left] == block_codes[right]) & (block_codes[left] >= 0),
+        key_lengths(block_codes, block_categories)[left],
+    )
+    is_undecided: np.ndarray = undecided_pairs(
+        operator_match,
+        matches,
+        upper,
+        distance,
+        max_distance=max_distance,
+        score_weights=score_weights,
+        score_threshold=score_threshold,
+    )
+    matches[is_undecided] = match_keys(
+        address_codes, address_categories, left[is_undecided], right[is_undecided]
+    )
+    return matches
+
+
+def matching_scores(
+    operator_match: np.ndarray,
+    address_match: np.ndarray,
+    distance: np.ndarray,
+    max_distance: int = 100,
+    score_weights: Optional[Dict[str, float]] = None,
+) -> np.ndarray:
+    """
+    Weighted sum of operator, address and distance similarity.
+
+    :param operator_match: Operator similarity of each pair
+    :param address_match: Address similarity of each pair
+    :param distance: Distance in meters of each pair
+    :param max_distance: Maximum distance used for normalizing the distance score
+    :param score_weights: Weights of operator, address and distance score
+    :return: np.ndarray containing the matching score of each pair
+    """
+    score_weights = (
+        score_weights
+        if score_weights
+        else dict(operator=0.2, address=0.1, distance=0.7)
+    )
+    return (
+        score_weights["operator"] * operator_match
+        + score_weights["address"] * address_match
+        + score_weights["distance"] * (1 - distance / max_distance)
+    )
@@ -1,19 +1,42 @@
+import functools
+import hashlib
 import json
 import os
 import geopandas as gpd
-import libpysal
 import numpy as np
 import pandas as pd
-from libpysal.weights.distance import KNN
-from shapely import wkt
-from typing import List, Dict, Optional
-from shapely.geometry.base import BaseGeometry
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from tqdm import tqdm
-from ..helpers import get_logger, object_hook
-from difflib import SequenceMatcher
+from ..helpers import ListColumn, default, get_logger, object_hook
+from ._matching import (
+    _sequence_ratio,
+    candidate_pairs,
+    candidate_pairs_around,
+    cartesian_tree,
+    haversine_distance,
+    key_similarity,
+    address_match_bounds,
+    bounded_address_matches,
+    match_keys,
+    matching_scores,
+    undecided_pairs,
+)
+from ._export import export_stations
+from ._parallel import score_pairs_parallel
+from ._raw_store import RAW_STORE_FILE, RawStore
+from ._run_stats import RunStats
 
 log = get_logger(os.path.basename(__file__))
 
+# preference ordering of data sources, when choosing between duplicates
+DATA_SOURCE_PREFERENCE: List[str] = ["BNA", "OCM", "OSM"]
+# attributes stored as ListColumn instead of a column of Python lists
+LIST_COLUMNS: List[str] = ["kw_list", "ampere_list", "volt_list", "socket_type_list"]
+# low cardinality attributes stored as categorical
+CATEGORICAL_COLUMNS: List[str] = ["data_source", "operator", "state", "country"]
+
 
 class Merger(object):
     def __init__(
@@ -21,12 +44,26 @@ class Merger(object):
         base_path: str = os.path.realpath(
             os.path.join(os.path.dirname(__file__), "../../../data")
         ),
+        run_stats_hooks: Optional[List[Callable[[Dict], None]]] = None,
     ):
+        """
+        :param base_path: Folder containing the processed files and the raw store of all connectors
+        :param run_stats_hooks: Functions called with the run stats of every merge, e.g. to send them to a metrics
+            system, see RunStats
+        """
         self.base_path: str = base_path
+        self.run_stats_hooks: Optional[List[Callable[[Dict], None]]] = run_stats_hooks
+        self.run_stats: RunStats = RunStats(hooks=run_stats_hooks)
         self.data_sources: List[Dict] = []
         self.stations_gdf: Optional[gpd.GeoDataFrame] = None
-        self.knn3: Optional[KNN] = None
+        self.list_columns: Dict[str, ListColumn] = {}
+        self.neighbor_offsets: Optional[np.ndarray] = None
+        self.neighbor_positions: Optional[np.ndarray] = None
+        self.neighbor_distances: Optional[np.ndarray] = None
+        self.representative_positions: Optional[np.ndarray] = None
+        self.attribute_positions: Optional[np.ndarray] = None
         self.merged_stations_gdf: Optional[gpd.GeoDataFrame] = None
+        self.raw_store: RawStore = RawStore(os.path.join(base_path, RAW_STORE_FILE))
 
     def _load_data(self, is_test: bool = False) -> "Merger":
         """
@@ -52,118 +89,313 @@ class Merger(object):
             raise RuntimeError("Could not read any json files!")
         return self
 
-    @staticmethod
-    def haversine_distance(
-        coords: pd.DataFrame, to_radians: bool = True, earth_radius: int = 6371
-    ) -> pd.Series:
-        """
-        Vectorized haversine distance computation between two points.
-
-        :param coords: pd.DataFrame with ordered columns ["lon1", "lat1", "lon2", "lat2"]
-        :param to_radians: If True, coordinates are converted to radiants
-        :param earth_radius: Earth radius
-        :return: pd.Series containing haversine distances
-        """
-        if to_radians:
-            coords = coords.apply(np.radians)
-        coords["delta_lat_sin_squared"] = (
-            np.sin((coords["lat2"] - coords["lat1"]) / 2) ** 2
-        )
-        coords["delta_lon_sin_squared"] = (
-            np.sin((coords["lon2"] - coords["lon1"]) / 2) ** 2
-        )
-        coords["a"] = (
-            coords["delta_lat_sin_squared"]
-            + np.cos(coords["lat1"])
-            * np.cos(coords["lat2"])
-            * coords["delta_lon_sin_squared"]
-        )
-        return earth_radius * 2 * np.arcsin(np.sqrt(coords["a"])) * 1000
+    haversine_distance = staticmethod(haversine_distance)
 
     def _prepare_geodataframe(self) -> gpd.GeoDataFrame:
         """
-        Turns list of json objects (Stations) into GeoDataFrame. Mainly by transforming coordinates to wkt and
-        flattening address & charging object.
+        Turns list of json objects (Stations) into a compact GeoDataFrame. Mainly by building point geometries from
+        the numeric lon & lat of each station and flattening address & charging object. Stations processed before lon &
+        lat were added fall back to their wkt coordinates. Low cardinality attributes are stored as categorical and
+        coordinates as float32 columns lon & lat. Lists are kept apart in list_columns, referenced by column
+        source_row, and the raw data or its hash is not copied at all, see get_raw_data.
 
         :return: gpd.GeoDataFrame
         """
 
-        def get_wkt(x: str) -> Optional[BaseGeometry]:
-            try:
-                return wkt.loads(x)
-            except:
-                log.debug(f"Could not convert string to wkt: {x}")
-                return None
-
-        stations_df = pd.json_normalize(data=self.data_sources, max_level=1).drop(
-            ["address.station_id", "charging.station_id"], axis=1
-        )
-        stations_df.columns = [c.split(".")[-1] for c in stations_df.columns]
-        assert len(set(stations_df.columns)) == stations_df.shape[1]
+        records: List[Dict] = []
+        for station in self.data_sources:
+            record: Dict = {}
+            for key, value in station.items():
+                if key in ("raw_data", "raw_data_hash"):
+                    continue
+                if isinstance(value, dict):
+                    record.update(
+                        {k: v for k, v in value.items() if k != "station_id"}
+                    )
+                    continue
+                record[key] = value
+            records += [record]
+        self.list_columns = {
+            column: ListColumn.from_lists([r.pop(column, None) for r in records])
+            for column in LIST_COLUMNS
+        }
+        stations_df: pd.DataFrame = pd.DataFrame.from_records(records)
+        del records
+        stations_df["source_row"] = np.arange(stations_df.shape[0], dtype=np.int32)
         original_no_rows: int = stations_df.shape[0]
-        stations_df["coordinates"] = stations_df["coordinates"].apply(get_wkt)
-        stations_df.dropna(subset=["coordinates"], inplace=True)
+        lon, lat = self._get_coordinates(stations_df)
+        stations_df.drop(
+            columns=[c for c in ["coordinates", "lon", "lat"] if c in stations_df],
+            inplace=True,
+        )
+        is_valid: np.ndarray = np.isfinite(lon) & np.isfinite(lat)
+        stations_df = stations_df.loc[is_valid, :]
+        lon, lat = lon[is_valid], lat[is_valid]
         log.debug(
-            f"Dropped {original_no_rows - stations_df.shape[0]} rows after loading wkt coordinates!"
+            f"Dropped {original_no_rows - stations_df.shape[0]} rows without valid coordinates!"
+        )
+        self.run_stats.drop(
+            "invalid_coordinates", original_no_rows - stations_df.shape[0]
         )
-        stations_df.rename(columns={"coordinates": "geometry"}, inplace=True)
         stations_gdf: gpd.GeoDataFrame = gpd.GeoDataFrame(
-            stations_df, geometry="geometry", crs={"init": "epsg:5243"}
+            stations_df,
+            geometry=gpd.points_from_xy(lon, lat),
+            crs={"init": "epsg:5243"},
         )
+        stations_gdf["lon"] = lon.astype(np.float32)
+        stations_gdf["lat"] = lat.astype(np.float32)
         stations_gdf["is_duplicate"] = False
         stations_gdf["merged_attributes"] = False
+        no_rows: int = stations_gdf.shape[0]
         stations_gdf.drop_duplicates(subset=["id"], inplace=True)
-        return (
-            stations_gdf.loc[
-                (stations_gdf.operator.notna() & stations_gdf.socket_type_list.notna()),
-                :,
-            ]
-            .reset_index(drop=True)
-            .sample(frac=1.0)
+        self.run_stats.drop("duplicate_id", no_rows - stations_gdf.shape[0])
+        for column in CATEGORICAL_COLUMNS:
+            stations_gdf[column] = stations_gdf[column].astype("category")
+        stations_gdf["operator_key"] = self._normalize_key(stations_gdf["operator"])
+        stations_gdf["address_key"] = self._normalize_key(
+            stations_gdf["street"].fillna("").astype(str)
+            + " "
+            + stations_gdf["postcode"].fillna("").astype(str)
+            + " "
+            + stations_gdf["town"].fillna("").astype(str)
+        )
+        # blocking key, every address key ends with the block key of its station
+        stations_gdf["block_key"] = self._normalize_key(
+            stations_gdf["postcode"].fillna("").astype(str)
+            + " "
+            + stations_gdf["town"].fillna("").astype(str)
+        )
+        has_operator: np.ndarray = stations_gdf.operator.notna().values
+        has_socket_types: np.ndarray = ~self.list_columns["socket_type_list"].isna()[
+            stations_gdf["source_row"].values
+        ]
+        self.run_stats.drop("missing_operator", (~has_operator).sum())
+        self.run_stats.drop(
+            "missing_socket_types", (has_operator & ~has_socket_types).sum()
+        )
+        return stations_gdf.loc[(has_operator & has_socket_types), :].reset_index(
+            drop=True
+        )
+
+    @staticmethod
+    def _get_coordinates(stations_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reads longitude and latitude of all stations as float arrays. Stations without numeric lon & lat are parsed
+        from their wkt coordinates "POINT(lon lat)" in bulk. Invalid coordinates are NaN.
+
+        :param stations_df: pd.DataFrame with columns lon & lat and/or coordinates
+        :return: Tuple of longitudes and latitudes in degrees
+        """
+        lon: pd.Series = pd.Series(np.nan, index=stations_df.index)
+        lat: pd.Series = pd.Series(np.nan, index=stations_df.index)
+        if ("lon" in stations_df) & ("lat" in stations_df):
+            lon = pd.to_numeric(stations_df["lon"], errors="coerce").astype(float)
+            lat = pd.to_numeric(stations_df["lat"], errors="coerce").astype(float)
+        is_missing: pd.Series = lon.isna() | lat.isna()
+        if is_missing.any() & ("coordinates" in stations_df):
+            points: pd.DataFrame = (
+                stations_df.loc[is_missing, "coordinates"]
+                .astype(str)
+                .str.extract(r"^\s*POINT\s*\(\s*(\S+)\s+(\S+)\s*\)\s*$")
+            )
+            lon.loc[is_missing] = pd.to_numeric(points[0], errors="coerce")
+            lat.loc[is_missing] = pd.to_numeric(points[1], errors="coerce")
+        return lon.values.astype(float), lat.values.astype(float)
+
+    def _materialize(self, stations_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """
+        Adds the list attributes back to a (small) selection of stations, e.g. the merged stations. Column source_row
+        is dropped, since it depends on the order of the input.
+
+        :param stations_gdf: gpd.GeoDataFrame as returned by _prepare_geodataframe
+        :return: gpd.GeoDataFrame with list columns
+        """
+        stations_gdf = stations_gdf.copy()
+        for column, list_column in self.list_columns.items():
+            stations_gdf[column] = list_column.take(stations_gdf["source_row"].values)
+        return stations_gdf.drop(columns=["source_row"])
+
+    def _source_rows(self) -> pd.Series:
+        """
+        :return: Position in data_sources of every station in stations_gdf by its id. Of several stations with the
+            same id, e.g. BNA rows of one site, this is the station kept by _prepare_geodataframe
+        """
+        if self.stations_gdf is None:
+            raise RuntimeError("No stations, prepare or merge stations first!")
+        source_rows: pd.Series = pd.Series(
+            self.stations_gdf["source_row"].values,
+            index=self.stations_gdf["id"].values,
+        )
+        # a station taking over the attributes of a duplicate also takes its id & source_row, see
+        # _apply_merge_decisions, hence rows of the same id always point to the same station
+        return source_rows.loc[~source_rows.index.duplicated()]
+
+    def get_raw_data(
+        self, station_ids: List[bytes], source_rows: Optional[pd.Series] = None
+    ) -> List[Optional[str]]:
+        """
+        Looks up the raw data of stations, which is not part of stations_gdf, in the raw store by its hash. Stations
+        processed before the raw store was introduced still contain their raw data.
+
+        :param station_ids: Ids of stations in stations_gdf
+        :param source_rows: Result of _source_rows, passed to look up many lists of ids without building it again
+        :return: List containing the raw data of each station or None if unknown
+        """
+        source_rows = source_rows if source_rows is not None else self._source_rows()
+        positions: np.ndarray = source_rows.reindex(station_ids).values
+        raw_data: List[Optional[str]] = [None] * len(station_ids)
+        raw_data_hashes: Dict[int, str] = {}
+        for number, position in enumerate(positions):
+            if position != position:
+                continue
+            station: Dict = self.data_sources[int(position)]
+            if "raw_data_hash" in station:
+                raw_data_hashes[number] = station["raw_data_hash"]
+            else:
+                raw_data[number] = station.get("raw_data")
+        if raw_data_hashes:
+            for number, record in zip(
+                raw_data_hashes, self.raw_store.get_many(list(raw_data_hashes.values()))
+            ):
+                raw_data[number] = record
+        return raw_data
+
+    @staticmethod
+    def _normalize_key(values: pd.Series) -> pd.Series:
+        """
+        Normalizes strings for fuzzy matching (lower case, single whitespace) and stores them as categorical, such
+        that every distinct key is only represented once.
+
+        :param values: pd.Series containing strings
+        :return: pd.Series of dtype category, with missing or empty strings as NaN
+        """
+        keys: pd.Series = (
+            values.astype(object)
+            .where(values.notna(), "")
+            .astype(str)
+            .str.lower()
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip()
+        )
+        return keys.where(keys != "", np.nan).astype("category")
+
+    def _match_keys(
+        self, column: str, left: np.ndarray, right: np.ndarray
+    ) -> np.ndarray:
+        """
+        Computes key_similarity of a categorical key column for all pairs, comparing each distinct pair of keys once.
+
+        :param column: Name of a categorical key column e.g. "operator_key"
+        :param left: Positional indices of the first station of each pair
+        :param right: Positional indices of the second station of each pair
+        :return: np.ndarray containing the similarity of each pair
+        """
+        return match_keys(
+            self.stations_gdf[column].cat.codes.values,
+            self.stations_gdf[column].cat.categories.values,
+            left,
+            right,
+        )
+
+    def _get_candidate_pairs(
+        self, max_distance: int = 100, earth_radius: int = 6371
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Determines all pairs of stations which are closer than max_distance to each other, see candidate_pairs.
+
+        :param max_distance: Maximum distance in meters for a pair of stations to be a potential duplicate candidate
+        :param earth_radius: Earth radius in kilometers
+        :return: Tuple of positional indices of the first and second station of each pair and their distance in meters
+        """
+        return candidate_pairs(
+            self.stations_gdf["lon"].values,
+            self.stations_gdf["lat"].values,
+            max_distance=max_distance,
+            earth_radius=earth_radius,
+        )
+
+    def _index_candidate_pairs(
+        self, left: np.ndarray, right: np.ndarray, distance: np.ndarray
+    ) -> "Merger":
+        """
+        Stores candidate pairs as neighbor lists in both directions, such that the neighbors of the station at
+        position i are neighbor_positions[neighbor_offsets[i]:neighbor_offsets[i + 1]]. Also resets the merge decisions
+        of the greedy merge, which are kept as arrays by position: representative_positions holds the position of the
+        station a duplicate was merged into (-1 if no duplicate) and attribute_positions the position of the station
+        whose attributes a station carries. Both are applied to stations_gdf at once by _apply_merge_decisions.
+
+        :param left: Positional indices of the first station of each pair
+        :param right: Positional indices of the second station of each pair
+        :param distance: Distance in meters of each pair
+        :return: Merger object
+        """
+        source: np.ndarray = np.concatenate([left, right])
+        order: np.ndarray = np.argsort(source, kind="stable")
+        self.neighbor_positions = np.concatenate([right, left])[order]
+        self.neighbor_distances = np.concatenate([distance, distance])[order]
+        self.neighbor_offsets = np.searchsorted(
+            source[order], np.arange(self.stations_gdf.shape[0] + 1)
+        )
+        self.representative_positions = np.full(
+            self.stations_gdf.shape[0], -1, dtype=np.int64
+        )
+        self.attribute_positions = np.arange(self.stations_gdf.shape[0], dtype=np.int64)
+        return self
+
+    def _apply_merge_decisions(self) -> "Merger":
+        """
+        Applies all merge decisions of the greedy merge to stations_gdf in one pass: stations take over the attributes
+        of the station chosen by _merge_duplicates and duplicates are flagged.
+
+        :return: Merger object
+        """
+        positions: np.ndarray = np.arange(self.stations_gdf.shape[0])
+        is_replaced: np.ndarray = self.attribute_positions != positions
+        index: pd.Index = self.stations_gdf.index
+        self.stations_gdf = self.stations_gdf.iloc[self.attribute_positions]
+        self.stations_gdf.index = index
+        self.stations_gdf["is_duplicate"] = self.representative_positions >= 0
+        self.stations_gdf["merged_attributes"] = (
+            self.stations_gdf["merged_attributes"].values | is_replaced
         )
+        return self
 
     def _get_duplicate_candidates(
         self, current_station: pd.Series, max_distance: int = 100
     ) -> pd.DataFrame:
         """
-        Determines relevant neighboring stations based on haversine distance to current_station.
+        Determines relevant neighboring stations of current_station based on the precomputed candidate pairs.
 
         :param current_station: pd.Series containing some Station
         :param max_distance: Maximum distance for determining if neighboring distance is a potential duplicate candidate
         :return: pd.DataFrame containing potential duplicate candidates
         """
-        current_station_id = current_station.name
-        knn_neighbors = self.knn3.neighbors[current_station_id]
-        neighbors = self.stations_gdf.loc[
-            self.stations_gdf.index.isin(knn_neighbors)
-            & (self.stations_gdf["is_duplicate"] != True),
+        position: int = self.stations_gdf.index.get_loc(current_station.name)
+        start, end = (
+            self.neighbor_offsets[position],
+            self.neighbor_offsets[position + 1],
+        )
+        neighbor_positions: np.ndarray = self.neighbor_positions[start:end]
+        neighbor_distances: np.ndarray = self.neighbor_distances[start:end]
+        # neighbors carry the attributes of the station they were merged with so far
+        neighbors: pd.DataFrame = self.stations_gdf.iloc[
+            self.attribute_positions[neighbor_positions]
+        ].copy()
+        neighbors.index = self.stations_gdf.index[neighbor_positions]
+        neighbors["is_duplicate"] = self.representative_positions[neighbor_positions] >= 0
+        neighbors["merged_attributes"] = (
+            neighbors["merged_attributes"].values
+            | (self.attribute_positions[neighbor_positions] != neighbor_positions)
+        )
+        neighbors.insert(0, "distance_meter", neighbor_distances)
+        relevant_neighbors: pd.DataFrame = neighbors.loc[
+            (neighbors["distance_meter"] < max_distance)
+            & (neighbors["is_duplicate"] != True),
             :,
         ]
-        neighbor_distances = neighbors.geometry.bounds.iloc[:, :2].rename(
-            columns={"minx": "lon1", "miny": "lat1"}
-        )
-        (
-            neighbor_distances["lon2"],
-            neighbor_distances["lat2"],
-            _,
-            _,
-        ) = current_station.geometry.bounds
-        neighbor_distances["distance_meter"] = self.haversine_distance(
-            neighbor_distances
-        )
-        relevant_neighbors = neighbor_distances.loc[
-            neighbor_distances["distance_meter"] < max_distance, :
-        ]
         if relevant_neighbors.empty:
             return pd.DataFrame()
-
-        return pd.merge(
-            relevant_neighbors.loc[:, "distance_meter"],
-            self.stations_gdf,
-            how="left",
-            left_index=True,
-            right_index=True,
-        )
+        return relevant_neighbors
 
     def _determine_duplicates(
         self,
@@ -179,35 +411,61 @@ class Merger(object):
             else dict(operator=0.2, address=0.1, distance=0.7)
         )
 
-        duplicate_candidates["operator_match"] = duplicate_candidates.operator.apply(
-            lambda x: SequenceMatcher(None, current_station.operator, str(x)).ratio()
-            if (current_station.operator is not None) & (x is not None)
-            else 0.0
+        duplicate_candidates["operator_match"] = [
+            key_similarity(current_station["operator_key"], key)
+            for key in duplicate_candidates["operator_key"].values
+        ]
+        # addresses are only compared if the bounds of their similarity leave the decision open
+        address_key: Optional[str] = current_station["address_key"]
+        address_keys: np.ndarray = np.asarray(
+            duplicate_candidates["address_key"].values, dtype=object
         )
-
-        current_station_address = f"{current_station['street']}{current_station['postcode']}{current_station['town']}"
-        duplicate_candidates["address"] = duplicate_candidates[
-            ["street", "postcode", "town"]
-        ].apply(lambda x: f"{x['street']}{x['postcode']}{x['town']}", axis=1)
-        duplicate_candidates["address_match"] = duplicate_candidates.address.apply(
-            lambda x: SequenceMatcher(None, current_station_address, x).ratio()
-            if (current_station_address != "NoneNoneNone") & (x != "NoneNoneNone")
-            else 0.0,
+        block_keys: np.ndarray = np.asarray(
+            duplicate_candidates["block_key"].values, dtype=object
         )
-
-        operator_score = (
-            score_weights["operator"] * duplicate_candidates["operator_match"]
+        address_match, upper = address_match_bounds(
+            np.full(
+                len(address_keys),
+                len(address_key) if isinstance(address_key, str) else 0,
+            ),
+            np.array(
+                [len(key) if isinstance(key, str) else 0 for key in address_keys],
+                dtype=np.int64,
+            ),
+            address_keys == address_key,
+            isinstance(current_station["block_key"], str)
+            & (block_keys == current_station["block_key"]),
+            np.full(
+                len(block_keys),
+                len(current_station["block_key"])
+                if isinstance(current_station["block_key"], str)
+                else 0,
+            ),
         )
-        address_score = score_weights["address"] * duplicate_candidates["address_match"]
-        distance_score = score_weights["distance"] * (
-            1 - duplicate_candidates["distance_meter"] / max_distance
+        is_undecided: np.ndarray = undecided_pairs(
+            duplicate_candidates["operator_match"].values,
+            address_match,
+            upper,
+            duplicate_candidates["distance_meter"].values,
+            max_distance=max_distance,
+            score_weights=score_weights,
+            score_threshold=score_threshold,
         )
-        duplicate_candidates["matching_score"] = (
-            operator_score + address_score + distance_score
+        address_match[is_undecided] = [
+            key_similarity(address_key, key) for key in address_keys[is_undecided]
+        ]
+        duplicate_candidates["address_match"] = address_match
+
+        duplicate_candidates["matching_score"] = matching_scores(
+            duplicate_candidates["operator_match"].values,
+            address_match,
+            duplicate_candidates["distance_meter"].values,
+            max_distance=max_distance,
+            score_weights=score_weights,
         )
-        duplicate_candidates.loc[
-            (duplicate_candidates.matching_score > score_threshold), "is_duplicate"
-        ] = True
+        duplicate_candidates["is_duplicate"] = duplicate_candidates[
+            "is_duplicate"
+        ].values | (duplicate_candidates["matching_score"].values > score_threshold)
         return duplicate_candidates.loc[duplicate_candidates.is_duplicate, :]
 
     def _merge_duplicates(
@@ -257,10 +515,12 @@ class Merger(object):
             # in case of BNA vs OCM / OSM we always stick with BNA (we do not need to do anything)
             # TODO: check for missing attributes and merge in smart way
             return self
-        data_sources = ["BNA", "OCM", "OSM"]
         # generate data source pairs following preference ordering: BNA > OCM > OSM
         ordered_data_source_pairs = [
-            (x, y) for x in data_sources for y in data_sources if x != "BNA"
+            (x, y)
+            for x in DATA_SOURCE_PREFERENCE
+            for y in DATA_SOURCE_PREFERENCE
+            if x != "BNA"
         ]
         for (current_data_source, duplicate_data_source) in ordered_data_source_pairs:
             if current_station["data_source"] != current_data_source:
@@ -271,26 +531,275 @@ class Merger(object):
             if mergeable_stations.empty:
                 continue
 
-            selected_station = mergeable_stations.iloc[0][current_station.index].copy()
-            selected_station.loc[["is_duplicate", "merged_attributes"]] = False, True
-            self.stations_gdf.loc[current_station.name] = selected_station
+            # the station takes over the attributes of the selected duplicate, applied by _apply_merge_decisions
+            position: int = self.stations_gdf.index.get_loc(current_station.name)
+            selected_position: int = self.stations_gdf.index.get_loc(
+                mergeable_stations.index[0]
+            )
+            self.attribute_positions[position] = self.attribute_positions[
+                selected_position
+            ]
 
             break
         return self
 
-    def merge(
+    def _score_candidate_pairs(
         self,
-        stations_list: List[Dict] = None,
+        left: np.ndarray,
+        right: np.ndarray,
+        distance: np.ndarray,
+        max_distance: int = 100,
+        score_weights: Optional[Dict[str, float]] = None,
         score_threshold: float = 0.49,
+    ) -> np.ndarray:
+        """
+        Computes the matching score of all candidate pairs in one pass, using the same weighting of operator, address
+        and distance similarity as _determine_duplicates. Addresses are only compared for pairs whose decision depends
+        on them, see bounded_address_matches, hence scores are exact up to the side of score_threshold they are on.
+
+        :param left: Positional indices of the first station of each pair
+        :param right: Positional indices of the second station of each pair
+        :param distance: Distance in meters of each pair
+        :param max_distance: Maximum distance used for normalizing the distance score
+        :param score_weights: Weights of operator, address and distance score
+        :param score_threshold: Minimum score for a pair to be considered a duplicate
+        :return: np.ndarray containing the matching score of each pair
+        """
+        operator_match: np.ndarray = self._match_keys("operator_key", left, right)
+        return matching_scores(
+            operator_match,
+            bounded_address_matches(
+                self.stations_gdf["address_key"].cat.codes.values,
+                self.stations_gdf["address_key"].cat.categories.values,
+                self.stations_gdf["block_key"].cat.codes.values,
+                self.stations_gdf["block_key"].cat.categories.values,
+                operator_match,
+                left,
+                right,
+                distance,
+                max_distance=max_distance,
+                score_weights=score_weights,
+                score_threshold=score_threshold,
+            ),
+            distance,
+            max_distance=max_distance,
+            score_weights=score_weights,
+        )
+
+    def _score_candidate_pairs_parallel(
+        self,
         max_distance: int = 100,
-        score_weights: Optional[Dict] = None,
+        score_weights: Optional[Dict[str, float]] = None,
+        score_threshold: float = 0.49,
+        n_jobs: int = 2,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Finds and scores all candidate pairs in spatial tiles processed by n_jobs processes, see score_pairs_parallel.
+
+        :param max_distance: Maximum distance in meters for a pair of stations to be a potential duplicate candidate
+        :param score_weights: Weights of operator, address and distance score
+        :param score_threshold: Minimum score for a pair to be considered a duplicate
+        :param n_jobs: Number of worker processes
+        :return: Tuple of positional indices of both stations of each pair, their distance and matching score
+        """
+        return score_pairs_parallel(
+            self.stations_gdf["lon"].values,
+            self.stations_gdf["lat"].values,
+            self.stations_gdf["operator_key"].cat.codes.values,
+            self.stations_gdf["operator_key"].cat.categories.values,
+            self.stations_gdf["address_key"].cat.codes.values,
+            self.stations_gdf["address_key"].cat.categories.values,
+            self.stations_gdf["block_key"].cat.codes.values,
+            self.stations_gdf["block_key"].cat.categories.values,
+            max_distance=max_distance,
+            score_weights=score_weights,
+            score_threshold=score_threshold,
+            n_jobs=n_jobs,
+            counters=self.run_stats.counters,
+        )
+
+    def _label_clusters(
+        self,
+        left: np.ndarray,
+        right: np.ndarray,
+        scores: np.ndarray,
+        no_stations: int,
+        score_threshold: float = 0.49,
+    ) -> np.ndarray:
+        """
+        Groups all stations connected by candidate pairs scoring above score_threshold into clusters, i.e. connected
+        components.
+
+        :param left: Positional indices of the first station of each pair
+        :param right: Positional indices of the second station of each pair
+        :param scores: Matching score of each pair
+        :param no_stations: Number of stations
+        :param score_threshold: Minimum score for a pair to be considered a duplicate
+        :return: np.ndarray containing the cluster label of each station
+        """
+        is_duplicate_pair: np.ndarray = scores > score_threshold
+        graph: coo_matrix = coo_matrix(
+            (
+                np.ones(is_duplicate_pair.sum(), dtype=bool),
+                (left[is_duplicate_pair], right[is_duplicate_pair]),
+            ),
+            shape=(no_stations, no_stations),
+        )
+        return connected_components(graph, directed=False)[1]
+
+    @staticmethod
+    def _assign_cluster_ids(
+        labels: np.ndarray,
+        station_ids: np.ndarray,
+        previous_cluster_ids: Optional[np.ndarray] = None,
+        reserved_cluster_ids: Optional[Set[bytes]] = None,
+    ) -> np.ndarray:
+        """
+        Assigns stable ids to clusters. A cluster keeps the previous cluster id shared by most of its members, where
+        larger clusters win if several clusters claim the same previous id. All other clusters get the smallest id of
+        their members, which is not in use yet.
+
+        :param labels: Cluster label of each station
+        :param station_ids: Id of each station
+        :param previous_cluster_ids: Previous cluster id of each station, None for stations without a previous cluster
+        :param reserved_cluster_ids: Cluster ids in use by other clusters
+        :return: np.ndarray containing the cluster id of each station
+        """
+        clusters: pd.DataFrame = pd.DataFrame(
+            dict(
+                label=labels,
+                id=station_ids,
+                previous=previous_cluster_ids
+                if previous_cluster_ids is not None
+                else np.full(len(labels), None, dtype=object),
+            )
+        )
+        taken: Set[bytes] = set(reserved_cluster_ids) if reserved_cluster_ids else set()
+        cluster_ids: Dict[int, bytes] = {}
+        overlaps: pd.DataFrame = (
+            clusters.dropna(subset=["previous"])
+            .groupby(["label", "previous"])
+            .size()
+            .rename("overlap")
+            .reset_index()
+        )
+        if not overlaps.empty:
+            overlaps["size"] = overlaps["label"].map(clusters.groupby("label").size())
+            overlaps.sort_values(
+                ["overlap", "size", "previous", "label"],
+                ascending=[False, False, True, True],
+                inplace=True,
+            )
+            for label, previous in zip(overlaps["label"], overlaps["previous"]):
+                if (label in cluster_ids) | (previous in taken):
+                    continue
+                cluster_ids[label] = previous
+                taken.add(previous)
+        smallest_ids: pd.Series = clusters.groupby("label")["id"].min()
+        for label, smallest_id in smallest_ids.items():
+            if label in cluster_ids:
+                continue
+            if smallest_id in taken:
+                # the smallest id is already used by another cluster, fall back to next free member id
+                member_ids: List[bytes] = sorted(
+                    clusters.loc[clusters["label"] == label, "id"]
+                )
+                smallest_id = next((i for i in member_ids if i not in taken), None)
+                if smallest_id is None:
+                    smallest_id = (
+                        hashlib.sha256(b"".join(member_ids)).hexdigest().encode("utf8")
+                    )
+            cluster_ids[label] = smallest_id
+            taken.add(smallest_id)
+        return clusters["label"].map(cluster_ids).values
+
+    def _select_representatives(self) -> "Merger":
+        """
+        Picks one representative per cluster following BNA > OCM > OSM. Ties within the same data source are broken by
+        station id, such that the result does not depend on the order of the stations.
+
+        :return: Merger object
+        """
+        no_stations: int = self.stations_gdf.shape[0]
+        preference: Dict[str, int] = {
+            data_source: rank for rank, data_source in enumerate(DATA_SOURCE_PREFERENCE)
+        }
+        ranking: pd.DataFrame = pd.DataFrame(
+            dict(
+                cluster_id=self.stations_gdf["cluster_id"].values,
+                rank=self.stations_gdf["data_source"]
+                .map(preference)
+                .fillna(len(preference))
+                .values,
+                id=self.stations_gdf["id"].values,
+            )
+        ).sort_values(["cluster_id", "rank", "id"])
+        is_representative: np.ndarray = np.zeros(no_stations, dtype=bool)
+        is_representative[
+            ranking.index.values[~ranking["cluster_id"].duplicated().values]
+        ] = True
+        self.stations_gdf["is_duplicate"] = ~is_representative
+        # the representative keeps its own attributes and takes none of its duplicates, like a BNA station in the
+        # greedy merge, which only flags stations which took over attributes
+        self.stations_gdf["merged_attributes"] = False
+        representative_sources: pd.Series = pd.Series(
+            self.stations_gdf["data_source"].values[is_representative],
+            index=self.stations_gdf["cluster_id"].values[is_representative],
+        )
+        source_pairs: pd.Series = (
+            pd.DataFrame(
+                dict(
+                    data_source=representative_sources.reindex(
+                        self.stations_gdf["cluster_id"].values[~is_representative]
+                    ).values,
+                    duplicate_data_source=self.stations_gdf["data_source"].values[
+                        ~is_representative
+                    ],
+                )
+            )
+            .astype(str)
+            .groupby(["data_source", "duplicate_data_source"])
+            .size()
+        )
+        for (data_source, duplicate_data_source), no_duplicates in source_pairs.items():
+            self.run_stats.add_duplicates(
+                data_source, duplicate_data_source, no_duplicates
+            )
+        self.merged_stations_gdf = self._materialize(
+            self.stations_gdf.loc[~self.stations_gdf["is_duplicate"], :]
+        )
+        return self
+
+    def _cluster_duplicates(
+        self,
+        left: np.ndarray,
+        right: np.ndarray,
+        scores: np.ndarray,
+        score_threshold: float = 0.49,
     ) -> "Merger":
-        score_weights = (
-            score_weights
-            if score_weights
-            else dict(operator=0.2, address=0.1, distance=0.7)
+        """
+        Groups all stations connected by candidate pairs scoring above score_threshold into clusters, assigns cluster
+        ids and picks one representative per cluster.
+
+        :param left: Positional indices of the first station of each pair
+        :param right: Positional indices of the second station of each pair
+        :param scores: Matching score of each pair
+        :param score_threshold: Minimum score for a pair to be considered a duplicate
+        :return: Merger object
+        """
+        labels: np.ndarray = self._label_clusters(
+            left,
+            right,
+            scores,
+            self.stations_gdf.shape[0],
+            score_threshold=score_threshold,
+        )
+        self.stations_gdf["cluster_id"] = self._assign_cluster_ids(
+            labels, self.stations_gdf["id"].values
         )
+        return self._select_representatives()
 
+    def _set_data_sources(self, stations_list: Optional[List[Dict]] = None) -> "Merger":
         if stations_list is not None:
             if len(stations_list) < 1:
                 raise RuntimeError("Your provided list of stations is empty!")
@@ -300,58 +809,368 @@ class Merger(object):
                 self._load_data()
             except Exception as anyErr:
                 log.error(f"Could not load the processed station files! {anyErr}")
+        return self
+
+    def save_clusters(self, file_path: Optional[str] = None) -> "Merger":
+        """
+        Persists the cluster id of every station, such that the next merge can run incrementally.
 
-        self.stations_gdf = self._prepare_geodataframe()
-        self.knn3 = libpysal.weights.KNN.from_dataframe(self.stations_gdf, k=40)
+        :param file_path: Defaults to stations__clusters.json in base_path
+        :return: Merger object
+        """
+        file_path = (
+            file_path
+            if file_path
+            else os.path.join(self.base_path, "stations__clusters.json")
+        )
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(
+                [
+                    dict(id=station_id, cluster_id=cluster_id)
+                    for station_id, cluster_id in zip(
+                        self.stations_gdf["id"].values,
+                        self.stations_gdf["cluster_id"].values,
+                    )
+                ],
+                f,
+                ensure_ascii=False,
+                default=default,
+            )
+        return self
+
+    def load_clusters(self, file_path: Optional[str] = None) -> pd.DataFrame:
+        """
+        Loads cluster ids persisted by save_clusters.
+
+        :param file_path: Defaults to stations__clusters.json in base_path
+        :return: pd.DataFrame with columns ["id", "cluster_id"]
+        """
+        file_path = (
+            file_path
+            if file_path
+            else os.path.join(self.base_path, "stations__clusters.json")
+        )
+        with open(file_path, "r", encoding="utf-8") as f:
+            return pd.DataFrame(
+                json.load(f, object_hook=object_hook), columns=["id", "cluster_id"]
+            )
+
+    def merge_incremental(
+        self,
+        stations_list: List[Dict] = None,
+        previous_clusters: Optional[pd.DataFrame] = None,
+        changed_ids: Optional[List[bytes]] = None,
+        score_threshold: float = 0.49,
+        max_distance: int = 100,
+        score_weights: Optional[Dict] = None,
+    ) -> "Merger":
+        """
+        Merges all stations like merge with method "cluster", but only re-scores the neighbourhood of stations, which
+        are new, changed or removed since the previous merge. Clusters keep their id across runs. The result equals a
+        full merge, as long as score_threshold, max_distance and score_weights did not change.
+
+        :param stations_list: List of all current Stations. If None, processed files are loaded from base_path
+        :param previous_clusters: pd.DataFrame with columns ["id", "cluster_id"] of the previous merge. If None, loaded
+            via load_clusters
+        :param changed_ids: Ids of stations whose attributes changed since the previous merge. Ids of new and removed
+            stations are derived from previous_clusters
+        :param score_threshold: Minimum matching score for two stations to be considered duplicates
+        :param max_distance: Maximum distance in meters for two stations to be considered duplicates
+        :param score_weights: Weights of operator, address and distance score
+        :return: Merger object
+        """
+        _sequence_ratio.cache_clear()
+        self.run_stats = RunStats(hooks=self.run_stats_hooks)
+        with self.run_stats.stage("load_data"):
+            self._set_data_sources(stations_list)
+            previous_clusters = (
+                previous_clusters
+                if previous_clusters is not None
+                else self.load_clusters()
+            )
+        with self.run_stats.stage("prepare_geodataframe"):
+            self.stations_gdf = (
+                self._prepare_geodataframe().sort_values("id").reset_index(drop=True)
+            )
+        station_ids: np.ndarray = self.stations_gdf["id"].values
+        previous_cluster_ids: np.ndarray = np.array(
+            pd.Series(
+                previous_clusters["cluster_id"].values,
+                index=previous_clusters["id"].values,
+            )
+            .reindex(station_ids)
+            .values,
+            dtype=object,
+        )
+        previous_cluster_ids[pd.isna(previous_cluster_ids)] = None
+        removed_ids: Set[bytes] = set(previous_clusters["id"]) - set(station_ids)
+        is_dirty: np.ndarray = pd.isna(previous_cluster_ids) | np.isin(
+            station_ids, list(changed_ids) if changed_ids else []
+        )
+        dirty_clusters: Set[bytes] = set(previous_cluster_ids[is_dirty]) | set(
+            previous_clusters.loc[
+                previous_clusters["id"].isin(removed_ids), "cluster_id"
+            ]
+        )
+        dirty_clusters.discard(None)
+        is_affected: np.ndarray = is_dirty | np.isin(
+            previous_cluster_ids, list(dirty_clusters)
+        )
+
+        lon: np.ndarray = self.stations_gdf["lon"].values.astype(float)
+        lat: np.ndarray = self.stations_gdf["lat"].values.astype(float)
+        tree = cartesian_tree(lon, lat)
+        is_queried: np.ndarray = np.zeros(len(station_ids), dtype=bool)
+        pairs: List[Tuple[np.ndarray, ...]] = []
+        while (is_affected & ~is_queried).any():
+            # duplicates of affected stations pull in the whole previous cluster they belong to
+            positions: np.ndarray = np.flatnonzero(is_affected & ~is_queried)
+            is_queried[positions] = True
+            with self.run_stats.stage("candidate_search"):
+                left, right, distance = candidate_pairs_around(
+                    lon, lat, positions, max_distance=max_distance, tree=tree
+                )
+            self.run_stats.count("candidate_pairs", len(left))
+            with self.run_stats.stage("scoring"):
+                scores: np.ndarray = self._score_candidate_pairs(
+                    left,
+                    right,
+                    distance,
+                    max_distance=max_distance,
+                    score_weights=score_weights,
+                    score_threshold=score_threshold,
+                )
+            pairs += [(left, right, scores)]
+            is_duplicate_pair: np.ndarray = scores > score_threshold
+            reached_clusters: Set[bytes] = set(
+                previous_cluster_ids[left[is_duplicate_pair]]
+            ) | set(previous_cluster_ids[right[is_duplicate_pair]])
+            reached_clusters.discard(None)
+            is_affected |= np.isin(previous_cluster_ids, list(reached_clusters))
+
+        left, right, scores = (
+            np.concatenate([p[i] for p in pairs])
+            if pairs
+            else np.zeros(0, dtype=float if i == 2 else np.int64)
+            for i in range(3)
+        )
+        with self.run_stats.stage("clustering"):
+            is_inside: np.ndarray = is_affected[left] & is_affected[right]
+            affected_positions: np.ndarray = np.flatnonzero(is_affected)
+            compact_positions: np.ndarray = np.full(
+                len(station_ids), -1, dtype=np.int64
+            )
+            compact_positions[affected_positions] = np.arange(len(affected_positions))
+            labels: np.ndarray = self._label_clusters(
+                compact_positions[left[is_inside]],
+                compact_positions[right[is_inside]],
+                scores[is_inside],
+                len(affected_positions),
+                score_threshold=score_threshold,
+            )
+            cluster_ids: np.ndarray = previous_cluster_ids.copy()
+            cluster_ids[affected_positions] = self._assign_cluster_ids(
+                labels,
+                station_ids[affected_positions],
+                previous_cluster_ids[affected_positions],
+                reserved_cluster_ids=set(previous_cluster_ids[~is_affected]),
+            )
+            log.debug(
+                f"Re-clustered {len(affected_positions)} of {len(station_ids)} "
+                f"stations!"
+            )
+            self.stations_gdf["cluster_id"] = cluster_ids
+            self._select_representatives()
+        self.run_stats.count(
+            "sequence_matcher_calls", _sequence_ratio.cache_info().misses
+        )
+        self.run_stats.emit()
+        return self
+
+    def merge(
+        self,
+        stations_list: List[Dict] = None,
+        score_threshold: float = 0.49,
+        max_distance: int = 100,
+        score_weights: Optional[Dict] = None,
+        method: str = "greedy",
+        n_jobs: int = 1,
+    ) -> "Merger":
+        """
+        Merges all stations into one GeoDataFrame without duplicates.
+
+        :param stations_list: List of Stations. If None, processed files are loaded from base_path
+        :param score_threshold: Minimum matching score for two stations to be considered duplicates
+        :param max_distance: Maximum distance in meters for two stations to be considered duplicates
+        :param score_weights: Weights of operator, address and distance score
+        :param method: "greedy" walks the stations in random order and merges each one with its duplicates.
+            "cluster" scores all candidate pairs at once and groups duplicates into connected components, which yields
+            a deterministic result independent of the order of the stations
+        :param n_jobs: Number of processes used for finding and scoring candidate pairs in spatial tiles. The result is
+            the same as for n_jobs=1. Only supported by method "cluster"
+        :return: Merger object
+        """
+        if method not in ["greedy", "cluster"]:
+            raise ValueError(f"Unknown merge method {method}!")
+        if (n_jobs > 1) & (method != "cluster"):
+            raise ValueError("Parallel merging is only supported by method cluster!")
+        _sequence_ratio.cache_clear()
+        self.run_stats = RunStats(hooks=self.run_stats_hooks)
+        score_weights = (
+            score_weights
+            if score_weights
+            else dict(operator=0.2, address=0.1, distance=0.7)
+        )
+
+        with self.run_stats.stage("load_data"):
+            self._set_data_sources(stations_list)
+
+        with self.run_stats.stage("prepare_geodataframe"):
+            self.stations_gdf = self._prepare_geodataframe()
+        if method == "cluster":
+            self.stations_gdf = self.stations_gdf.sort_values("id").reset_index(
+                drop=True
+            )
+            if n_jobs > 1:
+                with self.run_stats.stage("parallel_search_and_scoring"):
+                    (
+                        left,
+                        right,
+                        distance,
+                        scores,
+                    ) = self._score_candidate_pairs_parallel(
+                        max_distance=max_distance,
+                        score_weights=score_weights,
+                        score_threshold=score_threshold,
+                        n_jobs=n_jobs,
+                    )
+                self.run_stats.count("candidate_pairs", len(left))
+            else:
+                with self.run_stats.stage("candidate_search"):
+                    left, right, distance = self._get_candidate_pairs(
+                        max_distance=max_distance
+                    )
+                self.run_stats.count("candidate_pairs", len(left))
+                with self.run_stats.stage("scoring"):
+                    scores: np.ndarray = self._score_candidate_pairs(
+                        left,
+                        right,
+                        distance,
+                        max_distance=max_distance,
+                        score_weights=score_weights,
+                        score_threshold=score_threshold,
+                    )
+            with self.run_stats.stage("clustering"):
+                self._cluster_duplicates(
+                    left, right, scores, score_threshold=score_threshold
+                )
+            self.run_stats.count(
+                "sequence_matcher_calls", _sequence_ratio.cache_info().misses
+            )
+            self.run_stats.emit()
+            return self
+
+        self.stations_gdf = self.stations_gdf.sample(frac=1.0)
+        with self.run_stats.stage("candidate_search"):
+            left, right, distance = self._get_candidate_pairs(max_distance=max_distance)
+        self.run_stats.count("candidate_pairs", len(left))
+        with self.run_stats.stage("index_candidates"):
+            self._index_candidate_pairs(left, right, distance)
 
         for idx in tqdm(range(self.stations_gdf.shape[0])):
-            current_station: pd.Series = self.stations_gdf.iloc[idx]
-            if current_station["is_duplicate"]:
+            if (self.representative_positions[idx] >= 0) | (
+                self.neighbor_offsets[idx] == self.neighbor_offsets[idx + 1]
+            ):
                 continue
-            duplicate_candidates: pd.DataFrame = self._get_duplicate_candidates(
-                current_station=current_station, max_distance=max_distance
-            )
+            current_station: pd.Series = self.stations_gdf.iloc[idx]
+            with self.run_stats.stage("duplicate_candidates"):
+                duplicate_candidates: pd.DataFrame = self._get_duplicate_candidates(
+                    current_station=current_station, max_distance=max_distance
+                )
             if duplicate_candidates.empty:
                 continue
 
-            duplicates: pd.DataFrame = self._determine_duplicates(
-                current_station=current_station,
-                duplicate_candidates=duplicate_candidates,
-                score_threshold=score_threshold,
-                max_distance=max_distance,
-                score_weights=score_weights,
-            )
+            self.run_stats.count("scored_pairs", duplicate_candidates.shape[0])
+            with self.run_stats.stage("determine_duplicates"):
+                duplicates: pd.DataFrame = self._determine_duplicates(
+                    current_station=current_station,
+                    duplicate_candidates=duplicate_candidates,
+                    score_threshold=score_threshold,
+                    max_distance=max_distance,
+                    score_weights=score_weights,
+                )
 
-            self.stations_gdf.loc[
-                self.stations_gdf.index.isin(duplicates.index), "is_duplicate",
-            ] = True
+            with self.run_stats.stage("merge_duplicates"):
+                self.representative_positions[
+                    self.stations_gdf.index.get_indexer(duplicates.index)
+                ] = idx
+                self._merge_duplicates(current_station, duplicates)
 
-            self._merge_duplicates(current_station, duplicates)
+            # the current station might have taken over the attributes of a preferred duplicate
+            kept_data_source: str = self.stations_gdf["data_source"].iat[
+                self.attribute_positions[idx]
+            ]
+            duplicate_data_sources: List[str] = [current_station["data_source"]] + list(
+                duplicates["data_source"].values
+            )
+            duplicate_data_sources.remove(kept_data_source)
+            for duplicate_data_source in duplicate_data_sources:
+                self.run_stats.add_duplicates(kept_data_source, duplicate_data_source)
 
-        self.merged_stations_gdf: gpd.GeoDataFrame = self.stations_gdf.loc[
-            ~self.stations_gdf["is_duplicate"], :
-        ]
+        with self.run_stats.stage("apply_merge_decisions"):
+            self._apply_merge_decisions()
+        self.merged_stations_gdf: gpd.GeoDataFrame = self._materialize(
+            self.stations_gdf.loc[~self.stations_gdf["is_duplicate"], :]
+        )
+        self.run_stats.count(
+            "sequence_matcher_calls", _sequence_ratio.cache_info().misses
+        )
+        self.run_stats.emit()
 
         return self
 
+    def export(
+        self,
+        file_path: str,
+        file_format: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        chunk_size: int = 50000,
+        raw_data: bool = False,
+    ) -> str:
+        """
+        Streams the merged stations to disk in chunks, see export_stations.
+
+        :param file_path: Path of the output file
+        :param file_format: One of "geoparquet", "geojsonseq", "ndjson" or "csv". If None, derived from the file extension
+        :param columns: Columns to export, lon & lat are always added. If None, all but the matching keys
+        :param chunk_size: Number of stations converted at once
+        :param raw_data: If True, the raw data of every chunk is looked up by get_raw_data and exported as well
+        :return: file_path
+        """
+        if self.merged_stations_gdf is None:
+            raise RuntimeError("No merged stations to export, merge first!")
+        return export_stations(
+            self.merged_stations_gdf,
+            file_path,
+            file_format=file_format,
+            columns=columns,
+            chunk_size=chunk_size,
+            raw_data_fn=(
+                functools.partial(self.get_raw_data, source_rows=self._source_rows())
+                if raw_data
+                else None
+            ),
+        )
+
 
 if __name__ == "__main__":
     import matplotlib.pyplot as plt
 
     merger: Merger = Merger()
     merger.merge()
-    # stations: gpd.GeoDataFrame = merger.merged_stations_gdf
-    # stations.to_pickle("../../data/stations__merged.pkl")
-    stations = gpd.GeoDataFrame(
-        pd.read_pickle("../../../data/stations__merged.pkl"),
-        geometry="geometry",
-        crs={"init": "epsg:5243"},
-    )
-
-    stations["lat"] = None
-    stations["lon"] = None
-    stations[["lat", "lon"]] = stations.geometry.apply(lambda x: pd.Series([x.y, x.x]))
-    stations.to_csv("../../data/kepler_charging_map.csv")
+    stations: gpd.GeoDataFrame = merger.merged_stations_gdf
+    merger.export(os.path.join(merger.base_path, "stations__merged.parquet"))
+    merger.export(os.path.join(merger.base_path, "kepler_charging_map.csv"))
 
     attribute_missing_statistics = pd.DataFrame()
     station_group_by_source = stations.groupby("data_source")
@@ -1,17 +1,42 @@
 import hashlib
+import itertools
 import json
 import os
 import requests
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from numbers import Number
-from typing import Callable, Dict, List, Optional
-from ..helpers import get_logger, default
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from ..helpers import (
+    BBox,
+    get_logger,
+    default,
+    iter_json_array,
+    read_chunks,
+    split_bbox,
+)
 from ._connector import Connector
+from ._http_cache import CachedResponse, HTTPCache
+from ._processing import process_parallel
+from ._raw_store import RAW_STORE_FILE, RawStore
 
 log = get_logger(os.path.basename(__file__))
 
+# key of the id and table of the reference data of every reference object, which compact stations only reference by id
+REFERENCES: Dict[str, Tuple[str, str]] = {
+    "OperatorInfo": ("OperatorID", "Operators"),
+    "UsageType": ("UsageTypeID", "UsageTypes"),
+    "Country": ("CountryID", "Countries"),
+    "CurrentType": ("CurrentTypeID", "CurrentTypes"),
+}
+
 
 class OCMConnector(Connector):
     __data_source__ = "OCM"
+    # key of the list of stations in a json object response, the OCM api responds with a plain list
+    __raw_data_key__: Optional[str] = None
     raw_data: List[Dict] = None
     processed_data: List[Dict] = None
 
@@ -21,30 +46,404 @@ class OCMConnector(Connector):
         http_method_fn: Callable,
         base_path: str,
         query_params: Dict[str, any] = None,
+        use_cache: bool = False,
+        reference_data_url: Optional[str] = None,
     ):
+        """
+        :param url: Url of the api
+        :param http_method_fn: Function sending requests, e.g. requests.get
+        :param base_path: Folder of the raw & processed files
+        :param query_params: Query parameters of the api
+        :param use_cache: If True, responses are cached in base_path/http_cache and requested conditionally, such that
+            get_data and process reuse the raw & processed files while the source is unchanged
+        :param reference_data_url: Url of the reference data, which is retrieved along with the stations if set, such
+            that compact stations can be processed, see get_reference_data
+        """
         self.url: str = url
         self.http_method_fn: Callable = http_method_fn
         self.raw_data: List[any] = []
         self.processed_data: List[Dict] = []
+        self.errors: Dict[str, int] = {}
         if not os.path.exists(base_path):
             os.makedirs(base_path)
         self.base_path: str = base_path
         self.query_params: Dict[str, any] = query_params
+        self.cache: Optional[HTTPCache] = HTTPCache(
+            os.path.join(base_path, "http_cache", self.__data_source__)
+        ) if use_cache else None
+        # False if the last get_data received the same data as the one before
+        self.is_modified: bool = True
+        self.reference_data_url: Optional[str] = reference_data_url
+        # reference objects by id by table, loaded from the reference data file once needed
+        self.reference_tables: Optional[Dict[str, Dict[int, Dict]]] = None
+        self.raw_store: RawStore = RawStore(os.path.join(base_path, RAW_STORE_FILE))
 
-    def get_data(self, to_disk: bool = False):
+    def _get(
+        self,
+        url: str,
+        params: Optional[Dict[str, any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> CachedResponse:
+        """
+        Requests url, conditionally if a cache is used.
+
+        :param url: Url
+        :param params: Query parameters
+        :param headers: Additional request headers
+        :param timeout: Timeout of the request in seconds, None waits forever
+        :return: Response, whose is_modified is always True without cache
+        """
+        if self.cache is not None:
+            return self.cache.get(
+                self.http_method_fn,
+                url,
+                params=params,
+                headers=headers,
+                timeout=timeout,
+            )
+        request_kwargs: Dict[str, any] = dict(headers=headers) if headers else {}
+        if timeout is not None:
+            request_kwargs["timeout"] = timeout
         response: requests.Response = self.http_method_fn(
-            self.url, params=self.query_params
+            url, params=params, **request_kwargs
         )
         if response.status_code != 200:
             raise RuntimeError(
                 f"Failed to get data! Status Code: {response.status_code}"
             )
-        self.raw_data: Dict[str, any] = response.json()
+        return CachedResponse(is_modified=True, content=response.content)
+
+    def _reuse_raw_data(self, response: CachedResponse) -> bool:
+        """
+        Loads the raw file instead of parsing the response, if the response is unchanged and the raw file exists.
+
+        :param response: Response of the data request
+        :return: True if the raw file was loaded
+        """
+        self.is_modified = response.is_modified
+        file_path: str = os.path.join(
+            self.base_path, f"{self.__data_source__}__raw.json"
+        )
+        if self.is_modified or (not os.path.exists(file_path)):
+            return False
+        log.info(f"{self.__data_source__} is unchanged! Will load last raw file!")
+        self.raw_data = self._load(file_path=file_path)
+        return True
+
+    def get_reference_data(self):
+        """
+        Retrieves the reference data of OCM and saves the tables of the objects, which compact stations only reference
+        by id, i.e. operators, usage types, countries and current types, to the reference data file. Processing looks
+        the objects up by their id in these tables.
+        """
+        api_key: Optional[str] = (self.query_params or {}).get("key")
+        response: CachedResponse = self._get(
+            self.reference_data_url,
+            params=dict(key=api_key) if api_key is not None else None,
+        )
+        reference_data: Dict[str, List[Dict]] = json.loads(response.content)
+        tables: Dict[str, List[Dict]] = {
+            table: reference_data.get(table) or [] for _, table in REFERENCES.values()
+        }
+        self._save(
+            file_path=os.path.join(
+                self.base_path, f"{self.__data_source__}__reference_data.json"
+            ),
+            content_list=tables,
+        )
+        self.reference_tables = self._lookup_tables(tables)
+
+    @staticmethod
+    def _lookup_tables(tables: Dict[str, List[Dict]]) -> Dict[str, Dict[int, Dict]]:
+        return {
+            table: {item["ID"]: item for item in items}
+            for table, items in tables.items()
+        }
+
+    def _load_reference_data(self, station_raw: Dict):
+        """
+        Loads the reference tables from the reference data file, unless they are loaded already. Called by process
+        before any station is processed, since errors of single stations are only counted.
+
+        :param station_raw: First raw station, which tells if the stations are compact and need the reference data
+        """
+        if self.reference_tables is not None:
+            return
+        file_path: str = os.path.join(
+            self.base_path, f"{self.__data_source__}__reference_data.json"
+        )
+        if os.path.exists(file_path):
+            self.reference_tables = self._lookup_tables(self._load(file_path))
+            return
+        items: List[Dict] = [station_raw, station_raw.get("AddressInfo") or {}] + (
+            station_raw.get("Connections") or []
+        )
+        if any(
+            (item.get(key) is None) & (item.get(id_key) is not None)
+            for item in items
+            for key, (id_key, _) in REFERENCES.items()
+        ):
+            raise RuntimeError("Compact stations need reference data, get it first!")
+
+    def _reference(self, item: Dict, key: str) -> Optional[Dict]:
+        """
+        :param item: Raw station, its AddressInfo or one of its Connections
+        :param key: Key of the reference object, see REFERENCES
+        :return: Reference object of a verbose item, or the object looked up by its id for a compact item
+        """
+        reference: Optional[Dict] = item.get(key)
+        id_key, table = REFERENCES[key]
+        if (reference is not None) or (item.get(id_key) is None):
+            return reference
+        if self.reference_tables is None:
+            raise RuntimeError("Get reference data first!")
+        reference = self.reference_tables[table].get(item[id_key])
+        if reference is None:
+            log.warning(f"{id_key} {item[id_key]} is not in the reference data!")
+        return reference
+
+    def get_data(self, to_disk: bool = False):
+        if self.reference_data_url is not None:
+            self.get_reference_data()
+        response: CachedResponse = self._get(self.url, params=self.query_params)
+        if self._reuse_raw_data(response):
+            return
+        self.raw_data: Dict[str, any] = json.loads(response.content)
+        if to_disk:
+            file_path: str = os.path.join(
+                self.base_path, f"{self.__data_source__}__raw.json"
+            )
+            self._save(file_path=file_path, content_list=self.raw_data)
+
+    @staticmethod
+    def _station_key(station_raw: Dict) -> Union[int, str, Tuple[str, int]]:
+        """
+        :param station_raw: Raw station
+        :return: OCM id of the station, or its coordinates if it has none
+        """
+        ocm_id: Optional[int] = station_raw.get("ID")
+        if ocm_id is None:
+            ocm_id = (station_raw.get("AddressInfo") or {}).get("ID")
+        if ocm_id is None:
+            address_info: Dict = station_raw["AddressInfo"]
+            return f"{address_info['Longitude']},{address_info['Latitude']}"
+        return ocm_id
+
+    def _tile_params(
+        self, tile: BBox, max_results: int, timeout: Optional[float]
+    ) -> Dict[str, any]:
+        """
+        :param tile: Bounding box of the tile
+        :param max_results: Maximum number of stations per request
+        :param timeout: Timeout of the request in seconds, not part of the OCM query. Only used by subclasses whose
+            query contains its own timeout, i.e. the Overpass query of OSMConnector
+        :return: Query parameters requesting the stations inside of the tile
+        """
+        return dict(
+            self.query_params or {},
+            boundingbox=f"({tile.max_lat},{tile.min_lon}),({tile.min_lat},{tile.max_lon})",
+            maxresults=max_results,
+        )
+
+    def _parse_tile(self, content: bytes) -> List[Dict]:
+        """
+        :param content: Response body of a tile
+        :return: Raw stations of the tile
+        """
+        return json.loads(content)
+
+    def _get_tile(
+        self,
+        tile: BBox,
+        max_results: int,
+        checkpoint_path: str,
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        backoff: float = 1.0,
+    ) -> Tuple[Optional[List[Dict]], bool]:
+        """
+        Requests the stations inside of a tile, or loads them from the checkpoint of an interrupted run. Failed
+        requests are retried after backoff, 2 * backoff, 4 * backoff, ... seconds.
+
+        :param tile: Bounding box of the tile
+        :param max_results: Maximum number of stations per request, a tile with as many stations needs to be split
+        :param checkpoint_path: Folder of the checkpoints of completed tiles
+        :param timeout: Timeout of a request in seconds
+        :param retries: Number of retries of a failed request
+        :param backoff: Seconds to wait before the first retry
+        :return: Tuple of the raw stations, None if the tile needs to be split, and whether the response was modified
+        """
+        params: Dict[str, any] = self._tile_params(tile, max_results, timeout)
+        file_path: str = os.path.join(
+            checkpoint_path, f"{HTTPCache.request_key(self.url, params)}.json"
+        )
+        if os.path.exists(file_path):
+            return self._load(file_path=file_path)[0], True
+        for attempt in range(retries + 1):
+            try:
+                response: CachedResponse = self._get(
+                    self.url, params=params, timeout=timeout
+                )
+                stations_raw: Optional[List[Dict]] = self._parse_tile(
+                    response.content
+                )
+                break
+            except (requests.RequestException, RuntimeError, ValueError) as tileErr:
+                if attempt == retries:
+                    raise
+                log.warning(f"Failed to get tile {tile}: {tileErr}! Will retry!")
+                time.sleep(backoff * 2 ** attempt)
+        if len(stations_raw) >= max_results:
+            # tiles smaller than about 10m are not split any further
+            if (tile.max_lat - tile.min_lat) > 1e-4:
+                stations_raw = None
+            else:
+                log.warning(f"Tile {tile} has more than {max_results} stations!")
+        self._save(file_path=file_path, content_list=[stations_raw])
+        return stations_raw, response.is_modified
+
+    def get_data_tiled(
+        self,
+        bbox: BBox,
+        rows: int = 4,
+        columns: int = 4,
+        max_workers: int = 4,
+        max_results: int = 10000,
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        backoff: float = 1.0,
+        to_disk: bool = False,
+    ):
+        """
+        Retrieves the stations inside of bbox by a request per tile instead of a single request. Tiles are requested
+        concurrently by max_workers threads and every completed tile is checkpointed, such that an interrupted run
+        resumes with the missing tiles only. A tile with max_results stations is split into four tiles, hence no
+        single request is limited by max_results. Stations on the border of tiles are de-duplicated by their id and
+        sorted by it.
+
+        :param bbox: Bounding box to retrieve, e.g. Config.BBOX_DE
+        :param rows: Number of initial tiles in latitude direction
+        :param columns: Number of initial tiles in longitude direction
+        :param max_workers: Number of concurrent requests
+        :param max_results: Maximum number of stations per request
+        :param timeout: Timeout of a request in seconds, None waits forever
+        :param retries: Number of retries of a failed request of a tile
+        :param backoff: Seconds to wait before the first retry, doubled for every further retry
+        :param to_disk: If True, raw stations are saved to the raw file
+        """
+        if self.reference_data_url is not None:
+            self.get_reference_data()
+        checkpoint_path: str = os.path.join(
+            self.base_path, f"{self.__data_source__}__tiles"
+        )
+        if not os.path.exists(checkpoint_path):
+            os.makedirs(checkpoint_path)
+        stations_by_key: Dict[Union[int, str, Tuple[str, int]], Dict] = {}
+        is_modified: bool = False
+        no_tiles: int = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            tile_options: Dict[str, any] = dict(
+                max_results=max_results,
+                checkpoint_path=checkpoint_path,
+                timeout=timeout,
+                retries=retries,
+                backoff=backoff,
+            )
+            pending: Dict[Future, BBox] = {
+                executor.submit(self._get_tile, tile, **tile_options): tile
+                for tile in split_bbox(bbox, rows, columns)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tile: BBox = pending.pop(future)
+                    stations_raw, tile_is_modified = future.result()
+                    if stations_raw is None:
+                        log.debug(f"Will split tile {tile}!")
+                        for sub_tile in split_bbox(tile, 2, 2):
+                            sub_future: Future = executor.submit(
+                                self._get_tile, sub_tile, **tile_options
+                            )
+                            pending[sub_future] = sub_tile
+                        continue
+                    no_tiles += 1
+                    is_modified |= tile_is_modified
+                    for station_raw in stations_raw:
+                        stations_by_key[self._station_key(station_raw)] = station_raw
+        log.info(f"Retrieved {len(stations_by_key)} stations from {no_tiles} tiles!")
+        self.is_modified = is_modified
+        self.raw_data = [
+            stations_by_key[key]
+            for key in sorted(stations_by_key, key=lambda k: (isinstance(k, str), k))
+        ]
         if to_disk:
             file_path: str = os.path.join(
                 self.base_path, f"{self.__data_source__}__raw.json"
             )
             self._save(file_path=file_path, content_list=self.raw_data)
+        # all tiles are complete, the next run starts from scratch
+        shutil.rmtree(checkpoint_path)
+
+    def stream_data(
+        self,
+        file_path: Optional[str] = None,
+        to_disk: bool = False,
+        chunk_size: int = 2 ** 16,
+    ) -> Iterator[Dict]:
+        """
+        Streams raw stations one at a time, parsed incrementally from the response body or from a json file, e.g. a
+        saved response or raw file. Neither the whole body nor all raw stations are held in memory, hence stations can
+        be passed to process as they arrive. The request is sent once the first station is requested.
+
+        :param file_path: Path of a json file to read instead of requesting the api
+        :param to_disk: If True, raw stations are also written to the raw file while streaming
+        :param chunk_size: Number of bytes read at once
+        :return: Iterator over raw stations
+        """
+        response: Optional[requests.Response] = None
+        if file_path is not None:
+            chunks: Iterable[bytes] = read_chunks(file_path, chunk_size=chunk_size)
+        else:
+            if self.reference_data_url is not None:
+                self.get_reference_data()
+            response = self.http_method_fn(
+                self.url, params=self.query_params, stream=True
+            )
+            if response.status_code != 200:
+                response.close()
+                raise RuntimeError(
+                    f"Failed to get data! Status Code: {response.status_code}"
+                )
+            chunks = response.iter_content(chunk_size=chunk_size)
+        stations_raw: Iterator[Dict] = iter_json_array(
+            chunks, key=self.__raw_data_key__
+        )
+        try:
+            yield from (
+                self._stream_to_raw_file(stations_raw) if to_disk else stations_raw
+            )
+        finally:
+            if response is not None:
+                response.close()
+
+    def _stream_to_raw_file(self, stations_raw: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Writes raw stations to the raw file while passing them on.
+
+        :param stations_raw: Raw stations
+        :return: Iterator over the same raw stations
+        """
+        raw_file_path: str = os.path.join(
+            self.base_path, f"{self.__data_source__}__raw.json"
+        )
+        with open(raw_file_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for number, station_raw in enumerate(stations_raw):
+                f.write(",\n" if number > 0 else "\n")
+                json.dump(station_raw, f, ensure_ascii=False, indent=4, default=default)
+                yield station_raw
+            f.write("\n]")
 
     def load(self, is_processed: bool = False, is_test: bool = False):
         file_name: str = f"{self.__data_source__}__{'processed' if is_processed else 'raw'}.json"
@@ -58,60 +457,260 @@ class OCMConnector(Connector):
         else:
             self.raw_data: Dict[str, any] = content
 
-    def process(self, to_disk: bool = False):
-        if not self.raw_data:
-            raise RuntimeError("Load or get raw data first!")
+    def process(
+        self,
+        to_disk: bool = False,
+        stations_raw: Optional[Iterable[Dict]] = None,
+        n_jobs: int = 1,
+        chunk_size: int = 1000,
+    ):
+        """
+        Turns raw stations into processed stations. Stations which cannot be converted are skipped and counted per
+        failed step in errors. With n_jobs > 1, chunks of chunk_size raw stations are processed by a pool of n_jobs
+        processes, see process_parallel, which results in exactly the same processed stations in the same order. The
+        raw data of processed stations is written to the raw store by the current process, processed stations only
+        keep its hash raw_data_hash, see get_raw_data.
 
-        for station_raw in self.raw_data:
-            addressInfo: Optional[Dict] = station_raw.get("AddressInfo")
-            raw_data: str = json.dumps(
-                station_raw, sort_keys=True, ensure_ascii=True, default=default
+        :param to_disk: If True, processed stations are saved to the processed file
+        :param stations_raw: Raw stations to process instead of raw_data, e.g. the iterator of stream_data
+        :param n_jobs: Number of worker processes, 1 processes all stations in the current process
+        :param chunk_size: Number of raw stations per chunk sent to a worker process
+        """
+        processed_file_path: str = os.path.join(
+            self.base_path, f"{self.__data_source__}__processed.json"
+        )
+        if (
+            (stations_raw is None)
+            and (not self.is_modified)
+            and os.path.exists(processed_file_path)
+        ):
+            log.info(
+                f"{self.__data_source__} is unchanged! Will load last processed file!"
             )
-            ocm_id: Optional[int] = addressInfo.get("ID")
-            id_hash: hashlib._Hash = hashlib.sha256(
-                str(ocm_id).encode("utf8")
-                if ocm_id is not None
-                else f"{station_raw['AddressInfo']['Longitude']}{station_raw['AddressInfo']['Latitude']})".encode(
-                    "utf8"
-                )
+            self.processed_data = self._load(file_path=processed_file_path)
+            return
+        if stations_raw is None:
+            if not self.raw_data:
+                raise RuntimeError("Load or get raw data first!")
+            stations_raw = self.raw_data
+        # before the connector is copied to worker processes
+        stations_raw = iter(stations_raw)
+        first_station_raw: Optional[Dict] = next(stations_raw, None)
+        if first_station_raw is not None:
+            self._load_reference_data(first_station_raw)
+            stations_raw = itertools.chain([first_station_raw], stations_raw)
+
+        chunks: Iterable[Tuple[List[Dict], Dict[str, int]]] = (
+            process_parallel(self, stations_raw, n_jobs=n_jobs, chunk_size=chunk_size)
+            if n_jobs > 1
+            else [self._process_chunk(stations_raw)]
+        )
+        for stations, errors in chunks:
+            raw_data_hashes: List[str] = self.raw_store.put(
+                [station.pop("raw_data") for station in stations]
             )
-            identifier: bytes = id_hash.hexdigest().encode("utf8")
+            for station, raw_data_hash in zip(stations, raw_data_hashes):
+                station["raw_data_hash"] = raw_data_hash
+            self.processed_data += stations
+            for step, no_errors in errors.items():
+                self.errors[step] = self.errors.get(step, 0) + no_errors
 
-            try:
-                address: Dict = self._create_address(
-                    addressInfo, identifier, station_raw
-                )
-            except Exception as addressConversionErr:
-                log.error(
-                    f"Failed to create address object: {addressConversionErr}! Will skip this station!"
-                )
-                continue
+        if to_disk:
+            self._save(file_path=processed_file_path, content_list=self.processed_data)
 
-            try:
-                charging: Dict = self._create_charging(identifier, station_raw)
-            except Exception as chargingConversionErr:
-                log.error(
-                    f"Failed to create charging object: {chargingConversionErr}! Will skip this station!"
-                )
-                continue
+    def get_raw_data(self, station: Dict) -> Optional[str]:
+        """
+        Reads the raw data of a processed station from the raw store.
 
-            try:
-                station: Dict = self._create_station(
-                    address, charging, identifier, raw_data, station_raw
-                )
-            except Exception as stationConversionErr:
-                log.error(
-                    f"Failed to create station object: {stationConversionErr}! Will skip this station!"
+        :param station: Processed station
+        :return: Raw station as json, None if it is not in the raw store
+        """
+        if "raw_data_hash" not in station:
+            # processed before raw data was moved to the raw store
+            return station.get("raw_data")
+        return self.raw_store.get(station["raw_data_hash"])
+
+    @staticmethod
+    def _high_water_mark(stations_raw: Iterable[Dict]) -> Optional[datetime]:
+        """
+        :param stations_raw: Raw stations
+        :return: Latest DateLastStatusUpdate or DateLastVerified of all stations in UTC, None if no station has one
+        """
+        high_water_mark: Optional[datetime] = None
+        for station_raw in stations_raw:
+            for key in ["DateLastStatusUpdate", "DateLastVerified"]:
+                value: Optional[any] = station_raw.get(key)
+                if value is None:
+                    continue
+                date: datetime = (
+                    value
+                    if isinstance(value, datetime)
+                    else datetime.fromisoformat(value.replace("Z", "+00:00"))
                 )
+                if date.tzinfo is None:
+                    date = date.replace(tzinfo=timezone.utc)
+                if (high_water_mark is None) or (date > high_water_mark):
+                    high_water_mark = date
+        return high_water_mark
+
+    def sync(
+        self, full_resync: bool = False, n_jobs: int = 1, chunk_size: int = 1000,
+    ):
+        """
+        Updates the raw & processed files incrementally. Only stations modified since the latest DateLastStatusUpdate
+        or DateLastVerified of the raw file are requested, upserted by AddressInfo.ID into the raw stations and
+        processed, all other processed stations are kept. Stations removed from OCM are only dropped by a full
+        resync, which is done as well if there are no files yet.
+
+        :param full_resync: If True, all stations are requested and processed
+        :param n_jobs: Number of worker processes, see process
+        :param chunk_size: Number of raw stations per chunk sent to a worker process, see process
+        """
+        if self.__data_source__ != OCMConnector.__data_source__:
+            raise RuntimeError(f"{self.__data_source__} does not support syncing!")
+        raw_file_path: str = os.path.join(
+            self.base_path, f"{self.__data_source__}__raw.json"
+        )
+        processed_file_path: str = os.path.join(
+            self.base_path, f"{self.__data_source__}__processed.json"
+        )
+        modified_since: Optional[datetime] = None
+        if (
+            (not full_resync)
+            and os.path.exists(raw_file_path)
+            and os.path.exists(processed_file_path)
+        ):
+            self.load(is_processed=False)
+            modified_since = self._high_water_mark(self.raw_data)
+        if modified_since is None:
+            log.info(f"Will resync all stations of {self.__data_source__}!")
+            self.get_data(to_disk=True)
+            self.processed_data = []
+            self.process(to_disk=True, n_jobs=n_jobs, chunk_size=chunk_size)
+            return
+
+        if self.reference_data_url is not None:
+            self.get_reference_data()
+        response: CachedResponse = self._get(
+            self.url,
+            params=dict(
+                self.query_params or {},
+                modifiedsince=modified_since.strftime("%Y-%m-%dT%H:%M:%S"),
+            ),
+        )
+        stations_delta: List[Dict] = json.loads(response.content)
+        log.info(
+            f"{len(stations_delta)} stations of {self.__data_source__} were modified since {modified_since}!"
+        )
+        self.is_modified = len(stations_delta) > 0
+        self.load(is_processed=True)
+        if not stations_delta:
+            return
+
+        positions: Dict[bytes, int] = {
+            self._identifier(station_raw): position
+            for position, station_raw in enumerate(self.raw_data)
+        }
+        # None marks a modified station, which is replaced in place unless it fails to process now
+        processed_by_id: Dict[bytes, Optional[Dict]] = {
+            station["id"]: station for station in self.processed_data
+        }
+        for station_raw in stations_delta:
+            identifier: bytes = self._identifier(station_raw)
+            if identifier in positions:
+                self.raw_data[positions[identifier]] = station_raw
+            else:
+                positions[identifier] = len(self.raw_data)
+                self.raw_data += [station_raw]
+            if identifier in processed_by_id:
+                processed_by_id[identifier] = None
+
+        self.processed_data = []
+        self.process(stations_raw=stations_delta, n_jobs=n_jobs, chunk_size=chunk_size)
+        for station in self.processed_data:
+            processed_by_id[station["id"]] = station
+        self.processed_data = [
+            station for station in processed_by_id.values() if station is not None
+        ]
+        self._save(file_path=raw_file_path, content_list=self.raw_data)
+        self._save(file_path=processed_file_path, content_list=self.processed_data)
+
+    def _process_chunk(
+        self, stations_raw: Iterable[Dict]
+    ) -> Tuple[List[Dict], Dict[str, int]]:
+        """
+        Processes raw stations one after another.
+
+        :param stations_raw: Raw stations
+        :return: Tuple of processed stations and number of skipped stations per failed step
+        """
+        stations: List[Dict] = []
+        errors: Dict[str, int] = {}
+        for station_raw in stations_raw:
+            station, failed_step = self._process_station(station_raw)
+            if station is None:
+                errors[failed_step] = errors.get(failed_step, 0) + 1
                 continue
+            stations += [station]
+        return stations, errors
 
-            self.processed_data += [station]
+    def _process_station(
+        self, station_raw: Dict
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Turns a raw station into a processed station.
 
-        if to_disk:
-            file_path: str = os.path.join(
-                self.base_path, f"{self.__data_source__}__processed.json"
+        :param station_raw: Raw station
+        :return: Tuple of the processed station, None if a step failed, and the name of the failed step
+        """
+        addressInfo: Optional[Dict] = station_raw.get("AddressInfo")
+        raw_data: str = json.dumps(
+            station_raw, sort_keys=True, ensure_ascii=True, default=default
+        )
+        identifier: bytes = self._identifier(station_raw)
+
+        try:
+            address: Dict = self._create_address(addressInfo, identifier, station_raw)
+        except Exception as addressConversionErr:
+            log.error(
+                f"Failed to create address object: {addressConversionErr}! Will skip this station!"
+            )
+            return None, "address"
+
+        try:
+            charging: Dict = self._create_charging(identifier, station_raw)
+        except Exception as chargingConversionErr:
+            log.error(
+                f"Failed to create charging object: {chargingConversionErr}! Will skip this station!"
+            )
+            return None, "charging"
+
+        try:
+            station: Dict = self._create_station(
+                address, charging, identifier, raw_data, station_raw
+            )
+        except Exception as stationConversionErr:
+            log.error(
+                f"Failed to create station object: {stationConversionErr}! Will skip this station!"
+            )
+            return None, "station"
+        return station, None
+
+    @staticmethod
+    def _identifier(station_raw: Dict) -> bytes:
+        """
+        :param station_raw: Raw station
+        :return: Id of the processed station, the hash of AddressInfo.ID or of the coordinates if it has none
+        """
+        ocm_id: Optional[int] = station_raw["AddressInfo"].get("ID")
+        id_hash: hashlib._Hash = hashlib.sha256(
+            str(ocm_id).encode("utf8")
+            if ocm_id is not None
+            else f"{station_raw['AddressInfo']['Longitude']}{station_raw['AddressInfo']['Latitude']})".encode(
+                "utf8"
             )
-            self._save(file_path=file_path, content_list=self.processed_data)
+        )
+        return id_hash.hexdigest().encode("utf8")
 
     @staticmethod
     def check_coordinates(coords: float) -> float:
@@ -139,12 +738,14 @@ class OCMConnector(Connector):
             station_raw["AddressInfo"]["Longitude"]
         )
         coordinates: str = f"POINT({longitude} {latitude})"
+        usage_type: Optional[Dict] = self._reference(station_raw, "UsageType")
         authentication: str = ";".join(
-            [f"{k}:{v}" for k, v in station_raw["UsageType"].items()]
-        ) if isinstance(station_raw["UsageType"], dict) else None
-        operator: Optional[str] = station_raw["OperatorInfo"].get(
+            [f"{k}:{v}" for k, v in usage_type.items()]
+        ) if isinstance(usage_type, dict) else None
+        operator_info: Optional[Dict] = self._reference(station_raw, "OperatorInfo")
+        operator: Optional[str] = operator_info.get(
             "Title", None
-        ) if isinstance(station_raw["OperatorInfo"], dict) else None
+        ) if isinstance(operator_info, dict) else None
         station: Dict = dict(
             id=identifier,
             data_source=self.__data_source__,
@@ -154,6 +755,8 @@ class OCMConnector(Connector):
             payment=station_raw.get("UsageCost"),
             authentication=authentication,
             coordinates=coordinates,
+            lon=longitude,
+            lat=latitude,
             raw_data=raw_data,
         )
         return station
@@ -168,7 +771,7 @@ class OCMConnector(Connector):
         socket_type_list: List[str] = []
         if connections is not None:
             for connection in connections:
-                currentType: Dict = connection.get("CurrentType")
+                currentType: Dict = self._reference(connection, "CurrentType")
                 if currentType is not None:
                     socket_title: Optional[str] = currentType.get("Title")
                     if socket_title is not None:
@@ -204,7 +807,7 @@ class OCMConnector(Connector):
     def _create_address(
         self, addressInfo: Dict, identifier: bytes, station_raw: Dict
     ) -> Dict:
-        country: Optional[Dict] = addressInfo.get("Country")
+        country: Optional[Dict] = self._reference(addressInfo, "Country")
         postcode: Optional[str] = addressInfo.get(
             "Postcode",
         ) if addressInfo is not None else None
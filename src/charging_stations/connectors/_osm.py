@@ -2,33 +2,115 @@ import hashlib
 import json
 import os
 import string
-import requests
 from numbers import Number
-from typing import Dict, List, Callable, Optional
+from typing import Dict, Iterator, List, Callable, Optional, Tuple
+from ._http_cache import CachedResponse
 from ._ocm import OCMConnector
-from ..helpers import get_logger, default
+from ._osm_extract import iter_osm_extract
+from ..helpers import BBox, get_logger, default
 
 log = get_logger(os.path.basename(__file__))
 
+# overpass query of all charging stations inside of a bounding box (south, west, north, east) of a tile
+TILE_QUERY: str = """
+[out:json][timeout:{timeout}];
+(
+  node["amenity"="charging_station"]({bbox});
+  way["amenity"="charging_station"]({bbox});
+  rel["amenity"="charging_station"]({bbox});
+);
+out;
+"""
+
 
 class OSMConnector(OCMConnector):
     __data_source__ = "OSM"
+    __raw_data_key__: Optional[str] = "elements"
 
     def get_data(self, to_disk: bool = False):
-        response: requests.Response = self.http_method_fn(
-            self.url, params=self.query_params
-        )
-        if response.status_code != 200:
-            raise RuntimeError(
-                f"Failed to get data! Status Code: {response.status_code}"
-            )
-        self.raw_data: List[Dict] = response.json()["elements"]
+        response: CachedResponse = self._get(self.url, params=self.query_params)
+        if self._reuse_raw_data(response):
+            return
+        self.raw_data: List[Dict] = json.loads(response.content)["elements"]
         if to_disk:
             file_path: str = os.path.join(
                 self.base_path, f"{self.__data_source__}__raw.json"
             )
             self._save(file_path=file_path, content_list=self.raw_data)
 
+    def stream_extract(self, file_path: str, to_disk: bool = False) -> Iterator[Dict]:
+        """
+        Streams the charging stations of a local OSM extract instead of querying overpass, see iter_osm_extract. The
+        elements have the same shape as those of an overpass response, ways and relations are additionally located
+        by their nodes.
+
+        :param file_path: Path of an .osm.pbf file, which requires pyosmium, or of an .osm, .osm.bz2 or .osm.gz file
+        :param to_disk: If True, raw stations are also written to the raw file while streaming
+        :return: Iterator over raw stations
+        """
+        stations_raw: Iterator[Dict] = iter_osm_extract(file_path)
+        return self._stream_to_raw_file(stations_raw) if to_disk else stations_raw
+
+    @staticmethod
+    def _station_key(station_raw: Dict) -> Tuple[str, int]:
+        """
+        :param station_raw: Raw element
+        :return: Type and id of the element
+        """
+        return station_raw.get("type", "node"), station_raw["id"]
+
+    def _tile_params(
+        self, tile: BBox, max_results: int, timeout: Optional[float]
+    ) -> Dict[str, any]:
+        """
+        Overpass has no limit of results, tiles with at least max_results elements are split nevertheless, which keeps
+        every query short. The query itself times out slightly before the request, such that overpass reports it.
+        """
+        return dict(
+            self.query_params or {},
+            data=TILE_QUERY.format(
+                timeout=max(int(timeout) - 5, 1) if timeout is not None else 180,
+                bbox=f"{tile.min_lat},{tile.min_lon},{tile.max_lat},{tile.max_lon}",
+            ),
+        )
+
+    def _parse_tile(self, content: bytes) -> List[Dict]:
+        response: Dict = json.loads(content)
+        # a query exceeding its timeout is answered with 200, the elements found so far and a remark
+        remark: Optional[str] = response.get("remark")
+        if (remark is not None) and ("error" in remark):
+            raise RuntimeError(f"Overpass failed: {remark}")
+        return response["elements"]
+
+    def get_data_tiled(
+        self,
+        bbox: BBox,
+        rows: int = 4,
+        columns: int = 4,
+        max_workers: int = 2,
+        max_results: int = 10000,
+        timeout: Optional[float] = 180,
+        retries: int = 3,
+        backoff: float = 5.0,
+        to_disk: bool = False,
+    ):
+        """
+        Retrieves the elements inside of bbox by an overpass query per tile instead of a query of the whole area, see
+        OCMConnector.get_data_tiled. Public overpass instances reject too many concurrent queries, hence fewer workers
+        and more patient retries are used by default. Elements are de-duplicated by type and id.
+        """
+        super().get_data_tiled(
+            bbox,
+            rows=rows,
+            columns=columns,
+            max_workers=max_workers,
+            max_results=max_results,
+            timeout=timeout,
+            retries=retries,
+            backoff=backoff,
+            to_disk=to_disk,
+        )
+
     @staticmethod
     def _string_to_number_list(
         list_string: str,
@@ -83,55 +165,47 @@ class OSMConnector(OCMConnector):
         ]
         return clean_numbers_list if clean_string_list else None
 
-    def process(self, to_disk: bool = False):
-        if not self.raw_data:
-            raise RuntimeError("Load or get raw data first!")
-        for station_raw in self.raw_data:
-            raw_data: str = json.dumps(
-                station_raw, sort_keys=True, ensure_ascii=True, default=default
-            )
-
-            osm_id: Optional[int] = station_raw.get("id")
-            id_hash: hashlib._Hash = hashlib.sha256(
-                str(osm_id).encode("utf8")
-                if osm_id is not None
-                else f"{station_raw['lon']}{station_raw['lat']})".encode("utf8")
-            )
-            identifier: bytes = id_hash.hexdigest().encode("utf8")
-
-            try:
-                address: Dict = self._create_address(identifier, station_raw)
-            except Exception as addressConversionErr:
-                log.error(
-                    f"Failed to create address object: {addressConversionErr}! Will skip this station!"
-                )
-                continue
+    def _process_station(
+        self, station_raw: Dict
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        raw_data: str = json.dumps(
+            station_raw, sort_keys=True, ensure_ascii=True, default=default
+        )
 
-            try:
-                charging: Dict = self._create_charging(identifier, station_raw)
-            except Exception as chargingConversionErr:
-                log.error(
-                    f"Failed to create charging object: {chargingConversionErr}! Will skip this station!"
-                )
-                continue
+        osm_id: Optional[int] = station_raw.get("id")
+        id_hash: hashlib._Hash = hashlib.sha256(
+            str(osm_id).encode("utf8")
+            if osm_id is not None
+            else f"{station_raw['lon']}{station_raw['lat']})".encode("utf8")
+        )
+        identifier: bytes = id_hash.hexdigest().encode("utf8")
 
-            try:
-                station: Dict = self._create_station(
-                    address, charging, identifier, raw_data, station_raw
-                )
-            except Exception as stationConversionErr:
-                log.error(
-                    f"Failed to create station object: {stationConversionErr}! Will skip this station!"
-                )
-                continue
+        try:
+            address: Dict = self._create_address(identifier, station_raw)
+        except Exception as addressConversionErr:
+            log.error(
+                f"Failed to create address object: {addressConversionErr}! Will skip this station!"
+            )
+            return None, "address"
 
-            self.processed_data += [station]
+        try:
+            charging: Dict = self._create_charging(identifier, station_raw)
+        except Exception as chargingConversionErr:
+            log.error(
+                f"Failed to create charging object: {chargingConversionErr}! Will skip this station!"
+            )
+            return None, "charging"
 
-        if to_disk:
-            file_path: str = os.path.join(
-                self.base_path, f"{self.__data_source__}__processed.json"
+        try:
+            station: Dict = self._create_station(
+                address, charging, identifier, raw_data, station_raw
+            )
+        except Exception as stationConversionErr:
+            log.error(
+                f"Failed to create station object: {stationConversionErr}! Will skip this station!"
             )
-            self._save(file_path=file_path, content_list=self.processed_data)
+            return None, "station"
+        return station, None
 
     def _create_station(
         self,
@@ -175,6 +249,8 @@ class OSMConnector(OCMConnector):
             payment=payment,
             authentication=authentication,
             coordinates=coordinates,
+            lon=longitude,
+            lat=latitude,
             raw_data=raw_data,
         )
         return station
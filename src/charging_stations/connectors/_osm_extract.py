@@ -0,0 +1,213 @@
+import bz2
+import gzip
+import os
+import xml.etree.ElementTree as ET
+from typing import IO, Dict, Iterator, List, Set, Tuple
+from ..helpers import get_logger
+
+log = get_logger(os.path.basename(__file__))
+
+TAG_KEY: str = "amenity"
+TAG_VALUE: str = "charging_station"
+# element types of osmium members
+MEMBER_TYPES: Dict[str, str] = {"n": "node", "w": "way", "r": "relation"}
+
+
+def _open(file_path: str) -> IO[bytes]:
+    if file_path.endswith(".bz2"):
+        return bz2.open(file_path, "rb")
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, "rb")
+    return open(file_path, "rb")
+
+
+def _iter_xml_stations(file_path: str) -> Iterator[Dict]:
+    """
+    Reads charging stations from an .osm xml file in a single pass. Every element is dropped once it was read, hence
+    memory does not grow with the file.
+
+    :param file_path: Path of the .osm, .osm.bz2 or .osm.gz file
+    :return: Iterator over the charging stations, like elements of an overpass json response
+    """
+    with _open(file_path) as f:
+        context: Iterator[Tuple[str, ET.Element]] = ET.iterparse(
+            f, events=("start", "end")
+        )
+        _, root = next(context)
+        for event, element in context:
+            if (event != "end") or (element.tag not in ("node", "way", "relation")):
+                continue
+            # children of the root are only referenced by the root
+            root.clear()
+            # most elements are no charging stations, they are skipped before their tags are collected
+            if not any(
+                (tag.get("k") == TAG_KEY) and (tag.get("v") == TAG_VALUE)
+                for tag in element.iter("tag")
+            ):
+                continue
+            station: Dict = dict(type=element.tag, id=int(element.get("id")))
+            if element.tag == "node":
+                station.update(
+                    lat=float(element.get("lat")), lon=float(element.get("lon"))
+                )
+            elif element.tag == "way":
+                station["nodes"] = [int(nd.get("ref")) for nd in element.iter("nd")]
+            else:
+                station["members"] = [
+                    dict(
+                        type=member.get("type"),
+                        ref=int(member.get("ref")),
+                        role=member.get("role", ""),
+                    )
+                    for member in element.iter("member")
+                ]
+            station["tags"] = {
+                tag.get("k"): tag.get("v") for tag in element.iter("tag")
+            }
+            yield station
+
+
+def _xml_node_coordinates(
+    file_path: str, node_ids: Set[int]
+) -> Dict[int, Tuple[float, float]]:
+    """
+    :param file_path: Path of the .osm, .osm.bz2 or .osm.gz file
+    :param node_ids: Ids of the nodes to read
+    :return: Longitude and latitude by node id
+    """
+    coordinates: Dict[int, Tuple[float, float]] = {}
+    with _open(file_path) as f:
+        context: Iterator[Tuple[str, ET.Element]] = ET.iterparse(
+            f, events=("start", "end")
+        )
+        _, root = next(context)
+        for event, element in context:
+            if event != "end":
+                continue
+            if (element.tag == "node") and (int(element.get("id")) in node_ids):
+                coordinates[int(element.get("id"))] = (
+                    float(element.get("lon")),
+                    float(element.get("lat")),
+                )
+            if element.tag in ("node", "way", "relation"):
+                root.clear()
+    return coordinates
+
+
+def _import_osmium():
+    try:
+        import osmium
+    except ImportError:
+        raise RuntimeError(
+            "Reading .osm.pbf files requires pyosmium, install it with: pip install osmium"
+        )
+    return osmium
+
+
+def _iter_pbf_stations(file_path: str) -> Iterator[Dict]:
+    """
+    Reads charging stations from an .osm.pbf file in a single pass. Elements are filtered by their tags before they
+    are handed to python, which keeps a scan of a whole country fast.
+
+    :param file_path: Path of the .osm.pbf file
+    :return: Iterator over the charging stations, like elements of an overpass json response
+    """
+    osmium = _import_osmium()
+    processor = osmium.FileProcessor(file_path).with_filter(
+        osmium.filter.TagFilter((TAG_KEY, TAG_VALUE))
+    )
+    for element in processor:
+        tags: Dict[str, str] = {tag.k: tag.v for tag in element.tags}
+        if element.is_node():
+            station: Dict = dict(
+                type="node",
+                id=element.id,
+                lat=element.location.lat,
+                lon=element.location.lon,
+            )
+        elif element.is_way():
+            station = dict(
+                type="way", id=element.id, nodes=[node.ref for node in element.nodes]
+            )
+        else:
+            station = dict(
+                type="relation",
+                id=element.id,
+                members=[
+                    dict(
+                        type=MEMBER_TYPES[member.type],
+                        ref=member.ref,
+                        role=member.role,
+                    )
+                    for member in element.members
+                ],
+            )
+        station["tags"] = tags
+        yield station
+
+
+def _pbf_node_coordinates(
+    file_path: str, node_ids: Set[int]
+) -> Dict[int, Tuple[float, float]]:
+    """
+    :param file_path: Path of the .osm.pbf file
+    :param node_ids: Ids of the nodes to read
+    :return: Longitude and latitude by node id
+    """
+    osmium = _import_osmium()
+    processor = osmium.FileProcessor(file_path, osmium.osm.NODE).with_filter(
+        osmium.filter.IdFilter(node_ids)
+    )
+    return {
+        element.id: (element.location.lon, element.location.lat)
+        for element in processor
+    }
+
+
+def iter_osm_extract(file_path: str) -> Iterator[Dict]:
+    """
+    Streams all charging stations (amenity=charging_station) of a local OSM extract, in the shape of the elements of
+    an overpass json response. Nodes are yielded while the extract is read, ways and relations are collected and
+    located by the mean coordinates of their nodes, which are read by a second pass over the nodes of the extract.
+    Relations are only located by their member nodes. Memory is bounded by the number of charging stations, not by
+    the size of the extract.
+
+    :param file_path: Path of an .osm.pbf file, which requires pyosmium, or of an .osm, .osm.bz2 or .osm.gz file
+    :return: Iterator over the charging stations, nodes first
+    """
+    is_pbf: bool = file_path.endswith(".pbf")
+    stations: Iterator[Dict] = (
+        _iter_pbf_stations(file_path) if is_pbf else _iter_xml_stations(file_path)
+    )
+    areas: List[Dict] = []
+    for station in stations:
+        if station["type"] == "node":
+            yield station
+        else:
+            areas += [station]
+    if not areas:
+        return
+
+    node_ids: List[List[int]] = [
+        area["nodes"]
+        if area["type"] == "way"
+        else [member["ref"] for member in area["members"] if member["type"] == "node"]
+        for area in areas
+    ]
+    all_node_ids: Set[int] = {i for ids in node_ids for i in ids}
+    coordinates: Dict[int, Tuple[float, float]] = (
+        _pbf_node_coordinates(file_path, all_node_ids)
+        if is_pbf
+        else _xml_node_coordinates(file_path, all_node_ids)
+    )
+    log.debug(
+        f"Located {len(areas)} ways and relations by {len(coordinates)} nodes!"
+    )
+    for area, area_node_ids in zip(areas, node_ids):
+        area_coordinates: List[Tuple[float, float]] = [
+            coordinates[i] for i in area_node_ids if i in coordinates
+        ]
+        if area_coordinates:
+            area["lon"] = sum(c[0] for c in area_coordinates) / len(area_coordinates)
+            area["lat"] = sum(c[1] for c in area_coordinates) / len(area_coordinates)
+        yield area
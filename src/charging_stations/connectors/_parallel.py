@@ -0,0 +1,243 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from ..helpers import BBox, expand_bbox, get_logger
+from ._matching import (
+    _sequence_ratio,
+    bounded_address_matches,
+    candidate_pairs,
+    match_keys,
+    matching_scores,
+)
+from ._processing import MP_CONTEXT
+
+log = get_logger(os.path.basename(__file__))
+
+# state of a worker process, set once by _init_worker
+_shared_memory: List[SharedMemory] = []
+_shared_arrays: Dict[str, np.ndarray] = {}
+_categories: Dict[str, np.ndarray] = {}
+_parameters: Dict[str, any] = {}
+
+
+def partition_points(lon: np.ndarray, lat: np.ndarray, no_tiles: int) -> np.ndarray:
+    """
+    Assigns every point to one of about no_tiles spatial tiles with roughly the same number of points each. Points are
+    first split into rows by latitude and then every row into columns by longitude.
+
+    :param lon: Longitudes in degrees
+    :param lat: Latitudes in degrees
+    :param no_tiles: Number of tiles
+    :return: np.ndarray containing the tile of each point
+    """
+    rows: int = max(int(math.sqrt(no_tiles)), 1)
+    columns: int = max(int(math.ceil(no_tiles / rows)), 1)
+    tiles: np.ndarray = np.zeros(len(lon), dtype=np.int32)
+    for row, row_positions in enumerate(
+        np.array_split(np.argsort(lat, kind="stable"), rows)
+    ):
+        row_positions = row_positions[np.argsort(lon[row_positions], kind="stable")]
+        for column, tile_positions in enumerate(np.array_split(row_positions, columns)):
+            tiles[tile_positions] = row * columns + column
+    return tiles
+
+
+def _share_arrays(
+    arrays: Dict[str, np.ndarray],
+) -> Tuple[List[SharedMemory], Dict[str, Tuple[str, Tuple[int, ...], str]]]:
+    shared_memory: List[SharedMemory] = []
+    specs: Dict[str, Tuple[str, Tuple[int, ...], str]] = {}
+    for name, array in arrays.items():
+        memory: SharedMemory = SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared_memory += [memory]
+        np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[:] = array
+        specs[name] = (memory.name, array.shape, array.dtype.str)
+    return shared_memory, specs
+
+
+def _init_worker(
+    specs: Dict[str, Tuple[str, Tuple[int, ...], str]],
+    categories: Dict[str, np.ndarray],
+    parameters: Dict[str, any],
+):
+    for name, (memory_name, shape, dtype) in specs.items():
+        memory: SharedMemory = SharedMemory(name=memory_name)
+        _shared_memory.append(memory)
+        _shared_arrays[name] = np.ndarray(
+            shape, dtype=np.dtype(dtype), buffer=memory.buf
+        )
+    _categories.update(categories)
+    _parameters.update(parameters)
+
+
+def _score_tile(
+    tile: int, bbox: BBox
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Finds and scores all candidate pairs of a tile. The tile sees all points inside its bounding box including the
+    halo, but only keeps pairs whose first point belongs to the tile itself, such that every pair is reported by exactly
+    one tile.
+
+    :param tile: Tile number
+    :param bbox: Bounding box of the tile expanded by the halo
+    :return: Tuple of global positional indices of both stations of each pair, their distance, matching score and the
+        number of SequenceMatcher calls
+    """
+    no_calls: int = _sequence_ratio.cache_info().misses
+    lon, lat = _shared_arrays["lon"], _shared_arrays["lat"]
+    positions: np.ndarray = np.flatnonzero(
+        (lon >= bbox.min_lon)
+        & (lon <= bbox.max_lon)
+        & (lat >= bbox.min_lat)
+        & (lat <= bbox.max_lat)
+    )
+    left, right, distance = candidate_pairs(
+        lon[positions],
+        lat[positions],
+        max_distance=_parameters["max_distance"],
+        earth_radius=_parameters["earth_radius"],
+    )
+    # positions are sorted, hence left < right also holds for global positions
+    left, right = positions[left], positions[right]
+    is_owned: np.ndarray = _shared_arrays["tiles"][left] == tile
+    left, right, distance = left[is_owned], right[is_owned], distance[is_owned]
+    operator_match: np.ndarray = match_keys(
+        _shared_arrays["operator_codes"], _categories["operator_key"], left, right
+    )
+    scores: np.ndarray = matching_scores(
+        operator_match,
+        bounded_address_matches(
+            _shared_arrays["address_codes"],
+            _categories["address_key"],
+            _shared_arrays["block_codes"],
+            _categories["block_key"],
+            operator_match,
+            left,
+            right,
+            distance,
+            max_distance=_parameters["max_distance"],
+            score_weights=_parameters["score_weights"],
+            score_threshold=_parameters["score_threshold"],
+        ),
+        distance,
+        max_distance=_parameters["max_distance"],
+        score_weights=_parameters["score_weights"],
+    )
+    return left, right, distance, scores, _sequence_ratio.cache_info().misses - no_calls
+
+
+def score_pairs_parallel(
+    lon: np.ndarray,
+    lat: np.ndarray,
+    operator_codes: np.ndarray,
+    operator_categories: np.ndarray,
+    address_codes: np.ndarray,
+    address_categories: np.ndarray,
+    block_codes: np.ndarray,
+    block_categories: np.ndarray,
+    max_distance: int = 100,
+    score_weights: Optional[Dict[str, float]] = None,
+    score_threshold: float = 0.49,
+    earth_radius: int = 6371,
+    n_jobs: int = 2,
+    tiles_per_job: int = 4,
+    counters: Optional[Dict[str, int]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Finds and scores all candidate pairs like candidate_pairs and matching_scores, but cuts the points into spatial
+    tiles with a halo of max_distance, which are processed by a pool of n_jobs processes. Coordinates and key codes
+    are shared with the workers through shared memory. Since every pair is reported by exactly one tile, pairs crossing
+    tile borders are reconciled by simply concatenating the results of all tiles.
+
+    :param lon: Longitudes in degrees
+    :param lat: Latitudes in degrees
+    :param operator_codes: Category codes of the operator keys
+    :param operator_categories: Distinct operator keys
+    :param address_codes: Category codes of the address keys
+    :param address_categories: Distinct address keys
+    :param block_codes: Category codes of the block keys, see bounded_address_matches
+    :param block_categories: Distinct block keys
+    :param max_distance: Maximum distance in meters for a pair of stations to be a potential duplicate candidate
+    :param score_weights: Weights of operator, address and distance score
+    :param score_threshold: Minimum score for a pair to be considered a duplicate, scores are exact up to the side of
+        score_threshold they are on
+    :param earth_radius: Earth radius in kilometers
+    :param n_jobs: Number of worker processes
+    :param tiles_per_job: Number of tiles per worker process, more tiles balance the load better
+    :param counters: Optional dictionary the number of SequenceMatcher calls of all workers is added to
+    :return: Tuple of positional indices of both stations of each pair (first < second, ordered by first and second),
+        their distance in meters and their matching score
+    """
+    lon = np.ascontiguousarray(lon, dtype=float)
+    lat = np.ascontiguousarray(lat, dtype=float)
+    tiles: np.ndarray = partition_points(lon, lat, n_jobs * tiles_per_job)
+    tile_numbers: List[int] = np.unique(tiles).tolist()
+    bboxes: List[BBox] = []
+    for tile in tile_numbers:
+        is_tile: np.ndarray = tiles == tile
+        bboxes += [
+            expand_bbox(
+                BBox(
+                    min_lon=lon[is_tile].min(),
+                    min_lat=lat[is_tile].min(),
+                    max_lon=lon[is_tile].max(),
+                    max_lat=lat[is_tile].max(),
+                ),
+                max_distance,
+                earth_radius=earth_radius,
+            )
+        ]
+    shared_memory, specs = _share_arrays(
+        dict(
+            lon=lon,
+            lat=lat,
+            tiles=tiles,
+            operator_codes=np.asarray(operator_codes, dtype=np.int64),
+            address_codes=np.asarray(address_codes, dtype=np.int64),
+            block_codes=np.asarray(block_codes, dtype=np.int64),
+        )
+    )
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=MP_CONTEXT,
+            initializer=_init_worker,
+            initargs=(
+                specs,
+                dict(
+                    operator_key=operator_categories,
+                    address_key=address_categories,
+                    block_key=block_categories,
+                ),
+                dict(
+                    max_distance=max_distance,
+                    score_weights=score_weights,
+                    score_threshold=score_threshold,
+                    earth_radius=earth_radius,
+                ),
+            ),
+        ) as executor:
+            results: List[Tuple[np.ndarray, ...]] = list(
+                executor.map(_score_tile, tile_numbers, bboxes)
+            )
+    finally:
+        for memory in shared_memory:
+            memory.close()
+            memory.unlink()
+    log.debug(f"Scored candidate pairs of {len(tile_numbers)} tiles with {n_jobs} processes!")
+    if counters is not None:
+        counters["sequence_matcher_calls"] = counters.get(
+            "sequence_matcher_calls", 0
+        ) + sum(result[4] for result in results)
+    if not results:
+        return tuple(
+            np.zeros(0, dtype=dtype) for dtype in [np.int64, np.int64, float, float]
+        )
+    left, right, distance, scores = (
+        np.concatenate([result[i] for result in results]) for i in range(4)
+    )
+    order: np.ndarray = np.lexsort((right, left))
+    return left[order], right[order], distance[order], scores[order]
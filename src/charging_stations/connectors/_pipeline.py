@@ -0,0 +1,124 @@
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Type
+from ..helpers import get_logger
+from . import _config as Config
+from ._bna import BNAConnector
+from ._merger import Merger
+from ._ocm import OCMConnector
+from ._osm import OSMConnector
+
+log = get_logger(os.path.basename(__file__))
+
+CONNECTORS: Dict[str, Type[OCMConnector]] = {
+    connector.__data_source__: connector
+    for connector in [BNAConnector, OCMConnector, OSMConnector]
+}
+
+
+class Pipeline(object):
+    """
+    Refreshes all configured sources concurrently and merges them. Every source is downloaded and processed in its own
+    thread, such that waiting for one source does not delay the others, and the merge starts as soon as the last
+    source is done. A source which fails to refresh falls back to its last processed file.
+    """
+
+    def __init__(
+        self,
+        base_path: str = os.path.realpath(
+            os.path.join(os.path.dirname(__file__), "../../../data")
+        ),
+        connector_configs: Optional[Dict[str, Dict]] = None,
+        process_n_jobs: int = 1,
+        run_stats_hooks: Optional[List[Callable[[Dict], None]]] = None,
+        use_cache: bool = False,
+    ):
+        """
+        :param base_path: Folder of the raw & processed files of all connectors
+        :param connector_configs: Configuration of every source by data source, defaults to Config.CONNECTOR_CONFIGS
+        :param process_n_jobs: Number of worker processes used to process each source, see OCMConnector.process
+        :param run_stats_hooks: Functions called with the run stats of the merge, see RunStats
+        :param use_cache: If True, sources are requested conditionally and unchanged sources reuse their raw &
+            processed files, see OCMConnector
+        """
+        self.base_path: str = base_path
+        self.connector_configs: Dict[str, Dict] = (
+            connector_configs
+            if connector_configs is not None
+            else Config.CONNECTOR_CONFIGS
+        )
+        self.process_n_jobs: int = process_n_jobs
+        self.run_stats_hooks: Optional[List[Callable[[Dict], None]]] = run_stats_hooks
+        self.use_cache: bool = use_cache
+        # "refreshed", "unchanged" (cached), "reused" (last processed file after a failure) or "failed" per data source
+        self.status: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self.merger: Optional[Merger] = None
+
+    def _refresh(self, data_source: str) -> List[Dict]:
+        """
+        Downloads and processes a source and saves its processed file. If any of it fails, the last processed file is
+        loaded instead.
+
+        :param data_source: Data source e.g. "OCM"
+        :return: Processed stations of the source, empty if neither refreshing nor loading succeeded
+        """
+        start: float = time.perf_counter()
+        connector: OCMConnector = CONNECTORS[data_source](
+            base_path=self.base_path,
+            use_cache=self.use_cache,
+            **self.connector_configs[data_source],
+        )
+        try:
+            # with cache, the raw file is kept to be reused while the source is unchanged
+            connector.get_data(to_disk=self.use_cache)
+            connector.process(to_disk=True, n_jobs=self.process_n_jobs)
+            self.status[data_source] = (
+                "refreshed" if connector.is_modified else "unchanged"
+            )
+        except Exception as refreshErr:
+            log.error(
+                f"Failed to refresh {data_source}: {refreshErr}! Will use last processed file!"
+            )
+            self.errors[data_source] = str(refreshErr)
+            try:
+                connector.load(is_processed=True)
+                self.status[data_source] = "reused"
+            except Exception as loadErr:
+                log.error(
+                    f"Failed to load last processed file of {data_source}: {loadErr}! Will skip {data_source}!"
+                )
+                connector.processed_data = []
+                self.status[data_source] = "failed"
+        finally:
+            self.durations[data_source] = time.perf_counter() - start
+        log.debug(
+            f"{data_source} {self.status[data_source]} with {len(connector.processed_data)} stations after "
+            f"{self.durations[data_source]:.1f}s!"
+        )
+        return connector.processed_data
+
+    def run(self, **merge_options) -> Merger:
+        """
+        Refreshes all sources concurrently and merges their stations. Stations are passed to the merge in the order of
+        connector_configs, independent of which source finished first.
+
+        :param merge_options: Keyword arguments of Merger.merge, e.g. method or n_jobs
+        :return: Merger object holding the merged stations
+        """
+        self.status, self.errors, self.durations = {}, {}, {}
+        with ThreadPoolExecutor(max_workers=len(self.connector_configs)) as executor:
+            futures: Dict[str, Future] = {
+                data_source: executor.submit(self._refresh, data_source)
+                for data_source in self.connector_configs
+            }
+            stations_list: List[Dict] = []
+            for data_source, future in futures.items():
+                stations_list += future.result()
+        if not stations_list:
+            raise RuntimeError("Could not refresh or load any source!")
+        self.merger = Merger(base_path=self.base_path, run_stats_hooks=self.run_stats_hooks)
+        self.merger.merge(stations_list=stations_list, **merge_options)
+        return self.merger
@@ -0,0 +1,69 @@
+import copy
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from ..helpers import get_logger
+from ._connector import Connector
+
+log = get_logger(os.path.basename(__file__))
+
+# connector of a worker process, set once by _init_worker
+_connector: Optional[Connector] = None
+# workers are not forked, since a fork of a process running other threads, e.g. of Pipeline, may copy locks held by
+# these threads into the worker, where they are never released. forkserver is not available on Windows.
+MP_CONTEXT: multiprocessing.context.BaseContext = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _init_worker(connector: Connector):
+    global _connector
+    _connector = connector
+
+
+def _process_chunk(stations_raw: List[Dict]) -> Tuple[List[Dict], Dict[str, int]]:
+    return _connector._process_chunk(stations_raw)
+
+
+def process_parallel(
+    connector: Connector,
+    stations_raw: Iterable[Dict],
+    n_jobs: int = 2,
+    chunk_size: int = 1000,
+) -> Iterator[Tuple[List[Dict], Dict[str, int]]]:
+    """
+    Processes raw stations in chunks of chunk_size by a pool of n_jobs processes started by MP_CONTEXT. Every worker
+    receives a pickled copy of the connector without its data once, chunks are only read from stations_raw while less
+    than two chunks per worker are pending, such that streamed raw stations are never held in memory at once.
+
+    :param connector: Connector whose _process_chunk processes a chunk
+    :param stations_raw: Raw stations, e.g. raw_data or the iterator of stream_data
+    :param n_jobs: Number of worker processes
+    :param chunk_size: Number of raw stations per chunk
+    :return: Iterator over processed stations and number of errors per step of every chunk, in the original order
+    """
+    worker_connector: Connector = copy.copy(connector)
+    worker_connector.raw_data, worker_connector.processed_data = [], []
+    stations_raw = iter(stations_raw)
+    no_chunks: int = 0
+    with ProcessPoolExecutor(
+        max_workers=n_jobs,
+        mp_context=MP_CONTEXT,
+        initializer=_init_worker,
+        initargs=(worker_connector,),
+    ) as executor:
+        pending: Deque[Future] = deque()
+        while True:
+            while len(pending) < 2 * n_jobs:
+                chunk: List[Dict] = list(islice(stations_raw, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_process_chunk, chunk))
+                no_chunks += 1
+            if not pending:
+                break
+            yield pending.popleft().result()
+    log.debug(f"Processed {no_chunks} chunks with {n_jobs} processes!")
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from ..helpers import get_logger
+
+log = get_logger(os.path.basename(__file__))
+
+# file of the raw store in the folder of the processed files
+RAW_STORE_FILE: str = "raw_store.sqlite"
+# number of records compressed together, larger blocks compress better but a single record is read slower
+BLOCK_SIZE: int = 64
+# maximum number of parameters of a sqlite query
+MAX_PARAMETERS: int = 900
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS blocks (id INTEGER PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS records (
+    hash TEXT PRIMARY KEY, block INTEGER NOT NULL, start INTEGER NOT NULL, stop INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _batches(values: List[any]) -> Iterator[List[any]]:
+    for start in range(0, len(values), MAX_PARAMETERS):
+        yield values[start : start + MAX_PARAMETERS]
+
+
+class RawStore(object):
+    """
+    Content-addressed store of raw records, e.g. of the raw stations of processed stations, in a sqlite file. A record
+    is identified by the sha256 hash of its content, hence it is only stored once. Records are compressed together in
+    blocks of up to BLOCK_SIZE records and are read by their hash, which only decompresses their block. The file is
+    opened once it is accessed, a copy of the store sent to another process opens the file again.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        :param file_path: Path of the sqlite file, created if it does not exist
+        """
+        self.file_path: str = file_path
+        self.lock: threading.Lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self) -> Dict[str, str]:
+        return dict(file_path=self.file_path)
+
+    def __setstate__(self, state: Dict[str, str]):
+        self.__init__(state["file_path"])
+
+    def _connect(self) -> sqlite3.Connection:
+        # called with lock held
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.file_path, timeout=60, check_same_thread=False
+            )
+            # readers are not blocked by a writer, e.g. of another connector
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    @staticmethod
+    def hash(record: str) -> str:
+        return hashlib.sha256(record.encode("utf8")).hexdigest()
+
+    def put(self, records: List[str]) -> List[str]:
+        """
+        Adds records, which are not in the store yet.
+
+        :param records: Records, e.g. json strings
+        :return: Hash of every record, by which it is read
+        """
+        hashes: List[str] = [self.hash(record) for record in records]
+        with self.lock:
+            connection: sqlite3.Connection = self._connect()
+            stored_hashes: Set[str] = set()
+            for batch in _batches(list(set(hashes))):
+                stored_hashes.update(
+                    row[0]
+                    for row in connection.execute(
+                        f"SELECT hash FROM records WHERE hash IN ({','.join('?' * len(batch))})",
+                        batch,
+                    )
+                )
+            new_records: Dict[str, bytes] = {
+                record_hash: record.encode("utf8")
+                for record_hash, record in zip(hashes, records)
+                if record_hash not in stored_hashes
+            }
+            new_hashes: List[str] = list(new_records)
+            with connection:
+                for first in range(0, len(new_hashes), BLOCK_SIZE):
+                    block_hashes: List[str] = new_hashes[first : first + BLOCK_SIZE]
+                    block: int = connection.execute(
+                        "INSERT INTO blocks (data) VALUES (?)",
+                        (
+                            zlib.compress(
+                                b"".join(new_records[h] for h in block_hashes)
+                            ),
+                        ),
+                    ).lastrowid
+                    locations: List[Tuple[str, int, int, int]] = []
+                    offset: int = 0
+                    for record_hash in block_hashes:
+                        length: int = len(new_records[record_hash])
+                        locations += [(record_hash, block, offset, offset + length)]
+                        offset += length
+                    # a record added concurrently by another connection is kept
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?)", locations
+                    )
+        log.debug(f"Stored {len(new_hashes)} of {len(records)} records!")
+        return hashes
+
+    def get(self, record_hash: str) -> Optional[str]:
+        """
+        :param record_hash: Hash of a record
+        :return: Record, None if it is not in the store
+        """
+        return self.get_many([record_hash])[0]
+
+    def get_many(self, hashes: List[str]) -> List[Optional[str]]:
+        """
+        Reads records, every block is only decompressed once.
+
+        :param hashes: Hashes of records
+        :return: Record of every hash, None if it is not in the store
+        """
+        locations: Dict[str, Tuple[int, int, int]] = {}
+        blocks: Dict[int, bytes] = {}
+        with self.lock:
+            connection: sqlite3.Connection = self._connect()
+            for batch in _batches(list(set(hashes))):
+                for record_hash, block, start, stop in connection.execute(
+                    f"SELECT hash, block, start, stop FROM records WHERE hash IN ({','.join('?' * len(batch))})",
+                    batch,
+                ):
+                    locations[record_hash] = (block, start, stop)
+            for batch in _batches(list({block for block, _, _ in locations.values()})):
+                for block, data in connection.execute(
+                    f"SELECT id, data FROM blocks WHERE id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ):
+                    blocks[block] = zlib.decompress(data)
+        records: List[Optional[str]] = []
+        for record_hash in hashes:
+            if record_hash not in locations:
+                records += [None]
+                continue
+            block, start, stop = locations[record_hash]
+            records += [blocks[block][start:stop].decode("utf8")]
+        return records
+
+    def close(self):
+        with self.lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,108 @@
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from ..helpers import get_logger
+
+log = get_logger(os.path.basename(__file__))
+
+
+class RunStats(object):
+    """
+    Timings and counters of a single merge. Every stage records its accumulated wall time, CPU time of the main process
+    and number of calls and, if tracemalloc is running, the peak of memory allocated during the stage. Hooks are called
+    with the dictionary of to_dict once the merge is done, e.g. to send the stats to a metrics system.
+    """
+
+    def __init__(self, hooks: Optional[List[Callable[[Dict], None]]] = None):
+        self.hooks: List[Callable[[Dict], None]] = hooks if hooks else []
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.dropped_rows: Dict[str, int] = {}
+        self.duplicates_per_source_pair: Dict[Tuple[str, str], int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator["RunStats"]:
+        """
+        Context manager timing a stage. Stages called several times, e.g. per station, are accumulated.
+
+        :param name: Name of the stage
+        :return: RunStats object
+        """
+        is_tracing: bool = tracemalloc.is_tracing()
+        if is_tracing:
+            start_memory: int = tracemalloc.get_traced_memory()[0]
+            # requires python 3.9, before the peak of a stage includes the peak of all earlier stages
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        start_wall_time: float = time.perf_counter()
+        start_cpu_time: float = time.process_time()
+        try:
+            yield self
+        finally:
+            stats: Dict[str, float] = self.stages.setdefault(
+                name, dict(wall_time=0.0, cpu_time=0.0, calls=0)
+            )
+            stats["wall_time"] += time.perf_counter() - start_wall_time
+            stats["cpu_time"] += time.process_time() - start_cpu_time
+            stats["calls"] += 1
+            if is_tracing:
+                stats["peak_memory_mb"] = max(
+                    stats.get("peak_memory_mb", 0.0),
+                    (tracemalloc.get_traced_memory()[1] - start_memory) / 2 ** 20,
+                )
+
+    def count(self, name: str, value: int = 1) -> "RunStats":
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+        return self
+
+    def drop(self, reason: str, no_rows: int) -> "RunStats":
+        self.dropped_rows[reason] = self.dropped_rows.get(reason, 0) + int(no_rows)
+        return self
+
+    def add_duplicates(
+        self, data_source: str, duplicate_data_source: str, no_duplicates: int = 1
+    ) -> "RunStats":
+        """
+        Counts duplicates of a station of data_source, which were found in duplicate_data_source.
+
+        :param data_source: Data source of the station which is kept
+        :param duplicate_data_source: Data source of its duplicates
+        :param no_duplicates: Number of duplicates
+        :return: RunStats object
+        """
+        source_pair: Tuple[str, str] = (data_source, duplicate_data_source)
+        self.duplicates_per_source_pair[source_pair] = (
+            self.duplicates_per_source_pair.get(source_pair, 0) + int(no_duplicates)
+        )
+        return self
+
+    def to_dict(self) -> Dict:
+        return dict(
+            stages={name: dict(stats) for name, stats in self.stages.items()},
+            counters=dict(self.counters),
+            dropped_rows=dict(self.dropped_rows),
+            duplicates_per_source_pair={
+                f"{data_source}-{duplicate_data_source}": no_duplicates
+                for (
+                    data_source,
+                    duplicate_data_source,
+                ), no_duplicates in self.duplicates_per_source_pair.items()
+            },
+        )
+
+    def emit(self) -> "RunStats":
+        """
+        Logs the stats and passes them to all hooks. A failing hook does not fail the merge.
+
+        :return: RunStats object
+        """
+        stats: Dict = self.to_dict()
+        log.debug(f"Run stats: {stats}")
+        for hook in self.hooks:
+            try:
+                hook(stats)
+            except Exception as e:
+                log.warning(f"Run stats hook {hook} failed: {e}")
+        return self
@@ -1,2 +1,13 @@
 from ._serializer import default, object_hook
 from ._logger import get_logger
+from ._tiles import BBox, split_bbox, expand_bbox
+from ._list_column import ListColumn
+from ._distance import (
+    RadianPoints,
+    distances_to_point,
+    paired_distances,
+    pairs_within,
+    radian_points,
+)
+from ._json_stream import iter_json_array, read_chunks
+from ._xlsx_stream import iter_xlsx_records, iter_xlsx_rows
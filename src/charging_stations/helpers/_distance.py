@@ -0,0 +1,196 @@
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+
+
+class RadianPoints(NamedTuple):
+    """
+    Points with coordinates in radians and the cosine of their latitude, such that distance kernels do not need to
+    convert them again for every pair.
+    """
+
+    lon: np.ndarray
+    lat: np.ndarray
+    cos_lat: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.lon)
+
+    def take(self, positions: Union[np.ndarray, slice]) -> "RadianPoints":
+        return RadianPoints(
+            lon=self.lon[positions],
+            lat=self.lat[positions],
+            cos_lat=self.cos_lat[positions],
+        )
+
+
+def radian_points(
+    lon: np.ndarray, lat: np.ndarray, dtype: np.dtype = np.float64
+) -> RadianPoints:
+    """
+    Converts coordinates in degrees into RadianPoints.
+
+    :param lon: Longitudes in degrees
+    :param lat: Latitudes in degrees
+    :param dtype: Float type of all computations on these points, float32 or float64
+    :return: RadianPoints
+    """
+    lon_rad: np.ndarray = np.radians(np.asarray(lon, dtype=dtype))
+    lat_rad: np.ndarray = np.radians(np.asarray(lat, dtype=dtype))
+    return RadianPoints(lon=lon_rad, lat=lat_rad, cos_lat=np.cos(lat_rad))
+
+
+def _haversine(
+    lon1: np.ndarray,
+    lat1: np.ndarray,
+    cos_lat1: np.ndarray,
+    lon2: np.ndarray,
+    lat2: np.ndarray,
+    cos_lat2: np.ndarray,
+    earth_radius: float,
+    out: Optional[np.ndarray],
+) -> np.ndarray:
+    # computes in place in out, which needs only a single temporary array for the longitude term
+    dtype: np.dtype = np.result_type(lon1, lon2)
+    shape: Tuple[int, ...] = np.broadcast(lon1, lon2).shape
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif (out.shape != shape) | (out.dtype != dtype):
+        raise ValueError(
+            f"Output buffer must have shape {shape} and dtype {dtype}, got {out.shape} and {out.dtype}!"
+        )
+    np.subtract(lat2, lat1, out=out)
+    out *= 0.5
+    np.sin(out, out=out)
+    np.square(out, out=out)
+    delta_lon: np.ndarray = np.subtract(lon2, lon1, dtype=dtype)
+    delta_lon *= 0.5
+    np.sin(delta_lon, out=delta_lon)
+    np.square(delta_lon, out=delta_lon)
+    delta_lon *= cos_lat1
+    delta_lon *= cos_lat2
+    out += delta_lon
+    np.sqrt(out, out=out)
+    # rounding might push the argument of arcsin slightly above 1 for antipodal points
+    np.minimum(out, 1, out=out)
+    np.arcsin(out, out=out)
+    out *= 2 * earth_radius * 1000
+    return out
+
+
+def paired_distances(
+    points: RadianPoints,
+    other_points: RadianPoints,
+    earth_radius: float = 6371,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Haversine distance between the i-th point of points and the i-th point of other_points.
+
+    :param points: RadianPoints
+    :param other_points: RadianPoints of the same length
+    :param earth_radius: Earth radius in kilometers
+    :param out: Optional buffer of matching length and dtype the distances are written to
+    :return: np.ndarray containing distances in meters
+    """
+    return _haversine(*points, *other_points, earth_radius=earth_radius, out=out)
+
+
+def distances_to_point(
+    point: RadianPoints,
+    points: RadianPoints,
+    earth_radius: float = 6371,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Haversine distance between a single point and many points.
+
+    :param point: RadianPoints of length 1
+    :param points: RadianPoints
+    :param earth_radius: Earth radius in kilometers
+    :param out: Optional buffer of matching length and dtype the distances are written to
+    :return: np.ndarray containing distances in meters
+    """
+    if len(point) != 1:
+        raise ValueError(f"Expected a single point, got {len(point)}!")
+    return _haversine(
+        *(c.astype(points.lon.dtype) for c in point),
+        *points,
+        earth_radius=earth_radius,
+        out=out,
+    )
+
+
+def _chunks(no_rows: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, no_rows, chunk_size):
+        yield start, min(start + chunk_size, no_rows)
+
+
+def pairs_within(
+    points: RadianPoints,
+    max_distance: float,
+    earth_radius: float = 6371,
+    chunk_size: int = 1024,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    All pairs of points closer than max_distance to each other, computed exactly without a spatial index. Points are
+    sorted by latitude, such that every chunk of chunk_size points is only compared with the following points within
+    the latitude band max_distance can reach. Memory is bounded by the size of a chunk times the size of the band.
+
+    :param points: RadianPoints
+    :param max_distance: Maximum distance in meters
+    :param earth_radius: Earth radius in kilometers
+    :param chunk_size: Number of points compared with their band at once
+    :return: Tuple of positional indices of the first and second point of each pair (first < second, ordered by first
+        and second) and their distance in meters
+    """
+    order: np.ndarray = np.argsort(points.lat, kind="stable")
+    sorted_points: RadianPoints = points.take(order)
+    # latitude difference in radians which can not be exceeded by any pair, widened for rounding
+    lat_band: float = max_distance / (earth_radius * 1000) * (1 + 1e-6) + 1e-12
+    band_ends: np.ndarray = np.searchsorted(
+        sorted_points.lat, sorted_points.lat + lat_band, side="right"
+    )
+    lefts: List[np.ndarray] = []
+    rights: List[np.ndarray] = []
+    distances: List[np.ndarray] = []
+    for start, stop in _chunks(len(points), chunk_size):
+        band_end: int = int(band_ends[stop - 1])
+        if band_end <= start + 1:
+            continue
+        chunk: RadianPoints = sorted_points.take(slice(start, stop))
+        band: RadianPoints = sorted_points.take(slice(start, band_end))
+        distance: np.ndarray = _haversine(
+            *(c[:, np.newaxis] for c in chunk),
+            *(c[np.newaxis, :] for c in band),
+            earth_radius=earth_radius,
+            out=None,
+        )
+        # only pairs with a following point, each pair is seen once
+        rows, columns = np.nonzero(
+            (distance < max_distance)
+            & (
+                np.arange(start, band_end)[np.newaxis, :]
+                > np.arange(start, stop)[:, np.newaxis]
+            )
+        )
+        lefts += [order[rows + start]]
+        rights += [order[columns + start]]
+        distances += [distance[rows, columns]]
+    if not lefts:
+        return (
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=points.lon.dtype),
+        )
+    left, right, distance = (
+        np.concatenate(lefts),
+        np.concatenate(rights),
+        np.concatenate(distances),
+    )
+    left, right = np.minimum(left, right), np.maximum(left, right)
+    sort_order: np.ndarray = np.lexsort((right, left))
+    return (
+        left[sort_order].astype(np.int64),
+        right[sort_order].astype(np.int64),
+        distance[sort_order],
+    )
@@ -0,0 +1,135 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Optional, Union
+
+WHITESPACE: str = " \t\n\r"
+
+
+class _TextBuffer(object):
+    """
+    Decoded text of a stream of byte chunks, which only keeps the part not consumed yet.
+    """
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self.chunks: Iterator[Union[bytes, str]] = iter(chunks)
+        self.decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder(
+            "utf-8"
+        )()
+        self.json_decoder: json.JSONDecoder = json.JSONDecoder()
+        self.text: str = ""
+        self.position: int = 0
+        self.is_exhausted: bool = False
+
+    def fill(self) -> bool:
+        """
+        Appends the next chunk to the text, dropping everything consumed so far.
+
+        :return: False if the stream is exhausted
+        """
+        if self.is_exhausted:
+            return False
+        chunk: Optional[Union[bytes, str]] = next(self.chunks, None)
+        if chunk is None:
+            self.is_exhausted = True
+            text: str = self.decoder.decode(b"", final=True)
+        else:
+            text = chunk if isinstance(chunk, str) else self.decoder.decode(chunk)
+        self.text = self.text[self.position :] + text
+        self.position = 0
+        return True
+
+    def peek(self) -> Optional[str]:
+        """
+        Skips whitespace and returns the next character without consuming it, None at the end of the stream.
+        """
+        while True:
+            while (self.position < len(self.text)) and (
+                self.text[self.position] in WHITESPACE
+            ):
+                self.position += 1
+            if self.position < len(self.text):
+                return self.text[self.position]
+            if not self.fill():
+                return None
+
+    def consume(self, characters: str) -> str:
+        character: Optional[str] = self.peek()
+        if (character is None) or (character not in characters):
+            raise ValueError(
+                f"Invalid json, expected one of {list(characters)} but got {character}!"
+            )
+        self.position += 1
+        return character
+
+    def decode(self) -> Any:
+        """
+        Decodes the next json value, reading more chunks until it is complete.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.text, self.position)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # a number cut off by the end of the text might continue in the next chunk
+            if (
+                isinstance(value, (int, float))
+                and ((end == len(self.text)) or (self.text[end] in "0123456789.eE+-"))
+                and self.fill()
+            ):
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_array(
+    chunks: Iterable[Union[bytes, str]], key: Optional[str] = None
+) -> Iterator[Any]:
+    """
+    Parses json incrementally from chunks of utf-8 encoded bytes and yields the items of its array one at a time, such
+    that neither the whole document nor all of its items are held in memory. The array is either the top level value or,
+    if the top level value is an object, its member key, e.g. "elements" of an Overpass response. Other members are
+    skipped.
+
+    :param chunks: Iterable of bytes (or str), e.g. requests.Response.iter_content or read_chunks
+    :param key: Key of the array if the top level value is an object
+    :return: Iterator over the items of the array
+    """
+    buffer: _TextBuffer = _TextBuffer(chunks)
+    if buffer.consume("[{") == "{":
+        if key is None:
+            raise ValueError("Top level json value is an object, but no key is given!")
+        is_end: bool = buffer.peek() == "}"
+        while not is_end:
+            name: str = buffer.decode()
+            buffer.consume(":")
+            if name == key:
+                break
+            buffer.decode()
+            is_end = buffer.consume(",}") == "}"
+        if is_end:
+            raise ValueError(f"Key {key} not found!")
+        buffer.consume("[")
+    if buffer.peek() == "]":
+        return
+    while True:
+        yield buffer.decode()
+        if buffer.consume(",]") == "]":
+            return
+
+
+def read_chunks(file_path: str, chunk_size: int = 2 ** 16) -> Iterator[bytes]:
+    """
+    Reads a file in chunks of chunk_size bytes.
+
+    :param file_path: Path of the file
+    :param chunk_size: Number of bytes per chunk
+    :return: Iterator over chunks
+    """
+    with open(file_path, "rb") as f:
+        chunk: bytes = f.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = f.read(chunk_size)
@@ -0,0 +1,79 @@
+from numbers import Number
+from typing import Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+
+class ListColumn(object):
+    """
+    Column of lists stored as offsets into one flat array instead of one Python list per row. The values of row i are
+    values[offsets[i]:offsets[i + 1]]. Numeric lists are stored as float64, all other values as categorical codes.
+    """
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        values: np.ndarray,
+        is_null: np.ndarray,
+        categories: Optional[np.ndarray] = None,
+    ):
+        self.offsets: np.ndarray = offsets
+        self.values: np.ndarray = values
+        self.is_null: np.ndarray = is_null
+        self.categories: Optional[np.ndarray] = categories
+
+    @classmethod
+    def from_lists(cls, lists: Iterable[Optional[List[any]]]) -> "ListColumn":
+        """
+        Builds a ListColumn from an iterable of lists. Missing lists (None) are kept apart from empty lists.
+
+        :param lists: Iterable of lists or None
+        :return: ListColumn
+        """
+        lengths: List[int] = []
+        is_null: List[bool] = []
+        flat_values: List[any] = []
+        for values in lists:
+            if not isinstance(values, list):
+                lengths += [0]
+                is_null += [True]
+                continue
+            lengths += [len(values)]
+            is_null += [False]
+            flat_values += values
+        offsets: np.ndarray = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if all(isinstance(v, Number) & (not isinstance(v, bool)) for v in flat_values):
+            return cls(
+                offsets, np.array(flat_values, dtype=np.float64), np.array(is_null)
+            )
+        codes, categories = pd.factorize(pd.Series(flat_values, dtype=object))
+        return cls(
+            offsets,
+            codes.astype(np.int32),
+            np.array(is_null),
+            categories=np.asarray(categories, dtype=object),
+        )
+
+    def __len__(self) -> int:
+        return len(self.is_null)
+
+    def __getitem__(self, row: int) -> Optional[List[any]]:
+        if self.is_null[row]:
+            return None
+        values: np.ndarray = self.values[self.offsets[row] : self.offsets[row + 1]]
+        if self.categories is not None:
+            return [self.categories[v] if v >= 0 else None for v in values]
+        return values.tolist()
+
+    def isna(self) -> np.ndarray:
+        return self.is_null
+
+    def take(self, rows: Iterable[int]) -> List[Optional[List[any]]]:
+        """
+        Materializes the lists of some rows.
+
+        :param rows: Row numbers
+        :return: List containing a list (or None) per row
+        """
+        return [self[row] for row in rows]
@@ -0,0 +1,82 @@
+import math
+from typing import List, NamedTuple, Tuple
+
+
+class BBox(NamedTuple):
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+
+def split_bbox(bbox: BBox, rows: int, columns: int) -> List[BBox]:
+    """
+    Splits a bounding box into a regular grid of rows x columns tiles, ordered row by row from south-west to north-east.
+
+    :param bbox: Bounding box in degrees
+    :param rows: Number of tiles in latitude direction
+    :param columns: Number of tiles in longitude direction
+    :return: List of tiles
+    """
+    if (rows < 1) | (columns < 1):
+        raise ValueError("Number of rows and columns must be positive!")
+    lat_step: float = (bbox.max_lat - bbox.min_lat) / rows
+    lon_step: float = (bbox.max_lon - bbox.min_lon) / columns
+    return [
+        BBox(
+            min_lon=bbox.min_lon + column * lon_step,
+            min_lat=bbox.min_lat + row * lat_step,
+            max_lon=(
+                bbox.max_lon
+                if column == columns - 1
+                else bbox.min_lon + (column + 1) * lon_step
+            ),
+            max_lat=(
+                bbox.max_lat if row == rows - 1 else bbox.min_lat + (row + 1) * lat_step
+            ),
+        )
+        for row in range(rows)
+        for column in range(columns)
+    ]
+
+
+def halo_degrees(
+    max_distance: float, max_abs_lat: float, earth_radius: int = 6371
+) -> Tuple[float, float]:
+    """
+    Conservative extent in degrees of a halo of max_distance meters, i.e. any point closer than max_distance to a
+    point at an absolute latitude below max_abs_lat is at most this many degrees away in each direction.
+
+    :param max_distance: Halo width in meters
+    :param max_abs_lat: Largest absolute latitude in degrees of any point inside the halo
+    :param earth_radius: Earth radius in kilometers
+    :return: Tuple of longitude and latitude extent in degrees
+    """
+    angle: float = max_distance / (earth_radius * 1000)
+    cos_lat: float = math.cos(math.radians(min(max_abs_lat, 90.0)))
+    if (cos_lat <= 0) or (angle / 2 >= cos_lat):
+        lon_halo: float = 360.0
+    else:
+        lon_halo = math.degrees(2 * math.asin(math.sin(angle / 2) / cos_lat))
+    # small margin, so that points exactly on the border are not lost due to rounding
+    return lon_halo * 1.01, math.degrees(angle) * 1.01
+
+
+def expand_bbox(bbox: BBox, max_distance: float, earth_radius: int = 6371) -> BBox:
+    """
+    Expands a bounding box by a halo of max_distance meters in every direction.
+
+    :param bbox: Bounding box in degrees
+    :param max_distance: Halo width in meters
+    :param earth_radius: Earth radius in kilometers
+    :return: Expanded bounding box
+    """
+    lat_halo: float = halo_degrees(max_distance, 0.0, earth_radius)[1]
+    max_abs_lat: float = max(abs(bbox.min_lat), abs(bbox.max_lat)) + lat_halo
+    lon_halo, _ = halo_degrees(max_distance, max_abs_lat, earth_radius)
+    return BBox(
+        min_lon=bbox.min_lon - lon_halo,
+        min_lat=bbox.min_lat - lat_halo,
+        max_lon=bbox.max_lon + lon_halo,
+        max_lat=bbox.max_lat + lat_halo,
+    )
@@ -0,0 +1,220 @@
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from datetime import datetime, timedelta
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+# relationship attribute of sheets in the workbook
+REL_ID: str = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+# ids of built-in number formats of dates and times
+DATE_FORMAT_IDS: Set[int] = set(range(14, 23)) | set(range(27, 37)) | {45, 46, 47}
+DATE_FORMAT_IGNORED: re.Pattern = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.|_.|\*.')
+EPOCH: datetime = datetime(1899, 12, 30)
+EPOCH_1904: datetime = datetime(1904, 1, 1)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _column_index(reference: str) -> int:
+    """
+    :param reference: Cell reference, e.g. "AB12"
+    :return: Zero based column index, e.g. 27
+    """
+    index: int = 0
+    for character in reference:
+        if not character.isalpha():
+            break
+        index = index * 26 + ord(character.upper()) - 64
+    return index - 1
+
+
+def _text(element: ET.Element) -> str:
+    """
+    :return: Text of a shared string or inline string element, i.e. of its t element or of its rich text runs
+    """
+    text: str = ""
+    for child in element:
+        name: str = _local_name(child.tag)
+        if name == "t":
+            text += child.text or ""
+        elif name == "r":
+            text += "".join(
+                t.text or "" for t in child if _local_name(t.tag) == "t"
+            )
+        elif name == "is":
+            text += _text(child)
+    return text
+
+
+def _first_sheet_path(workbook: zipfile.ZipFile) -> Tuple[str, bool]:
+    """
+    :param workbook: Zipped workbook
+    :return: Tuple of the path of the first sheet and whether dates count from 1904
+    """
+    root: ET.Element = ET.fromstring(workbook.read("xl/workbook.xml"))
+    is_1904: bool = False
+    sheet_id: Optional[str] = None
+    for element in root.iter():
+        name: str = _local_name(element.tag)
+        if name == "workbookPr":
+            is_1904 = element.get("date1904", "0").lower() in ("1", "true")
+        if (name == "sheet") and (sheet_id is None):
+            sheet_id = element.get(REL_ID)
+    try:
+        relations: ET.Element = ET.fromstring(
+            workbook.read("xl/_rels/workbook.xml.rels")
+        )
+    except KeyError:
+        return "xl/worksheets/sheet1.xml", is_1904
+    for relation in relations:
+        if relation.get("Id") == sheet_id:
+            target: str = relation.get("Target")
+            path: str = (
+                target.lstrip("/")
+                if target.startswith("/")
+                else posixpath.normpath(posixpath.join("xl", target))
+            )
+            return path, is_1904
+    return "xl/worksheets/sheet1.xml", is_1904
+
+
+def _shared_strings(workbook: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in workbook.namelist():
+        return []
+    strings: List[str] = []
+    with workbook.open("xl/sharedStrings.xml") as f:
+        for _, element in ET.iterparse(f):
+            if _local_name(element.tag) == "si":
+                strings += [_text(element)]
+                element.clear()
+    return strings
+
+
+def _date_styles(workbook: zipfile.ZipFile) -> Set[int]:
+    """
+    :param workbook: Zipped workbook
+    :return: Indices of the cell styles, which format numbers as dates or times
+    """
+    if "xl/styles.xml" not in workbook.namelist():
+        return set()
+    root: ET.Element = ET.fromstring(workbook.read("xl/styles.xml"))
+    date_format_ids: Set[int] = set(DATE_FORMAT_IDS)
+    date_styles: Set[int] = set()
+    for element in root:
+        name: str = _local_name(element.tag)
+        if name == "numFmts":
+            for number_format in element:
+                code: str = DATE_FORMAT_IGNORED.sub(
+                    "", number_format.get("formatCode", "")
+                ).lower()
+                if any(character in code for character in "dmyhs"):
+                    date_format_ids.add(int(number_format.get("numFmtId")))
+        if name == "cellXfs":
+            for index, style in enumerate(element):
+                if int(style.get("numFmtId", 0)) in date_format_ids:
+                    date_styles.add(index)
+    return date_styles
+
+
+def iter_xlsx_rows(source: Union[str, IO[bytes]]) -> Iterator[List[Any]]:
+    """
+    Parses the first sheet of a xlsx workbook incrementally and yields its rows one at a time, such that only the
+    shared strings of the workbook and a single row are held in memory. Cells are typed: shared and inline strings are
+    str, numbers formatted as dates are datetime, integral numbers are int, other numbers float, booleans bool, errors
+    and empty cells None. Rows are padded with None to the last non empty cell, rows missing in the sheet are empty.
+
+    :param source: Path or binary file object of the xlsx file
+    :return: Iterator over rows
+    """
+    with zipfile.ZipFile(source) as workbook:
+        sheet_path, is_1904 = _first_sheet_path(workbook)
+        strings: List[str] = _shared_strings(workbook)
+        date_styles: Set[int] = _date_styles(workbook)
+        epoch: datetime = EPOCH_1904 if is_1904 else EPOCH
+        with workbook.open(sheet_path) as f:
+            number: int = 0
+            sheet_data: Optional[ET.Element] = None
+            for event, element in ET.iterparse(f, events=("start", "end")):
+                name: str = _local_name(element.tag)
+                if event == "start":
+                    if name == "sheetData":
+                        sheet_data = element
+                    continue
+                if name != "row":
+                    continue
+                row_number: int = int(element.get("r", number + 1))
+                while number < row_number - 1:
+                    number += 1
+                    yield []
+                number = row_number
+                row: List[Any] = []
+                for cell in element:
+                    if _local_name(cell.tag) != "c":
+                        continue
+                    reference: Optional[str] = cell.get("r")
+                    index: int = (
+                        _column_index(reference) if reference is not None else len(row)
+                    )
+                    row += [None] * (index + 1 - len(row))
+                    row[index] = _cell_value(cell, strings, date_styles, epoch)
+                while row and (row[-1] is None):
+                    row.pop()
+                yield row
+                # rows are only referenced by the sheet data
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+
+def _cell_value(
+    cell: ET.Element, strings: List[str], date_styles: Set[int], epoch: datetime
+) -> Any:
+    cell_type: str = cell.get("t", "n")
+    if cell_type == "inlineStr":
+        return _text(cell)
+    value: Optional[str] = None
+    for child in cell:
+        if _local_name(child.tag) == "v":
+            value = child.text
+    if (value is None) or (cell_type == "e"):
+        return None
+    if cell_type == "s":
+        return strings[int(value)]
+    if cell_type == "str":
+        return value
+    if cell_type == "b":
+        return value == "1"
+    if cell_type == "d":
+        return datetime.fromisoformat(value)
+    number: float = float(value)
+    if int(cell.get("s", 0)) in date_styles:
+        return epoch + timedelta(days=number)
+    return int(number) if number.is_integer() else number
+
+
+def iter_xlsx_records(
+    source: Union[str, IO[bytes]], first_header: str
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the rows below the header row of the first sheet of a xlsx workbook as records, see iter_xlsx_rows. Rows
+    above the header row, e.g. a title or remarks, and empty rows are skipped.
+
+    :param source: Path or binary file object of the xlsx file
+    :param first_header: Value of the first cell of the header row
+    :return: Iterator over records by header
+    """
+    rows: Iterator[List[Any]] = iter_xlsx_rows(source)
+    header: Optional[List[Any]] = None
+    for row in rows:
+        if row and (row[0] == first_header):
+            header = row
+            break
+    if header is None:
+        raise RuntimeError("Could not find start of data!")
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        row += [None] * (len(header) - len(row))
+        yield {name: value for name, value in zip(header, row) if name is not None}
@@ -1,8 +1,13 @@
 import json
 import os
-from typing import List, Dict
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from numbers import Number
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 from charging_stations.connectors import Connector
-from charging_stations.helpers import object_hook
+from charging_stations.helpers import default, object_hook
 
 
 def connector_process(connector: Connector):
@@ -44,6 +49,11 @@ def connector_process(connector: Connector):
             & (" " in coordinates)
             & coordinates.endswith(")")
         )
+        longitude, latitude = processed_data_point.get(
+            "lon"
+        ), processed_data_point.get("lat")
+        assert isinstance(longitude, Number) & isinstance(latitude, Number)
+        assert coordinates == f"POINT({longitude} {latitude})"
 
 
 def connector_load(connector: Connector):
@@ -63,3 +73,59 @@ def connector_load(connector: Connector):
         expected_ocm_processed = json.load(f, object_hook=object_hook)
     connector.load(is_processed=True, is_test=True)
     assert expected_ocm_processed == connector.processed_data
+
+
+def connector_process_parallel(connector: Connector, stations_raw: List[Dict]):
+    connector.raw_data = stations_raw
+    connector.processed_data, connector.errors = [], {}
+    connector.process(to_disk=False)
+    serial_data: List[Dict] = connector.processed_data
+    serial_errors: Dict[str, int] = connector.errors
+    for n_jobs, chunk_size in [(2, 1), (2, 7), (3, 1000)]:
+        connector.processed_data, connector.errors = [], {}
+        connector.process(to_disk=False, n_jobs=n_jobs, chunk_size=chunk_size)
+        assert json.dumps(connector.processed_data, default=default) == json.dumps(
+            serial_data, default=default
+        )
+        assert connector.errors == serial_errors
+
+
+# answers a request to the local server with status code, body and additional headers
+Route = Callable[[BaseHTTPRequestHandler], Tuple[int, bytes, Dict[str, str]]]
+
+
+def json_response(content: any, status: int = 200) -> Tuple[int, bytes, Dict[str, str]]:
+    return status, json.dumps(content).encode("utf8"), {}
+
+
+@contextmanager
+def local_server(routes: Dict[str, Route]) -> Iterator[str]:
+    """
+    Serves routes on a free local port in a background thread, as a stand-in for the apis of the connectors. Every
+    route receives the request handler, whose path contains the query, paths without route are answered with 404.
+
+    :param routes: Route of every path
+    :return: Url of the server, which is shut down on exit
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            route: Optional[Route] = routes.get(urlparse(self.path).path)
+            status, body, headers = route(self) if route else (404, b"", {})
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server: ThreadingHTTPServer = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
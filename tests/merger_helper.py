@@ -0,0 +1,53 @@
+import hashlib
+from typing import Dict, List, Optional
+
+
+def create_station(
+    number: int,
+    data_source: str,
+    longitude: float,
+    latitude: float,
+    operator: Optional[str] = "EnBW",
+    street: Optional[str] = "Hauptstraße 1",
+    postcode: Optional[str] = "10115",
+    town: Optional[str] = "Berlin",
+    socket_type_list: Optional[List[str]] = None,
+) -> Dict:
+    identifier: bytes = (
+        hashlib.sha256(f"{data_source}{number}".encode("utf8"))
+        .hexdigest()
+        .encode("utf8")
+    )
+    return dict(
+        id=identifier,
+        data_source=data_source,
+        address=dict(
+            station_id=identifier,
+            street=street,
+            town=town,
+            postcode=postcode,
+            district=None,
+            state=None,
+            country="DE",
+        ),
+        charging=dict(
+            station_id=identifier,
+            capacity=2,
+            kw_list=[22.0, 22.0],
+            ampere_list=None,
+            volt_list=None,
+            socket_type_list=socket_type_list
+            if socket_type_list is not None
+            else ["Typ2"],
+            dc_support=False,
+            total_kw=44.0,
+            max_kw=22.0,
+        ),
+        operator=operator,
+        payment=None,
+        authentication=None,
+        coordinates=f"POINT({longitude} {latitude})",
+        lon=longitude,
+        lat=latitude,
+        raw_data="{}",
+    )
@@ -0,0 +1,250 @@
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# rough bounding box of Germany
+MIN_LON, MIN_LAT, MAX_LON, MAX_LAT = 5.9, 47.3, 15.0, 55.0
+# name, longitude, latitude, first postcode digits and weight of urban areas
+CITIES: List[Tuple[str, float, float, str, float]] = [
+    ("Berlin", 13.405, 52.52, "10", 10.0),
+    ("Hamburg", 9.993, 53.551, "20", 5.0),
+    ("München", 11.582, 48.135, "80", 6.0),
+    ("Köln", 6.96, 50.938, "50", 4.0),
+    ("Frankfurt am Main", 8.682, 50.11, "60", 4.0),
+    ("Stuttgart", 9.182, 48.776, "70", 4.0),
+    ("Düsseldorf", 6.773, 51.228, "40", 3.0),
+    ("Leipzig", 12.373, 51.34, "04", 2.0),
+    ("Dortmund", 7.466, 51.514, "44", 2.0),
+    ("Essen", 7.012, 51.456, "45", 2.0),
+    ("Bremen", 8.801, 53.079, "28", 2.0),
+    ("Dresden", 13.738, 51.05, "01", 2.0),
+    ("Hannover", 9.732, 52.375, "30", 2.0),
+    ("Nürnberg", 11.077, 49.452, "90", 2.0),
+    ("Karlsruhe", 8.404, 49.007, "76", 1.0),
+    ("Freiburg im Breisgau", 7.842, 47.999, "79", 1.0),
+]
+OPERATORS: List[str] = [
+    "EnBW",
+    "Ionity",
+    "Tesla",
+    "Allego",
+    "E.ON",
+    "innogy",
+    "Stadtwerke München",
+    "Mainova",
+    "EWE Go",
+    "Vattenfall",
+    "Fastned",
+    "Pfalzwerke",
+    "Shell Recharge",
+    "Aral pulse",
+    "N-ERGIE",
+]
+STREETS: List[str] = [
+    "Hauptstraße",
+    "Bahnhofstraße",
+    "Schulstraße",
+    "Gartenstraße",
+    "Dorfstraße",
+    "Bergstraße",
+    "Lindenstraße",
+    "Kirchstraße",
+    "Am Markt",
+    "Industriestraße",
+]
+# socket types, power in kW and whether they support DC
+SOCKETS: List[Tuple[str, float, bool]] = [
+    ("Typ2", 22.0, False),
+    ("Typ2", 11.0, False),
+    ("Schuko", 3.7, False),
+    ("CCS DC", 150.0, True),
+    ("CHAdeMO DC", 50.0, True),
+]
+DATA_SOURCES: List[str] = ["BNA", "OCM", "OSM"]
+
+
+def _spelling_variant(operator: str, rng: np.random.Generator) -> str:
+    variant: int = rng.integers(5)
+    if variant == 0:
+        return operator.lower()
+    if variant == 1:
+        return operator.upper()
+    if variant == 2:
+        return f"{operator} {rng.choice(['GmbH', 'AG', 'GmbH & Co. KG'])}"
+    if (variant == 3) & (len(operator) > 3):
+        position: int = rng.integers(1, len(operator) - 1)
+        return operator[:position] + operator[position + 1 :]
+    return f" {operator}  "
+
+
+def _site_locations(
+    no_sites: int, urban_share: float, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    weights: np.ndarray = np.array([c[4] for c in CITIES])
+    cities: np.ndarray = rng.choice(
+        len(CITIES), size=no_sites, p=weights / weights.sum()
+    )
+    is_urban: np.ndarray = rng.random(no_sites) < urban_share
+    # urban sites are spread ~5km around the city center, others anywhere in the country
+    lon: np.ndarray = np.where(
+        is_urban,
+        np.array([c[1] for c in CITIES])[cities] + rng.normal(0, 0.07, no_sites),
+        rng.uniform(MIN_LON, MAX_LON, no_sites),
+    )
+    lat: np.ndarray = np.where(
+        is_urban,
+        np.array([c[2] for c in CITIES])[cities] + rng.normal(0, 0.045, no_sites),
+        rng.uniform(MIN_LAT, MAX_LAT, no_sites),
+    )
+    # rural sites take the town of the closest city to stay plausible
+    rural_cities: np.ndarray = np.argmin(
+        (lon[~is_urban, np.newaxis] - np.array([c[1] for c in CITIES])) ** 2
+        + (lat[~is_urban, np.newaxis] - np.array([c[2] for c in CITIES])) ** 2,
+        axis=1,
+    )
+    cities[~is_urban] = rural_cities
+    return lon, lat, cities
+
+
+def generate_stations(
+    no_stations: int,
+    duplicate_rate: float = 0.4,
+    jitter_meters: float = 15.0,
+    operator_noise: float = 0.2,
+    urban_share: float = 0.7,
+    source_weights: Optional[Dict[str, float]] = None,
+    seed: int = 0,
+) -> Tuple[List[Dict], Dict[bytes, int]]:
+    """
+    Generates processed stations shaped like the output of the BNA, OCM and OSM connectors. Every charging site is
+    listed by one data source and, with probability duplicate_rate, additionally by one or both of the others.
+
+    :param no_stations: Number of stations to generate
+    :param duplicate_rate: Share of sites listed by more than one data source
+    :param jitter_meters: Standard deviation in meters of the position of duplicates around their site
+    :param operator_noise: Probability of a duplicate spelling the operator differently, e.g. "enbw ag"
+    :param urban_share: Share of sites clustered around city centers, the others are spread uniformly
+    :param source_weights: Probability of each data source to be the first to list a site
+    :param seed: Seed of the random generator, the same seed yields the same stations
+    :return: Tuple of the stations and the site number of each station id, which identifies true duplicates
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    source_weights = (
+        source_weights if source_weights else dict(BNA=0.4, OCM=0.3, OSM=0.3)
+    )
+    # every site yields 1 + duplicate_rate * 1.5 stations on average, plus some margin
+    no_sites: int = int(no_stations / (1 + duplicate_rate * 1.5) * 1.05) + 16
+    lon, lat, cities = _site_locations(no_sites, urban_share, rng)
+    first_sources: np.ndarray = rng.choice(
+        len(DATA_SOURCES),
+        size=no_sites,
+        p=np.array([source_weights[s] for s in DATA_SOURCES])
+        / sum(source_weights.values()),
+    )
+    is_duplicated: np.ndarray = rng.random(no_sites) < duplicate_rate
+    operators: np.ndarray = rng.integers(len(OPERATORS), size=no_sites)
+    streets: np.ndarray = rng.integers(len(STREETS), size=no_sites)
+    house_numbers: np.ndarray = rng.integers(1, 120, size=no_sites)
+    postcodes: np.ndarray = rng.integers(0, 1000, size=no_sites)
+    capacities: np.ndarray = rng.integers(1, 5, size=no_sites)
+    sockets: np.ndarray = rng.integers(len(SOCKETS), size=no_sites)
+    # ~ meters per degree at the latitude of Germany
+    lon_jitter: float = jitter_meters / 71000
+    lat_jitter: float = jitter_meters / 111000
+
+    stations: List[Dict] = []
+    site_numbers: Dict[bytes, int] = {}
+    site: int = 0
+    while len(stations) < no_stations:
+        if site == no_sites:
+            raise RuntimeError("Not enough sites generated!")
+        data_sources: List[str] = [DATA_SOURCES[first_sources[site]]]
+        if is_duplicated[site]:
+            others: List[str] = [s for s in DATA_SOURCES if s not in data_sources]
+            data_sources += (
+                others if rng.random() < 0.5 else [others[rng.integers(len(others))]]
+            )
+        for number, data_source in enumerate(data_sources):
+            is_first: bool = number == 0
+            operator: str = OPERATORS[operators[site]]
+            if (not is_first) and (rng.random() < operator_noise):
+                operator = _spelling_variant(operator, rng)
+            longitude: float = float(
+                lon[site] + (0 if is_first else rng.normal(0, lon_jitter))
+            )
+            latitude: float = float(
+                lat[site] + (0 if is_first else rng.normal(0, lat_jitter))
+            )
+            station: Dict = _create_station(
+                identifier=hashlib.sha256(f"{seed}{data_source}{site}".encode("utf8"))
+                .hexdigest()
+                .encode("utf8"),
+                data_source=data_source,
+                operator=operator,
+                longitude=longitude,
+                latitude=latitude,
+                city=CITIES[cities[site]],
+                street=f"{STREETS[streets[site]]} {house_numbers[site]}",
+                postcode_suffix=f"{postcodes[site]:03d}",
+                capacity=int(capacities[site]),
+                socket=SOCKETS[sockets[site]],
+                has_address=(data_source != "OSM") | (rng.random() < 0.5),
+            )
+            stations += [station]
+            site_numbers[station["id"]] = site
+            if len(stations) == no_stations:
+                break
+        site += 1
+    return stations, site_numbers
+
+
+def _create_station(
+    identifier: bytes,
+    data_source: str,
+    operator: str,
+    longitude: float,
+    latitude: float,
+    city: Tuple[str, float, float, str, float],
+    street: str,
+    postcode_suffix: str,
+    capacity: int,
+    socket: Tuple[str, float, bool],
+    has_address: bool,
+) -> Dict:
+    socket_type, kw, dc_support = socket
+    kw_list: List[float] = [kw] * capacity
+    raw_data: Dict = dict(
+        operator=operator, lon=longitude, lat=latitude, sockets=[socket_type] * capacity
+    )
+    return dict(
+        id=identifier,
+        data_source=data_source,
+        address=dict(
+            station_id=identifier,
+            street=street if has_address else None,
+            town=city[0] if has_address else None,
+            postcode=city[3] + postcode_suffix if has_address else None,
+            district=None,
+            state=None,
+            country="DE" if data_source != "OSM" else None,
+        ),
+        charging=dict(
+            station_id=identifier,
+            capacity=capacity,
+            kw_list=kw_list,
+            ampere_list=None,
+            volt_list=None,
+            socket_type_list=[socket_type] * capacity,
+            dc_support=dc_support,
+            total_kw=sum(kw_list),
+            max_kw=max(kw_list),
+        ),
+        operator=operator,
+        payment=None,
+        authentication=None,
+        coordinates=f"POINT({longitude} {latitude})",
+        lon=longitude,
+        lat=latitude,
+        raw_data=json.dumps(raw_data, ensure_ascii=False),
+    )
@@ -1,9 +1,12 @@
+import json
 import logging
 import os
 from numbers import Number
 from typing import List, Dict
-from charging_stations.connectors import BNAConnector, Connector, Config
-from .connector_helper import connector_process
+from charging_stations.connectors import BNAConnector, Connector, Config, OCMConnector
+from charging_stations.helpers import default
+from .connector_helper import connector_process, connector_process_parallel
+from .test_xlsx_stream import write_xlsx
 
 log = logging.getLogger(os.path.basename(__file__))
 
@@ -33,3 +36,122 @@ class TestConnectorBNA:
     def test_process(self):
         # TODO: Add option to first download new data before run process data
         connector_process(connector=self.connector)
+
+    def test_process_parallel(self, tmp_path):
+        stations_raw: List[Dict] = [
+            {
+                "Betreiber": f"Operator {i % 7}",
+                "Adresse": f"Hauptstraße {i}",
+                # a missing postcode and town fails the address conversion
+                "Postleitzahl Ort": "10115 Berlin" if i % 10 else None,
+                "Bundesland": "Berlin",
+                "Längengrad [DG]": 13.4,
+                "Breitengrad [DG]": 52.5 + i * 1e-3,
+                "Anschlussleistung [kW]": "22,5",
+                "Anzahl Ladepunkte": 2,
+                "Steckertypen1": "AC Steckdose Typ 2",
+                "P1 [kW]": 11.0,
+                "Steckertypen2": "DC Kupplung Combo",
+                "P2 [kW]": "11,5",
+            }
+            for i in range(100)
+        ]
+        connector: BNAConnector = BNAConnector(base_path=str(tmp_path), **Config.BNA)
+        connector_process_parallel(connector, stations_raw)
+        assert len(connector.processed_data) == 90
+        assert connector.errors == dict(address=10)
+
+    def test_stream_data(self, tmp_path):
+        header: List[str] = [
+            "Betreiber",
+            "Adresse",
+            "Postleitzahl Ort",
+            "Bundesland",
+            "Längengrad [DG]",
+            "Breitengrad [DG]",
+            "Anschlussleistung [kW]",
+            "Anzahl Ladepunkte",
+            "Steckertypen1",
+            "P1 [kW]",
+            "Steckertypen2",
+            "P2 [kW]",
+        ]
+        rows: List[List] = [
+            [
+                f"Operator {i % 7}",
+                f"Hauptstraße {i}",
+                "10115 Berlin",
+                "Berlin",
+                13.4,
+                52.5 + i * 1e-3,
+                44,
+                2,
+                "AC Steckdose Typ 2",
+                22,
+                "DC Kupplung Combo" if i % 2 else None,
+                22 if i % 2 else None,
+            ]
+            for i in range(10)
+        ]
+        file_path: str = str(tmp_path / "Ladesaeulenregister.xlsx")
+        with open(file_path, "wb") as f:
+            f.write(write_xlsx([["Ladesäulenregister"], [], header] + rows))
+        connector: BNAConnector = BNAConnector(base_path=str(tmp_path), **Config.BNA)
+        connector.process(
+            stations_raw=connector.stream_data(file_path=file_path, to_disk=True)
+        )
+        streamed_stations: List[Dict] = connector.processed_data
+        assert len(streamed_stations) == 10
+        assert streamed_stations[1]["charging"]["kw_list"] == [22, 22]
+        assert streamed_stations[1]["charging"]["dc_support"]
+        assert streamed_stations[2]["address"]["postcode"] == "10115"
+
+        connector = BNAConnector(base_path=str(tmp_path), **Config.BNA)
+        connector.load(is_processed=False)
+        assert connector.raw_data == [dict(zip(header, row)) for row in rows]
+        connector.process()
+        assert connector.processed_data == streamed_stations
+
+    def test_process_columns(self, tmp_path):
+        kws: List = [22, "11,5", 50.0, None, float("nan"), "nan", "n/a", True, " 3,7 "]
+        postcode_towns: List = ["10115 Berlin", "1011 B", "Bad Tölz", 83646, None]
+        latitudes: List = [52.5, "52,5", 52, "N/A", None, float("nan")]
+        sockets: List = ["AC Steckdose Typ 2", "DC Kupplung Combo, AC Kabel", None, ""]
+        stations_raw: List[Dict] = [
+            {
+                "Betreiber": f"Operator {i % 7}",
+                "Adresse": f"Hauptstraße {i}",
+                "Postleitzahl Ort": postcode_towns[i % 5],
+                "Bundesland": "Berlin",
+                "Längengrad [DG]": 13.4 if i % 11 else "13,4",
+                "Breitengrad [DG]": latitudes[i % 6],
+                "Anschlussleistung [kW]": kws[(i + 3) % 9],
+                "Anzahl Ladepunkte": 2,
+                "Steckertypen1": sockets[i % 4],
+                "P1 [kW]": kws[i % 9],
+                "Steckertypen2": sockets[(i // 4) % 4],
+                "P2 [kW]": kws[(i // 9) % 9],
+            }
+            for i in range(400)
+        ]
+        connector: BNAConnector = BNAConnector(base_path=str(tmp_path), **Config.BNA)
+        stations, errors = connector._process_chunk(stations_raw)
+        expected_stations, expected_errors = OCMConnector._process_chunk(
+            connector, stations_raw
+        )
+        assert len(stations) == 162
+        assert json.dumps(stations, default=default) == json.dumps(
+            expected_stations, default=default
+        )
+        assert list(errors.items()) == list(expected_errors.items())
+
+        # rows with different columns are processed row by row
+        del stations_raw[1]["P2 [kW]"]
+        stations, errors = connector._process_chunk(stations_raw)
+        expected_stations, expected_errors = OCMConnector._process_chunk(
+            connector, stations_raw
+        )
+        assert json.dumps(stations, default=default) == json.dumps(
+            expected_stations, default=default
+        )
+        assert errors == expected_errors
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from charging_stations.connectors import Merger
+from charging_stations.helpers import (
+    RadianPoints,
+    distances_to_point,
+    paired_distances,
+    pairs_within,
+    radian_points,
+)
+
+
+class TestDistance:
+    lon1: np.ndarray = np.array([-77.037852, 10.944427])
+    lat1: np.ndarray = np.array([38.898556, 48.402489])
+    lon2: np.ndarray = np.array([-77.043934, 10.940854])
+    lat2: np.ndarray = np.array([38.897147, 48.397232])
+    expected_distance: np.ndarray = np.array([549.1557912048178, 641.3109178030164])
+
+    def test_paired_distances(self):
+        points: RadianPoints = radian_points(self.lon1, self.lat1)
+        other_points: RadianPoints = radian_points(self.lon2, self.lat2)
+        assert np.array_equal(
+            paired_distances(points, other_points), self.expected_distance
+        )
+        out: np.ndarray = np.empty(2)
+        assert paired_distances(points, other_points, out=out) is out
+        with pytest.raises(ValueError):
+            paired_distances(points, other_points, out=np.empty(2, dtype=np.float32))
+
+        distance: np.ndarray = paired_distances(
+            radian_points(self.lon1, self.lat1, dtype=np.float32),
+            radian_points(self.lon2, self.lat2, dtype=np.float32),
+        )
+        assert distance.dtype == np.float32
+        assert np.allclose(distance, self.expected_distance, atol=2.0)
+
+    def test_distances_to_point(self):
+        points: RadianPoints = radian_points(self.lon2, self.lat2)
+        distance: np.ndarray = distances_to_point(
+            radian_points(self.lon1[1:], self.lat1[1:]), points
+        )
+        assert distance[1] == self.expected_distance[1]
+        with pytest.raises(ValueError):
+            distances_to_point(points, points)
+
+    def test_pairs_within(self):
+        rng: np.random.Generator = np.random.default_rng(1)
+        lon, lat = rng.uniform(10, 10.02, 500), rng.uniform(50, 50.02, 500)
+        points: RadianPoints = radian_points(lon, lat)
+        left, right, distance = pairs_within(points, max_distance=100, chunk_size=64)
+
+        all_left, all_right = np.triu_indices(len(lon), k=1)
+        all_distance: np.ndarray = paired_distances(
+            points.take(all_left), points.take(all_right)
+        )
+        is_pair: np.ndarray = all_distance < 100
+        assert np.array_equal(left, all_left[is_pair])
+        assert np.array_equal(right, all_right[is_pair])
+        assert np.allclose(distance, all_distance[is_pair], rtol=0, atol=1e-9)
+
+    def test_haversine_distance_keeps_input(self):
+        coords: pd.DataFrame = pd.DataFrame(
+            dict(lon1=self.lon1, lat1=self.lat1, lon2=self.lon2, lat2=self.lat2)
+        )
+        distance: pd.Series = Merger.haversine_distance(coords)
+        assert list(coords.columns) == ["lon1", "lat1", "lon2", "lat2"]
+        assert np.array_equal(distance.values, self.expected_distance)
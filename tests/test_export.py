@@ -0,0 +1,130 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Dict, List
+from charging_stations.connectors import Merger, export_stations
+from .merger_helper import create_station
+from .station_generator import generate_stations
+
+
+class TestExport:
+    base_path: str = os.path.realpath(
+        os.path.join(os.path.dirname(__file__), "..", "data")
+    )
+
+    def merged_stations(self) -> Merger:
+        stations_list, _ = generate_stations(500, seed=2)
+        merger: Merger = Merger(base_path=self.base_path)
+        merger.merge(stations_list=stations_list)
+        return merger
+
+    def test_export_csv(self, tmp_path):
+        merger: Merger = self.merged_stations()
+        stations = merger.merged_stations_gdf
+        file_path: str = merger.export(str(tmp_path / "stations.csv"), chunk_size=64)
+        exported: pd.DataFrame = pd.read_csv(file_path)
+        assert exported.shape[0] == stations.shape[0]
+        assert list(exported["id"]) == [i.decode("utf8") for i in stations["id"]]
+        assert np.allclose(exported["lon"], stations.geometry.x)
+        assert np.allclose(exported["lat"], stations.geometry.y)
+        assert "geometry" not in exported
+        assert "operator_key" not in exported
+
+    def test_export_ndjson(self, tmp_path):
+        merger: Merger = self.merged_stations()
+        stations = merger.merged_stations_gdf
+        file_path: str = export_stations(
+            stations,
+            str(tmp_path / "stations.ndjson"),
+            columns=["id", "operator", "kw_list"],
+            chunk_size=100,
+        )
+        with open(file_path, "r", encoding="utf-8") as f:
+            records: List[Dict] = [json.loads(line) for line in f]
+        assert len(records) == stations.shape[0]
+        assert set(records[0]) == {"id", "operator", "kw_list", "lon", "lat"}
+        assert [r["kw_list"] for r in records] == list(stations["kw_list"])
+        assert np.allclose([r["lat"] for r in records], stations.geometry.y, atol=1e-12)
+
+    def test_export_geojsonseq(self, tmp_path):
+        merger: Merger = self.merged_stations()
+        stations = merger.merged_stations_gdf
+        file_path: str = merger.export(
+            str(tmp_path / "stations.geojsonl"), columns=["id", "data_source"]
+        )
+        with open(file_path, "r", encoding="utf-8") as f:
+            features: List[Dict] = [json.loads(line) for line in f]
+        assert len(features) == stations.shape[0]
+        assert features[0]["type"] == "Feature"
+        assert features[0]["geometry"]["coordinates"] == [
+            stations.geometry.x.iloc[0],
+            stations.geometry.y.iloc[0],
+        ]
+        assert set(features[0]["properties"]) == {"id", "data_source"}
+
+    def test_export_geoparquet(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        merger: Merger = self.merged_stations()
+        stations = merger.merged_stations_gdf
+        file_path: str = merger.export(str(tmp_path / "stations.parquet"), chunk_size=64)
+        table = pq.read_table(file_path)
+        assert table.num_rows == stations.shape[0]
+        assert json.loads(table.schema.metadata[b"geo"])["primary_column"] == "geometry"
+
+    def test_export_geoparquet_empty_lists(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        # OSM stations have no kw_list, an empty list in the first chunk does not tell the type of the column
+        stations_list: List[Dict] = [
+            create_station(0, "OSM", 10.0, 50.0, socket_type_list=[]),
+            create_station(1, "BNA", 11.0, 51.0),
+        ]
+        stations_list[0]["charging"]["kw_list"] = []
+        merger: Merger = Merger(base_path=str(tmp_path))
+        merger.merge(stations_list=stations_list)
+        file_path: str = merger.export(str(tmp_path / "stations.parquet"), chunk_size=1)
+        table = pq.read_table(file_path)
+        stations = merger.merged_stations_gdf
+        assert table.column("kw_list").to_pylist() == [
+            list(kw_list) for kw_list in stations["kw_list"]
+        ]
+        assert table.column("socket_type_list").to_pylist() == [
+            list(socket_types) for socket_types in stations["socket_type_list"]
+        ]
+        assert [] in table.column("kw_list").to_pylist()
+
+    def test_export_raw_data(self, tmp_path):
+        stations_list, _ = generate_stations(500, seed=2)
+        merger: Merger = Merger(base_path=str(tmp_path))
+        # half of the stations keep their raw data in the raw store
+        raw_data: Dict[bytes, str] = {s["id"]: s["raw_data"] for s in stations_list}
+        for station in stations_list[::2]:
+            raw_data_hash: str = merger.raw_store.put([station.pop("raw_data")])[0]
+            station["raw_data_hash"] = raw_data_hash
+        merger.merge(stations_list=stations_list)
+        stations = merger.merged_stations_gdf
+        assert "raw_data" not in stations
+        file_path: str = merger.export(
+            str(tmp_path / "stations.csv"), chunk_size=64, raw_data=True
+        )
+        exported: pd.DataFrame = pd.read_csv(file_path)
+        assert list(exported["raw_data"]) == [raw_data[i] for i in stations["id"]]
+        file_path = merger.export(
+            str(tmp_path / "stations.ndjson"), columns=["id"], raw_data=True
+        )
+        with open(file_path, "r", encoding="utf-8") as f:
+            records: List[Dict] = [json.loads(line) for line in f]
+        assert [json.loads(r["raw_data"]) for r in records] == [
+            json.loads(raw_data[i]) for i in stations["id"]
+        ]
+
+    def test_export_errors(self, tmp_path):
+        merger: Merger = Merger(base_path=self.base_path)
+        with pytest.raises(RuntimeError):
+            merger.export(str(tmp_path / "stations.csv"))
+        merger = self.merged_stations()
+        with pytest.raises(ValueError):
+            merger.export(str(tmp_path / "stations.xyz"))
+        with pytest.raises(ValueError):
+            merger.export(str(tmp_path / "stations.csv"), columns=["unknown"])
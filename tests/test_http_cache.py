@@ -0,0 +1,127 @@
+import copy
+import json
+import os
+import pickle
+import requests
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+from charging_stations.connectors import Config, OCMConnector
+from charging_stations.connectors._http_cache import HTTPCache, CachedResponse
+from .connector_helper import Route, local_server
+from .test_pipeline import OCM_RESPONSE
+
+LAST_MODIFIED: Dict[bytes, str] = {
+    b"first": "Wed, 21 Oct 2020 07:28:00 GMT",
+    b"second": "Thu, 22 Oct 2020 07:28:00 GMT",
+}
+
+
+class CachedResources(object):
+    """
+    Serves /etag with an ETag, /modified with Last-Modified and /plain without validators. Bodies are set in bodies and
+    every sent body is counted in sent.
+    """
+
+    def __init__(self):
+        self.bodies: Dict[str, bytes] = {}
+        self.sent: List[str] = []
+        self.routes: Dict[str, Route] = {
+            path: self.route for path in ["/etag", "/modified", "/plain"]
+        }
+
+    def route(self, request: BaseHTTPRequestHandler) -> Tuple[int, bytes, Dict]:
+        path: str = urlparse(request.path).path
+        body: bytes = self.bodies[path]
+        etag: str = f'"{hash(body)}"'
+        if (path == "/etag") & (request.headers.get("If-None-Match") == etag):
+            return 304, b"", {}
+        if (path == "/modified") and (
+            request.headers.get("If-Modified-Since") == LAST_MODIFIED[body]
+        ):
+            return 304, b"", {}
+        self.sent.append(path)
+        if path == "/etag":
+            return 200, body, {"ETag": etag}
+        if path == "/modified":
+            return 200, body, {"Last-Modified": LAST_MODIFIED[body]}
+        return 200, body, {}
+
+
+class TestHTTPCache:
+    def test_get(self, tmp_path):
+        resources: CachedResources = CachedResources()
+        cache: HTTPCache = HTTPCache(str(tmp_path))
+        with local_server(resources.routes) as url:
+            for path in ["/etag", "/modified", "/plain"]:
+                resources.bodies[path] = b"first"
+                response: CachedResponse = cache.get(requests.get, f"{url}{path}")
+                assert response.is_modified & (response.content == b"first")
+                # a new cache object reads the validators from disk
+                response = HTTPCache(str(tmp_path)).get(requests.get, f"{url}{path}")
+                assert (not response.is_modified) & (response.content == b"first")
+                resources.bodies[path] = b"second"
+                response = cache.get(requests.get, f"{url}{path}")
+                assert response.is_modified & (response.content == b"second")
+            # only the resource without validators is sent although it is unchanged
+            assert resources.sent == [
+                "/etag",
+                "/etag",
+                "/modified",
+                "/modified",
+                "/plain",
+                "/plain",
+                "/plain",
+            ]
+            # other query parameters are cached separately
+            assert cache.get(requests.get, f"{url}/etag", params=dict(a=1)).is_modified
+
+    def test_get_value(self, tmp_path):
+        HTTPCache(str(tmp_path)).set_value("xlsx_url", "http://host/file.xlsx")
+        assert HTTPCache(str(tmp_path)).get_value("xlsx_url") == "http://host/file.xlsx"
+        assert HTTPCache(str(tmp_path)).get_value("missing") is None
+
+    def test_pickle(self, tmp_path):
+        # a copy of a cached connector is sent to every worker of process_parallel
+        connector: OCMConnector = OCMConnector(
+            base_path=str(tmp_path), use_cache=True, **Config.OCM
+        )
+        connector.cache.set_value("xlsx_url", "http://host/file.xlsx")
+        copied_connector: OCMConnector = pickle.loads(
+            pickle.dumps(copy.copy(connector))
+        )
+        assert copied_connector.cache.get_value("xlsx_url") == "http://host/file.xlsx"
+        assert copied_connector.cache.lock is not connector.cache.lock
+        copied_connector.cache.set_value("xlsx_url", None)
+
+    def test_connector(self, tmp_path):
+        resources: CachedResources = CachedResources()
+        resources.bodies["/etag"] = json.dumps(OCM_RESPONSE).encode("utf8")
+        with local_server(resources.routes) as url:
+            connector: OCMConnector = OCMConnector(
+                url=f"{url}/etag",
+                http_method_fn=requests.get,
+                base_path=str(tmp_path),
+                use_cache=True,
+            )
+            connector.get_data(to_disk=True)
+            connector.process(to_disk=True)
+            assert connector.is_modified & (len(connector.processed_data) == 3)
+
+            # unchanged data is neither downloaded, parsed nor processed again
+            connector = OCMConnector(
+                url=f"{url}/etag",
+                http_method_fn=requests.get,
+                base_path=str(tmp_path),
+                use_cache=True,
+            )
+            connector._process_station = None
+            connector.get_data(to_disk=True)
+            connector.process(to_disk=True)
+            assert not connector.is_modified
+            assert connector.raw_data == OCM_RESPONSE
+            assert len(connector.processed_data) == 3
+            assert resources.sent == ["/etag"]
+        assert os.path.exists(
+            os.path.join(str(tmp_path), "http_cache", "OCM", "index.json")
+        )
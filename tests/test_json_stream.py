@@ -0,0 +1,56 @@
+import json
+import pytest
+from typing import Dict, List
+from charging_stations.helpers import iter_json_array, read_chunks
+
+
+class TestJsonStream:
+    response: Dict = dict(
+        version=0.6,
+        osm3s=dict(copyright="OpenStreetMap", timestamp=["2020-07-01T00:00:00Z"]),
+        elements=[
+            dict(type="node", id=i, lat=52.5 + i * 1e-3, tags={"addr:city": "Köln €"})
+            for i in range(20)
+        ]
+        + [12345, -1.25e-7, True, None, [], {}],
+        remark="done",
+    )
+
+    @staticmethod
+    def chunks(content: bytes, chunk_size: int) -> List[bytes]:
+        return [
+            content[i : i + chunk_size] for i in range(0, len(content), chunk_size)
+        ]
+
+    def test_iter_json_array(self):
+        content: bytes = json.dumps(self.response, ensure_ascii=False).encode("utf8")
+        # chunks cut numbers, strings and multi byte characters at any position
+        for chunk_size in [1, 2, 3, 7, 64, len(content)]:
+            assert (
+                list(iter_json_array(self.chunks(content, chunk_size), key="elements"))
+                == self.response["elements"]
+            )
+        content = json.dumps(self.response["elements"], indent=4).encode("utf8")
+        assert list(iter_json_array(self.chunks(content, 5))) == self.response["elements"]
+        assert list(iter_json_array([b" [ ", b"]"])) == []
+
+    def test_iter_json_array_errors(self):
+        for content, key in [
+            (b'{"elements": [1, 2}', "elements"),
+            (b'{"version": 0.6}', "elements"),
+            (b'{"elements": []}', None),
+            (b"[1, 2", None),
+            (b"", None),
+        ]:
+            with pytest.raises(ValueError):
+                list(iter_json_array(self.chunks(content, 3), key=key))
+
+    def test_read_chunks(self, tmp_path):
+        file_path: str = str(tmp_path / "response.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.response, f, ensure_ascii=False)
+        assert all(len(chunk) <= 10 for chunk in read_chunks(file_path, chunk_size=10))
+        assert (
+            list(iter_json_array(read_chunks(file_path, chunk_size=10), key="elements"))
+            == self.response["elements"]
+        )
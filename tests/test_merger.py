@@ -1,10 +1,14 @@
 import json
 import logging
 import os
+import random
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 from typing import List, Dict
 from charging_stations.connectors import Merger
+from .merger_helper import create_station
+from .station_generator import generate_stations
 
 log = logging.getLogger(os.path.basename(__file__))
 
@@ -63,10 +67,383 @@ class TestMerger:
             == 0
         )
 
+    def test__get_candidate_pairs(self):
+        merger: Merger = Merger(base_path=self.base_path)
+        # ~50m, ~130m and ~1km east of the first station plus a dense site of 45 chargers
+        merger.data_sources = [
+            create_station(0, "BNA", 10.0, 50.0),
+            create_station(1, "OCM", 10.0007, 50.0),
+            create_station(2, "OSM", 10.0018, 50.0),
+            create_station(3, "OSM", 10.014, 50.0),
+        ] + [create_station(4 + i, "BNA", 11.0 + i * 1e-5, 50.0) for i in range(45)]
+        merger.stations_gdf = merger._prepare_geodataframe()
+        left, right, distance = merger._get_candidate_pairs(max_distance=100)
+        numbers: Dict[bytes, int] = {
+            s["id"]: i for i, s in enumerate(merger.data_sources)
+        }
+        station_numbers: pd.Series = merger.stations_gdf["id"].map(numbers).values
+        actual_pairs = {
+            tuple(sorted(p))
+            for p in zip(station_numbers[left], station_numbers[right])
+        }
+        assert (0, 1) in actual_pairs
+        assert (1, 2) in actual_pairs
+        assert (0, 2) not in actual_pairs
+        assert all(3 not in p for p in actual_pairs)
+        assert len(actual_pairs) == 2 + 45 * 44 // 2
+        assert (distance < 100).all() & (distance >= 0).all()
+
+    def test_merge_cluster(self):
+        stations_list: List[Dict] = [
+            create_station(0, "OSM", 10.0, 50.0, operator="enbw"),
+            create_station(1, "OCM", 10.0001, 50.0, operator="EnBW AG"),
+            create_station(2, "BNA", 10.0, 50.0001, operator="EnBW"),
+            create_station(3, "OSM", 10.01, 50.0, operator="Ionity"),
+            create_station(4, "OSM", 11.0, 50.0, operator="Ionity"),
+            create_station(5, "OCM", 11.0, 50.00001, operator="Ionity GmbH"),
+        ]
+        merger: Merger = Merger(base_path=self.base_path)
+        merger.merge(stations_list=stations_list, method="cluster")
+        merged_ids = set(merger.merged_stations_gdf["id"])
+        assert merged_ids == {stations_list[i]["id"] for i in [2, 3, 5]}
+        # representatives keep their own attributes
+        assert not merger.merged_stations_gdf["merged_attributes"].any()
+
+        reversed_merger: Merger = Merger(base_path=self.base_path)
+        reversed_merger.merge(stations_list=stations_list[::-1], method="cluster")
+        assert reversed_merger.merged_stations_gdf.equals(merger.merged_stations_gdf)
+
+    def test_merge_parallel(self):
+        random.seed(42)
+        stations_list: List[Dict] = []
+        for i in range(300):
+            longitude, latitude = 6 + random.random(), 50 + random.random()
+            stations_list += [
+                create_station(i, "BNA", longitude, latitude, operator="EnBW")
+            ]
+            stations_list += [
+                create_station(
+                    i,
+                    random.choice(["OCM", "OSM"]),
+                    longitude + random.gauss(0, 3e-4),
+                    latitude + random.gauss(0, 3e-4),
+                    operator=random.choice(["EnBW", "enbw ag", "Ionity"]),
+                )
+            ]
+        merger: Merger = Merger(base_path=self.base_path)
+        merger.merge(stations_list=stations_list, method="cluster")
+        parallel_merger: Merger = Merger(base_path=self.base_path)
+        parallel_merger.merge(stations_list=stations_list, method="cluster", n_jobs=2)
+        assert parallel_merger.stations_gdf.equals(merger.stations_gdf)
+
+    def test_merge_incremental(self):
+        random.seed(7)
+        stations_list: List[Dict] = []
+        for i in range(200):
+            longitude, latitude = 6 + random.random() * 0.2, 50 + random.random() * 0.2
+            stations_list += [create_station(i, "BNA", longitude, latitude)]
+            stations_list += [
+                create_station(
+                    i,
+                    "OSM",
+                    longitude + random.gauss(0, 2e-4),
+                    latitude + random.gauss(0, 2e-4),
+                    operator=random.choice(["EnBW", "Ionity"]),
+                )
+            ]
+        merger: Merger = Merger(base_path=self.base_path)
+        merger.merge(stations_list=stations_list, method="cluster")
+        previous_clusters: pd.DataFrame = merger.stations_gdf[["id", "cluster_id"]]
+
+        current_stations_list: List[Dict] = [dict(s) for s in stations_list[20:]]
+        changed_ids: List[bytes] = []
+        for station in current_stations_list[:20]:
+            station["operator"] = "Tesla"
+            changed_ids += [station["id"]]
+        current_stations_list += [
+            create_station(1000 + i, "OCM", 6 + i * 0.01, 50.1) for i in range(20)
+        ]
+        incremental_merger: Merger = Merger(base_path=self.base_path)
+        incremental_merger.merge_incremental(
+            stations_list=current_stations_list,
+            previous_clusters=previous_clusters,
+            changed_ids=changed_ids,
+        )
+        full_merger: Merger = Merger(base_path=self.base_path)
+        full_merger.merge(stations_list=current_stations_list, method="cluster")
+
+        actual: pd.DataFrame = incremental_merger.stations_gdf
+        expected: pd.DataFrame = full_merger.stations_gdf
+        assert list(actual["id"]) == list(expected["id"])
+        assert list(actual["is_duplicate"]) == list(expected["is_duplicate"])
+        assert actual.groupby("cluster_id")["id"].apply(frozenset).pipe(set) == (
+            expected.groupby("cluster_id")["id"].apply(frozenset).pipe(set)
+        )
+        previous_cluster_ids: Dict[bytes, bytes] = dict(
+            zip(previous_clusters["id"], previous_clusters["cluster_id"])
+        )
+        unchanged: pd.DataFrame = actual.loc[~actual["id"].isin(changed_ids)]
+        kept: pd.Series = unchanged["id"].map(previous_cluster_ids) == unchanged[
+            "cluster_id"
+        ]
+        assert kept.mean() > 0.9
+
+    def test__match_keys(self):
+        from charging_stations.connectors._matching import _sequence_ratio
+
+        merger: Merger = Merger(base_path=self.base_path)
+        merger.data_sources = [
+            create_station(0, "BNA", 10.0, 50.0, operator="EnBW  AG"),
+            create_station(1, "OCM", 10.0, 50.0, operator="enbw ag", street=None),
+            create_station(2, "OSM", 10.0, 50.0, operator="EnBW"),
+            create_station(3, "OSM", 10.0, 50.0, operator="ENBW"),
+        ]
+        merger.stations_gdf = merger._prepare_geodataframe()
+        assert merger.stations_gdf["operator_key"].dtype.name == "category"
+        assert list(merger.stations_gdf["operator_key"].cat.categories) == [
+            "enbw",
+            "enbw ag",
+        ]
+        assert merger.stations_gdf["address_key"].iloc[1] == "10115 berlin"
+        _sequence_ratio.cache_clear()
+        left, right = [0, 0, 2, 1, 0], [1, 2, 3, 3, 3]
+        operator_match = merger._match_keys("operator_key", left, right)
+        assert list(operator_match[[0, 2]]) == [1.0, 1.0]
+        assert operator_match[1] == operator_match[3] == operator_match[4] < 1.0
+        assert _sequence_ratio.cache_info().misses == 1
+
+    def test__score_candidate_pairs_blocking(self):
+        from charging_stations.connectors._matching import key_similarity
+
+        merger: Merger = Merger(base_path=self.base_path)
+        streets: List[str] = ["Hauptstraße 1", "Hauptstr. 1", "Bahnhofstraße 12", None]
+        towns: List[str] = ["Berlin", "Potsdam"]
+        merger.data_sources = [
+            create_station(
+                i,
+                "OCM",
+                10.0 + i * 1e-4,
+                50.0,
+                street=streets[i % 4],
+                postcode=["10115", "14467", None][i % 3],
+                town=towns[i % 2],
+            )
+            for i in range(24)
+        ]
+        merger.stations_gdf = merger._prepare_geodataframe()
+        assert merger.stations_gdf["block_key"].iloc[0] == "10115 berlin"
+        assert all(
+            address_key.endswith(block_key)
+            for address_key, block_key in merger.stations_gdf[
+                ["address_key", "block_key"]
+            ].dropna().values
+        )
+        left, right, distance = merger._get_candidate_pairs(max_distance=100)
+        exact_scores: np.ndarray = (
+            0.2 * merger._match_keys("operator_key", left, right)
+            + 0.1
+            * np.array(
+                [
+                    key_similarity(
+                        merger.stations_gdf["address_key"].iloc[i],
+                        merger.stations_gdf["address_key"].iloc[j],
+                    )
+                    for i, j in zip(left, right)
+                ]
+            )
+            + 0.7 * (1 - distance / 100)
+        )
+        for score_threshold in [0.3, 0.49, 0.6, 0.75, 0.9]:
+            scores: np.ndarray = merger._score_candidate_pairs(
+                left, right, distance, score_threshold=score_threshold
+            )
+            # skipped address comparisons never change a decision
+            assert np.array_equal(
+                scores > score_threshold, exact_scores > score_threshold
+            )
+            assert (scores <= exact_scores + 1e-12).all()
+
+    def test__prepare_geodataframe_compact(self):
+        merger: Merger = Merger(base_path=self.base_path)
+        merger.data_sources = [
+            create_station(0, "BNA", 10.0, 50.0, socket_type_list=["Typ2", "CCS"]),
+            create_station(1, "OCM", 10.5, 50.5, socket_type_list=[]),
+            create_station(2, "OSM", 11.0, 51.0),
+        ]
+        merger.data_sources[2]["charging"]["socket_type_list"] = None
+        merger.stations_gdf = merger._prepare_geodataframe()
+        assert merger.stations_gdf.shape[0] == 2
+        assert "raw_data" not in merger.stations_gdf.columns
+        for column in ["data_source", "operator", "state", "country"]:
+            assert merger.stations_gdf[column].dtype.name == "category"
+        assert merger.stations_gdf["lon"].dtype.name == "float32"
+        assert merger.stations_gdf["lat"].iloc[1] == np.float32(50.5)
+
+        merged_stations = merger._materialize(merger.stations_gdf)
+        assert "source_row" not in merged_stations.columns
+        assert merged_stations["socket_type_list"].tolist() == [["Typ2", "CCS"], []]
+        assert merged_stations["kw_list"].tolist() == [[22.0, 22.0], [22.0, 22.0]]
+        assert merger.get_raw_data([merger.data_sources[1]["id"], b"unknown"]) == [
+            "{}",
+            None,
+        ]
+
+    def test_get_raw_data(self, tmp_path):
+        merger: Merger = Merger(base_path=str(tmp_path))
+        merger.data_sources = [
+            create_station(i, "OCM", 10.0 + i, 50.0 + i) for i in range(3)
+        ]
+        # a later station with the same id is dropped, e.g. another BNA row of the same site
+        merger.data_sources += [dict(merger.data_sources[0], raw_data='{"ID": 3}')]
+        raw_data_hashes: List[str] = merger.raw_store.put(['{"ID": 1}', '{"ID": 2}'])
+        for station, raw_data_hash in zip(merger.data_sources[1:], raw_data_hashes):
+            del station["raw_data"]
+            station["raw_data_hash"] = raw_data_hash
+        merger.stations_gdf = merger._prepare_geodataframe()
+        assert "raw_data_hash" not in merger.stations_gdf.columns
+        # the first station was processed before the raw store was introduced
+        assert merger.get_raw_data(
+            [station["id"] for station in merger.data_sources[2::-1]] + [b"unknown"]
+        ) == ['{"ID": 2}', '{"ID": 1}', "{}", None]
+
+    def test__get_coordinates(self):
+        merger: Merger = Merger(base_path=self.base_path)
+        merger.data_sources = [
+            create_station(i, "OCM", 10.0 + i, 50.0 + i) for i in range(4)
+        ]
+        # stations processed before lon & lat were added only have wkt coordinates
+        for station in merger.data_sources[1:]:
+            del station["lon"], station["lat"]
+        merger.data_sources[2]["coordinates"] = "POINT (12.5 52.25)"
+        merger.data_sources[3]["coordinates"] = "not a point"
+        merger.stations_gdf = merger._prepare_geodataframe()
+        assert merger.stations_gdf.shape[0] == 3
+        assert list(merger.stations_gdf.geometry.x) == [10.0, 11.0, 12.5]
+        assert list(merger.stations_gdf.geometry.y) == [50.0, 51.0, 52.25]
+        assert "coordinates" not in merger.stations_gdf.columns
+
     def test__determine_duplicates(self):
-        # TODO
-        assert False
+        merger: Merger = Merger(base_path=self.base_path)
+        # ~15m, ~20m with another operator, ~85m and ~145m away from the first station
+        merger.data_sources = [
+            create_station(0, "BNA", 10.0, 50.0, operator="EnBW"),
+            create_station(1, "OCM", 10.0002, 50.0, operator="EnBW AG"),
+            create_station(2, "OSM", 10.0, 50.0002, operator="Ionity", street=None),
+            create_station(3, "OSM", 10.0012, 50.0, operator="EnBW"),
+            create_station(4, "OCM", 10.002, 50.0, operator="EnBW"),
+        ]
+        merger.stations_gdf = merger._prepare_geodataframe()
+        merger._index_candidate_pairs(*merger._get_candidate_pairs(max_distance=100))
+        current_station: pd.Series = merger.stations_gdf.iloc[0]
+        duplicate_candidates: pd.DataFrame = merger._get_duplicate_candidates(
+            current_station=current_station, max_distance=100
+        )
+        assert set(duplicate_candidates["id"]) == {
+            merger.data_sources[i]["id"] for i in [1, 2, 3]
+        }
+        duplicates: pd.DataFrame = merger._determine_duplicates(
+            current_station=current_station,
+            duplicate_candidates=duplicate_candidates,
+            score_threshold=0.49,
+            max_distance=100,
+        )
+        # a different operator is still a duplicate if close enough, the distance dominates the score
+        assert set(duplicates["id"]) == {
+            merger.data_sources[i]["id"] for i in [1, 2]
+        }
+        assert (duplicates["matching_score"] > 0.49).all()
+        assert duplicates["is_duplicate"].all()
 
     def test_merge(self):
-        # TODO
-        assert False
+        stations_list, site_numbers = generate_stations(3000, seed=1)
+        no_sites: int = len(set(site_numbers.values()))
+        sites_with_bna: set = {
+            site_numbers[s["id"]] for s in stations_list if s["data_source"] == "BNA"
+        }
+        for method in ["greedy", "cluster"]:
+            merger: Merger = Merger(base_path=self.base_path)
+            merger.merge(stations_list=stations_list, method=method)
+            merged_stations: gpd.GeoDataFrame = merger.merged_stations_gdf
+            merged_sites: pd.Series = merged_stations["id"].map(site_numbers)
+            # every site keeps at least one station and hardly any site keeps more than one
+            assert merged_sites.nunique() == no_sites
+            assert merged_stations.shape[0] <= no_sites * 1.01
+            # BNA stations are preferred
+            assert (
+                (merged_stations["data_source"] != "BNA")
+                & merged_sites.isin(sites_with_bna)
+            ).sum() <= no_sites * 0.01
+
+    def test_run_stats(self):
+        stations_list: List[Dict] = [
+            create_station(0, "BNA", 10.0, 50.0, operator="EnBW"),
+            create_station(1, "OCM", 10.0001, 50.0, operator="EnBW AG"),
+            create_station(2, "OSM", 10.0, 50.0001, operator="enbw"),
+            create_station(3, "OSM", 11.0, 50.0, operator=None),
+            create_station(4, "OSM", 12.0, 50.0),
+            create_station(5, "OCM", 13.0, 50.0),
+        ]
+        stations_list[4]["charging"]["socket_type_list"] = None
+        stations_list[5]["lon"], stations_list[5]["coordinates"] = None, "POINT()"
+        emitted_stats: List[Dict] = []
+
+        def failing_hook(stats: Dict):
+            raise RuntimeError("Metrics system not available!")
+
+        for method in ["greedy", "cluster"]:
+            merger: Merger = Merger(
+                base_path=self.base_path,
+                run_stats_hooks=[failing_hook, emitted_stats.append],
+            )
+            merger.merge(stations_list=stations_list, method=method)
+            stats: Dict = emitted_stats[-1]
+            assert stats == merger.run_stats.to_dict()
+            assert stats["dropped_rows"] == dict(
+                invalid_coordinates=1,
+                duplicate_id=0,
+                missing_operator=1,
+                missing_socket_types=1,
+            )
+            assert stats["duplicates_per_source_pair"] == {"BNA-OCM": 1, "BNA-OSM": 1}
+            assert stats["counters"]["candidate_pairs"] == 3
+            # only "enbw" vs "enbw ag" needs a SequenceMatcher, all other keys are equal
+            assert stats["counters"]["sequence_matcher_calls"] == 1
+            for stage in ["load_data", "prepare_geodataframe", "candidate_search"]:
+                assert stats["stages"][stage]["calls"] == 1
+                assert stats["stages"][stage]["wall_time"] >= 0
+                assert stats["stages"][stage]["cpu_time"] >= 0
+        assert len(emitted_stats) == 2
+
+    def test__apply_merge_decisions(self):
+        merger: Merger = Merger(base_path=self.base_path)
+        merger.data_sources = [
+            create_station(0, "OSM", 10.0, 50.0, operator="enbw"),
+            create_station(1, "BNA", 10.0001, 50.0, operator="EnBW"),
+            create_station(2, "OCM", 10.0, 50.0001, operator="EnBW AG"),
+            create_station(3, "OSM", 11.0, 50.0, operator="Ionity"),
+        ]
+        merger.stations_gdf = merger._prepare_geodataframe()
+        merger._index_candidate_pairs(*merger._get_candidate_pairs(max_distance=100))
+        current_station: pd.Series = merger.stations_gdf.iloc[0]
+        duplicates: pd.DataFrame = merger._determine_duplicates(
+            current_station,
+            merger._get_duplicate_candidates(current_station, max_distance=100),
+        )
+        merger.representative_positions[
+            merger.stations_gdf.index.get_indexer(duplicates.index)
+        ] = 0
+        merger._merge_duplicates(current_station, duplicates)
+        # nothing is written to the frame before all decisions are applied
+        assert not merger.stations_gdf["is_duplicate"].any()
+        assert list(merger.attribute_positions) == [1, 1, 2, 3]
+
+        merger._apply_merge_decisions()
+        assert list(merger.stations_gdf["is_duplicate"]) == [False, True, True, False]
+        assert list(merger.stations_gdf["merged_attributes"]) == [
+            True,
+            False,
+            False,
+            False,
+        ]
+        assert merger.stations_gdf["id"].iloc[0] == merger.data_sources[1]["id"]
+        assert merger.stations_gdf["data_source"].iloc[0] == "BNA"
@@ -1,13 +1,99 @@
+import json
 import logging
 import os
+import re
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler
 from numbers import Number
-from typing import Dict, List
+from typing import Dict, List, Set, Tuple
+from urllib.parse import parse_qs, urlparse
 from charging_stations.connectors import Config, Connector, OCMConnector
-from .connector_helper import connector_process, connector_load
+from charging_stations.helpers import BBox
+from .connector_helper import (
+    connector_load,
+    connector_process,
+    connector_process_parallel,
+    json_response,
+    local_server,
+)
 
 log = logging.getLogger(os.path.basename(__file__))
 
 
+class TileApi(object):
+    """
+    Serves the stations inside of the requested bounding box like the OCM api. Requests are counted in requests and
+    fail while failing is set.
+    """
+
+    def __init__(self, stations: List[Dict]):
+        self.stations: List[Dict] = stations
+        self.requests: List[str] = []
+        self.failing: bool = False
+
+    def route(self, request: BaseHTTPRequestHandler) -> Tuple[int, bytes, Dict]:
+        query: Dict[str, List[str]] = parse_qs(urlparse(request.path).query)
+        self.requests.append(query["boundingbox"][0])
+        if self.failing & (len(self.requests) > 3):
+            return 500, b"", {}
+        max_lat, min_lon, min_lat, max_lon = [
+            float(n) for n in re.findall(r"[-\d.]+", query["boundingbox"][0])
+        ]
+        return json_response(
+            [
+                station
+                for station in self.stations
+                if (min_lon <= station["AddressInfo"]["Longitude"] <= max_lon)
+                & (min_lat <= station["AddressInfo"]["Latitude"] <= max_lat)
+            ][: int(query["maxresults"][0])]
+        )
+
+
+class SyncApi(object):
+    """
+    Serves all stations, or only those updated since the requested modifiedsince, like the OCM api.
+    """
+
+    def __init__(self, stations: List[Dict]):
+        self.stations: List[Dict] = stations
+        self.requests: List[Dict[str, List[str]]] = []
+
+    def route(self, request: BaseHTTPRequestHandler) -> Tuple[int, bytes, Dict]:
+        query: Dict[str, List[str]] = parse_qs(urlparse(request.path).query)
+        self.requests.append(query)
+        modified_since: str = query.get("modifiedsince", [""])[0]
+        return json_response(
+            [
+                station
+                for station in self.stations
+                if station["DateLastStatusUpdate"][:19] >= modified_since
+            ]
+        )
+
+
+def sync_station(ocm_id: int, town: str, date: str) -> Dict:
+    return dict(
+        ID=ocm_id,
+        AddressInfo=dict(
+            ID=ocm_id,
+            Latitude=52.5 + ocm_id * 1e-3,
+            Longitude=13.4,
+            Postcode="10115",
+            Town=town,
+            StateOrProvince="Berlin",
+            Country=dict(ISOCode="DE"),
+        ),
+        Connections=[dict(CurrentType=dict(Title="AC"), PowerKW=22.0)],
+        NumberOfPoints=1,
+        UsageType=None,
+        OperatorInfo=dict(Title="Stromnetz Berlin"),
+        UsageCost=None,
+        DateLastStatusUpdate=date,
+        DateLastVerified=None,
+    )
+
+
 class TestConnectorOCM:
     base_path: str = os.path.realpath(
         os.path.join(os.path.dirname(__file__), "../data")
@@ -37,3 +123,243 @@ class TestConnectorOCM:
 
     def test_load(self):
         connector_load(connector=self.connector)
+
+    def test_stream_data(self, tmp_path):
+        stations_raw: List[Dict] = [
+            dict(
+                AddressInfo=dict(
+                    ID=i,
+                    Latitude=52.5 + i * 1e-3,
+                    Longitude=13.4,
+                    Postcode="10115",
+                    Town="Berlin",
+                    StateOrProvince="Berlin",
+                    Country=dict(ISOCode="DE"),
+                ),
+                Connections=[
+                    dict(CurrentType=dict(Title="AC (Three-Phase)"), PowerKW=22.0)
+                ],
+                NumberOfPoints=1,
+                UsageType=None,
+                OperatorInfo=dict(Title="Stromnetz Berlin"),
+                UsageCost="0,39 €/kWh",
+            )
+            for i in range(5)
+        ]
+        file_path: str = str(tmp_path / "response.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(stations_raw, f, ensure_ascii=False)
+        connector: OCMConnector = OCMConnector(base_path=str(tmp_path), **Config.OCM)
+        connector.process(
+            stations_raw=connector.stream_data(file_path=file_path, chunk_size=16)
+        )
+        assert len(connector.processed_data) == 5
+        connector.raw_data = stations_raw
+        streamed_stations: List[Dict] = connector.processed_data
+        connector.processed_data = []
+        connector.process()
+        assert connector.processed_data == streamed_stations
+
+    def test_process_parallel(self, tmp_path):
+        stations_raw: List[Dict] = [
+            dict(
+                AddressInfo=dict(
+                    ID=i,
+                    Latitude=52.5 + i * 1e-3,
+                    Longitude=13.4,
+                    # a numeric postcode fails the address conversion
+                    Postcode="10115" if i % 10 else 10115,
+                    Town="Berlin",
+                    StateOrProvince="Berlin",
+                    Country=dict(ISOCode="DE"),
+                ),
+                Connections=[
+                    dict(CurrentType=dict(Title="DC"), PowerKW=50.0, Quantity=i % 3)
+                ],
+                NumberOfPoints=i % 3,
+                UsageType=dict(IsMembershipRequired=bool(i % 2)),
+                OperatorInfo=dict(Title=f"Operator {i % 7}"),
+                UsageCost=None,
+            )
+            for i in range(100)
+        ]
+        connector: OCMConnector = OCMConnector(base_path=str(tmp_path), **Config.OCM)
+        connector_process_parallel(connector, stations_raw)
+        assert len(connector.processed_data) == 90
+        assert connector.errors == dict(address=10)
+
+    def test_get_data_tiled(self, tmp_path):
+        # 20 stations in the south-west tile, which has to be split, and one on the border of all four tiles
+        api: TileApi = TileApi(
+            [
+                dict(
+                    ID=i,
+                    AddressInfo=dict(ID=i, Longitude=6.0 + i * 0.01, Latitude=48.0),
+                )
+                for i in range(20)
+            ]
+            + [dict(ID=20, AddressInfo=dict(ID=20, Longitude=10.0, Latitude=50.0))]
+        )
+        api.failing = True
+        bbox: BBox = BBox(min_lon=6.0, min_lat=48.0, max_lon=14.0, max_lat=52.0)
+        with local_server({"/poi": api.route}) as url:
+            connector: OCMConnector = OCMConnector(
+                url=f"{url}/poi",
+                http_method_fn=requests.get,
+                base_path=str(tmp_path),
+                query_params=dict(countrycode="DE"),
+            )
+            with pytest.raises(RuntimeError):
+                connector.get_data_tiled(
+                    bbox, rows=2, columns=2, max_workers=1, max_results=15
+                )
+            completed_tiles: Set[str] = set(api.requests[:3])
+            assert len(os.listdir(str(tmp_path / "OCM__tiles"))) == 3
+
+            # resumes without requesting the completed tiles again
+            api.requests, api.failing = [], False
+            connector.get_data_tiled(
+                bbox, rows=2, columns=2, max_workers=2, max_results=15, to_disk=True
+            )
+        assert not completed_tiles & set(api.requests)
+        assert [station["ID"] for station in connector.raw_data] == list(range(21))
+        assert not os.path.exists(str(tmp_path / "OCM__tiles"))
+        assert os.path.exists(str(tmp_path / "OCM__raw.json"))
+
+    def test_sync(self, tmp_path):
+        api: SyncApi = SyncApi(
+            [sync_station(i, "Berlin", f"2023-01-0{i + 1}T10:00:00Z") for i in range(4)]
+        )
+        with local_server({"/poi": api.route}) as url:
+            config: Dict = dict(
+                url=f"{url}/poi",
+                http_method_fn=requests.get,
+                base_path=str(tmp_path),
+                query_params=dict(countrycode="DE"),
+            )
+            OCMConnector(**config).sync()
+            # station 1 is updated, station 2 fails to process now and station 4 is new
+            api.stations[1] = sync_station(1, "Potsdam", "2023-02-01T10:00:00Z")
+            api.stations[2] = sync_station(2, "", "2023-02-01T10:00:00Z")
+            api.stations[2]["AddressInfo"]["Postcode"] = 10115
+            api.stations += [sync_station(4, "Berlin", "2023-02-02T10:00:00Z")]
+            connector: OCMConnector = OCMConnector(**config)
+            processed_ids: List[int] = []
+            process_station = connector._process_station
+            connector._process_station = lambda station_raw: (
+                processed_ids.append(station_raw["ID"]) or process_station(station_raw)
+            )
+            connector.sync()
+        assert "modifiedsince" not in api.requests[0]
+        assert api.requests[1]["modifiedsince"] == ["2023-01-04T10:00:00"]
+        # station 3 is sent again, since it was updated at the high-water mark
+        assert processed_ids == [1, 2, 3, 4]
+        assert connector.raw_data == api.stations
+
+        full_connector: OCMConnector = OCMConnector(**config)
+        full_connector.raw_data = api.stations
+        full_connector.process()
+        assert connector.processed_data == full_connector.processed_data
+        assert [station["address"]["town"] for station in connector.processed_data] == [
+            "Berlin",
+            "Potsdam",
+            "Berlin",
+            "Berlin",
+        ]
+        connector.load(is_processed=True)
+        assert connector.processed_data == full_connector.processed_data
+
+    def test_get_data_compact(self, tmp_path):
+        operators: List[Dict] = [
+            dict(ID=i, Title=f"Operator {i}", WebsiteURL=None) for i in range(3)
+        ]
+        usage_types: List[Dict] = [
+            dict(ID=1, Title="Public", IsMembershipRequired=False),
+            dict(ID=4, Title="Public - Membership Required", IsMembershipRequired=True),
+        ]
+        current_types: List[Dict] = [
+            dict(ID=10, Title="AC (Single-Phase)"),
+            dict(ID=30, Title="DC"),
+        ]
+        verbose_stations: List[Dict] = []
+        compact_stations: List[Dict] = []
+        for i in range(10):
+            station: Dict = sync_station(i, "Berlin", "2023-01-01T10:00:00Z")
+            station.update(
+                OperatorID=i % 3,
+                OperatorInfo=operators[i % 3],
+                UsageTypeID=usage_types[i % 2]["ID"] if i % 5 else None,
+                UsageType=usage_types[i % 2] if i % 5 else None,
+            )
+            station["AddressInfo"]["Country"] = dict(
+                ID=87, ISOCode="DE", Title="Germany"
+            )
+            station["AddressInfo"]["CountryID"] = 87
+            station["Connections"] = [
+                dict(
+                    CurrentTypeID=current_type["ID"],
+                    CurrentType=current_type,
+                    PowerKW=22.0,
+                )
+                for current_type in current_types[: 1 + i % 2]
+            ]
+            verbose_stations += [station]
+            compact_station: Dict = json.loads(json.dumps(station))
+            for item in [compact_station, compact_station["AddressInfo"]] + (
+                compact_station["Connections"]
+            ):
+                for key in ["OperatorInfo", "UsageType", "Country", "CurrentType"]:
+                    item.pop(key, None)
+            compact_stations += [compact_station]
+        reference_data: Dict[str, List[Dict]] = dict(
+            Operators=operators,
+            UsageTypes=usage_types,
+            Countries=[dict(ID=87, ISOCode="DE", Title="Germany")],
+            CurrentTypes=current_types,
+            ConnectionTypes=[],
+        )
+        with local_server(
+            {
+                "/poi": lambda request: json_response(compact_stations),
+                "/referencedata": lambda request: json_response(reference_data),
+            }
+        ) as url:
+            connector: OCMConnector = OCMConnector(
+                url=f"{url}/poi",
+                http_method_fn=requests.get,
+                base_path=str(tmp_path),
+                query_params=dict(countrycode="DE", compact=True),
+                reference_data_url=f"{url}/referencedata",
+            )
+            connector.get_data(to_disk=True)
+        assert connector.raw_data == compact_stations
+        verbose_connector: OCMConnector = OCMConnector(
+            base_path=str(tmp_path / "verbose"), **Config.OCM
+        )
+        verbose_connector.raw_data = verbose_stations
+        verbose_connector.process()
+
+        # the reference tables are read from the reference data file
+        for compact_connector in [
+            connector,
+            OCMConnector(base_path=str(tmp_path), **Config.OCM),
+        ]:
+            compact_connector.load(is_processed=False)
+            compact_connector.process()
+            assert [
+                {k: v for k, v in station.items() if k != "raw_data_hash"}
+                for station in compact_connector.processed_data
+            ] == [
+                {k: v for k, v in station.items() if k != "raw_data_hash"}
+                for station in verbose_connector.processed_data
+            ]
+        assert connector.processed_data[1]["operator"] == "Operator 1"
+        assert connector.processed_data[1]["charging"]["dc_support"]
+
+        # compact stations are not skipped one by one without the reference data file
+        connector = OCMConnector(base_path=str(tmp_path / "missing"), **Config.OCM)
+        connector.raw_data = compact_stations
+        with pytest.raises(RuntimeError):
+            connector.process()
+        with pytest.raises(RuntimeError):
+            connector.process(n_jobs=2)
@@ -1,8 +1,99 @@
+import bz2
+import json
 import os
+import re
+import time
+import requests
+from http.server import BaseHTTPRequestHandler
 from numbers import Number
-from typing import List, Dict
+from typing import List, Dict, Tuple
+from urllib.parse import parse_qs, urlparse
 from charging_stations.connectors import Config, Connector, OSMConnector
-from .connector_helper import connector_process
+from charging_stations.connectors._osm_extract import iter_osm_extract
+from charging_stations.helpers import BBox
+from .connector_helper import (
+    connector_process,
+    connector_process_parallel,
+    json_response,
+    local_server,
+)
+
+# two charging station nodes, one charging station way around node 3 to 6 and a relation with node 1 and a way
+OSM_EXTRACT: str = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6" generator="test">
+  <bounds minlat="50.9" minlon="6.9" maxlat="51.0" maxlon="7.0"/>
+  <node id="1" lat="50.9400" lon="6.9500">
+    <tag k="amenity" v="charging_station"/>
+    <tag k="operator" v="RheinEnergie"/>
+    <tag k="addr:city" v="Köln"/>
+    <tag k="addr:postcode" v="50667"/>
+    <tag k="capacity" v="2"/>
+    <tag k="socket:type2" v="2"/>
+  </node>
+  <node id="2" lat="50.9500" lon="6.9600">
+    <tag k="amenity" v="parking"/>
+  </node>
+  <node id="3" lat="50.9600" lon="6.9700"/>
+  <node id="4" lat="50.9600" lon="6.9800"/>
+  <node id="5" lat="50.9700" lon="6.9800"/>
+  <node id="6" lat="50.9700" lon="6.9700"/>
+  <node id="7" lat="50.9800" lon="6.9900">
+    <tag k="amenity" v="charging_station"/>
+    <tag k="voltage" v="230;400"/>
+  </node>
+  <way id="10">
+    <nd ref="3"/>
+    <nd ref="4"/>
+    <nd ref="5"/>
+    <nd ref="6"/>
+    <nd ref="3"/>
+    <tag k="amenity" v="charging_station"/>
+    <tag k="operator" v="Tank &amp; Rast"/>
+  </way>
+  <way id="11">
+    <nd ref="2"/>
+    <nd ref="3"/>
+    <tag k="highway" v="service"/>
+  </way>
+  <relation id="20">
+    <member type="node" ref="1" role="charging"/>
+    <member type="way" ref="11" role="access"/>
+    <tag k="amenity" v="charging_station"/>
+  </relation>
+</osm>
+"""
+
+
+class OverpassApi(object):
+    """
+    Answers overpass queries of a bounding box with the elements inside of it. The first query of every bounding box
+    is rejected, the second one times out on the server and the third one on the client.
+    """
+
+    def __init__(self, elements: List[Dict]):
+        self.elements: List[Dict] = elements
+        self.attempts: Dict[str, int] = {}
+
+    def route(self, request: BaseHTTPRequestHandler) -> Tuple[int, bytes, Dict]:
+        query: str = parse_qs(urlparse(request.path).query)["data"][0]
+        bbox: str = re.search(r"\(([-\d.,]+)\)", query).group(1)
+        self.attempts[bbox] = self.attempts.get(bbox, 0) + 1
+        if self.attempts[bbox] == 1:
+            return 429, b"", {}
+        south, west, north, east = [float(n) for n in bbox.split(",")]
+        response: Dict = dict(
+            version=0.6,
+            elements=[
+                element
+                for element in self.elements
+                if (west <= element["lon"] <= east) & (south <= element["lat"] <= north)
+            ],
+        )
+        if self.attempts[bbox] == 2:
+            response["remark"] = "runtime error: Query timed out in query at line 4"
+        if self.attempts[bbox] == 3:
+            time.sleep(1.5)
+        return json_response(response)
 
 
 class TestConnectorOSM:
@@ -38,3 +129,147 @@ class TestConnectorOSM:
 
     def test_process(self):
         connector_process(connector=self.connector)
+
+    def test_stream_data(self, tmp_path):
+        elements: List[Dict] = [
+            dict(
+                type="node",
+                id=i,
+                lat=52.5 + i * 1e-3,
+                lon=13.4,
+                tags={
+                    "amenity": "charging_station",
+                    "operator": "Stadtwerke Köln",
+                    "addr:city": "Köln",
+                    "addr:postcode": "50667",
+                    "socket:type2": "2",
+                    "capacity": "2",
+                },
+            )
+            for i in range(5)
+        ]
+        file_path: str = str(tmp_path / "response.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(dict(version=0.6, elements=elements), f, ensure_ascii=False)
+        connector: OSMConnector = OSMConnector(base_path=str(tmp_path), **Config.OSM)
+        connector.process(
+            stations_raw=connector.stream_data(
+                file_path=file_path, to_disk=True, chunk_size=16
+            )
+        )
+        streamed_stations: List[Dict] = connector.processed_data
+        assert len(streamed_stations) == 5
+        # the raw file written while streaming is loaded like a saved response
+        connector = OSMConnector(base_path=str(tmp_path), **Config.OSM)
+        connector.load(is_processed=False)
+        assert connector.raw_data == elements
+        connector.process()
+        assert connector.processed_data == streamed_stations
+
+    def test_process_parallel(self, tmp_path):
+        elements: List[Dict] = [
+            dict(
+                type="node",
+                id=i,
+                lat=52.5 + i * 1e-3,
+                # string coordinates without digits fail the station conversion
+                lon=13.4 if i % 10 else "unknown",
+                tags={
+                    "operator": f"Operator {i % 7}",
+                    "addr:street": "Hauptstraße",
+                    "addr:housenumber": str(i),
+                    "addr:postcode": "50667",
+                    "socket:type2": "2",
+                    "voltage": "230;400",
+                },
+            )
+            for i in range(100)
+        ]
+        connector: OSMConnector = OSMConnector(base_path=str(tmp_path), **Config.OSM)
+        connector_process_parallel(connector, elements)
+        assert len(connector.processed_data) == 90
+        assert connector.errors == dict(station=10)
+
+    def test_get_data_tiled(self, tmp_path):
+        # a node and a way share an id, the node on the center is inside of all four tiles
+        api: OverpassApi = OverpassApi(
+            [
+                dict(type="node", id=1, lat=50.0, lon=8.0),
+                dict(type="way", id=1, lat=51.0, lon=12.0),
+                dict(type="node", id=2, lat=50.0, lon=10.0),
+                dict(type="node", id=3, lat=49.0, lon=12.0),
+            ]
+        )
+        with local_server({"/api/interpreter": api.route}) as url:
+            connector: OSMConnector = OSMConnector(
+                url=f"{url}/api/interpreter",
+                http_method_fn=requests.get,
+                base_path=str(tmp_path),
+            )
+            connector.get_data_tiled(
+                BBox(min_lon=6.0, min_lat=48.0, max_lon=14.0, max_lat=52.0),
+                rows=2,
+                columns=2,
+                max_workers=4,
+                timeout=1,
+                retries=3,
+                backoff=0,
+            )
+        assert list(api.attempts.values()) == [4] * 4
+        assert [(element["type"], element["id"]) for element in connector.raw_data] == [
+            ("node", 1),
+            ("node", 2),
+            ("node", 3),
+            ("way", 1),
+        ]
+
+    def test_stream_extract(self, tmp_path):
+        file_path: str = str(tmp_path / "extract.osm")
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(OSM_EXTRACT)
+        connector: OSMConnector = OSMConnector(base_path=str(tmp_path), **Config.OSM)
+        connector.process(
+            stations_raw=connector.stream_extract(file_path=file_path, to_disk=True)
+        )
+        elements: List[Dict] = list(iter_osm_extract(file_path))
+        assert [(element["type"], element["id"]) for element in elements] == [
+            ("node", 1),
+            ("node", 7),
+            ("way", 10),
+            ("relation", 20),
+        ]
+        assert elements[0] == dict(
+            type="node",
+            id=1,
+            lat=50.94,
+            lon=6.95,
+            tags={
+                "amenity": "charging_station",
+                "operator": "RheinEnergie",
+                "addr:city": "Köln",
+                "addr:postcode": "50667",
+                "capacity": "2",
+                "socket:type2": "2",
+            },
+        )
+        assert elements[2]["nodes"] == [3, 4, 5, 6, 3]
+        assert abs(elements[2]["lat"] - 50.964) < 1e-9
+        assert abs(elements[2]["lon"] - 6.974) < 1e-9
+        assert elements[3]["members"][1] == dict(type="way", ref=11, role="access")
+        assert (elements[3]["lat"], elements[3]["lon"]) == (50.94, 6.95)
+
+        assert [station["operator"] for station in connector.processed_data] == [
+            "RheinEnergie",
+            None,
+            "Tank & Rast",
+            None,
+        ]
+        assert connector.processed_data[0]["address"]["postcode"] == "50667"
+        assert connector.processed_data[1]["charging"]["volt_list"] == [230.0, 400.0]
+        connector.load(is_processed=False)
+        assert connector.raw_data == elements
+
+        # compressed extracts are read the same way
+        with bz2.open(str(tmp_path / "extract.osm.bz2"), "wt", encoding="utf-8") as f:
+            f.write(OSM_EXTRACT)
+        assert list(iter_osm_extract(str(tmp_path / "extract.osm.bz2"))) == elements
@@ -0,0 +1,95 @@
+import os
+import requests
+from typing import Dict, List
+from charging_stations.connectors import Config, Connector, Pipeline
+from .connector_helper import Route, json_response, local_server
+from .merger_helper import create_station
+
+OCM_RESPONSE: List[Dict] = [
+    dict(
+        AddressInfo=dict(
+            ID=i,
+            Latitude=52.5 + i * 1e-2,
+            Longitude=13.4,
+            Postcode="10115",
+            Town="Berlin",
+            StateOrProvince="Berlin",
+            Country=dict(ISOCode="DE"),
+        ),
+        Connections=[dict(CurrentType=dict(Title="AC"), PowerKW=22.0)],
+        NumberOfPoints=1,
+        UsageType=None,
+        OperatorInfo=dict(Title="Stromnetz Berlin"),
+        UsageCost=None,
+    )
+    for i in range(3)
+]
+OSM_RESPONSE: Dict = dict(
+    version=0.6,
+    elements=[
+        dict(
+            type="node",
+            id=100 + i,
+            lat=50.9 + i * 1e-2,
+            lon=6.9,
+            tags={"operator": "RheinEnergie", "socket:type2": "2"},
+        )
+        for i in range(2)
+    ],
+)
+
+
+SOURCE_ROUTES: Dict[str, Route] = {
+    "/ocm": lambda request: json_response(OCM_RESPONSE),
+    "/osm": lambda request: json_response(OSM_RESPONSE),
+    "/bna": lambda request: (503, b"", {}),
+}
+
+
+def connector_configs(url: str) -> Dict[str, Dict]:
+    return {
+        data_source: dict(
+            url=f"{url}/{data_source.lower()}",
+            http_method_fn=requests.get,
+            query_params=None,
+        )
+        for data_source in Config.CONNECTOR_CONFIGS
+    }
+
+
+class TestPipeline:
+    def test_run(self, tmp_path):
+        # last good processed file of BNA, which is unavailable
+        Connector._save(
+            os.path.join(str(tmp_path), "BNA__processed.json"),
+            [create_station(0, "BNA", 8.4, 49.0)],
+        )
+        with local_server(SOURCE_ROUTES) as url:
+            pipeline: Pipeline = Pipeline(
+                base_path=str(tmp_path), connector_configs=connector_configs(url)
+            )
+            merger = pipeline.run(method="cluster")
+        assert pipeline.status == dict(OCM="refreshed", OSM="refreshed", BNA="reused")
+        assert "503" in pipeline.errors["BNA"]
+        assert merger.merged_stations_gdf.shape[0] == 6
+        assert os.path.exists(os.path.join(str(tmp_path), "OCM__processed.json"))
+        assert not os.path.exists(os.path.join(str(tmp_path), "BNA__raw.json"))
+
+        # once the server is gone, every source falls back to its processed file or is skipped without one
+        os.remove(os.path.join(str(tmp_path), "BNA__processed.json"))
+        pipeline.run(method="cluster")
+        assert pipeline.status == dict(OCM="reused", OSM="reused", BNA="failed")
+        assert pipeline.merger.merged_stations_gdf.shape[0] == 5
+
+    def test_run_parallel(self, tmp_path):
+        # sources are processed by worker processes started while the other sources are refreshed in threads
+        with local_server(SOURCE_ROUTES) as url:
+            pipeline: Pipeline = Pipeline(
+                base_path=str(tmp_path),
+                connector_configs=connector_configs(url),
+                process_n_jobs=2,
+                use_cache=True,
+            )
+            merger = pipeline.run(method="cluster")
+        assert pipeline.status == dict(OCM="refreshed", OSM="refreshed", BNA="failed")
+        assert merger.merged_stations_gdf.shape[0] == 5
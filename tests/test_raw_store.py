@@ -0,0 +1,75 @@
+import json
+import math
+import pickle
+import sqlite3
+from typing import Dict, List
+from charging_stations.connectors import Config, OCMConnector
+from charging_stations.connectors._raw_store import BLOCK_SIZE, RAW_STORE_FILE, RawStore
+from charging_stations.helpers import default
+
+
+class TestRawStore:
+    def test_put_get(self, tmp_path):
+        file_path: str = str(tmp_path / RAW_STORE_FILE)
+        store: RawStore = RawStore(file_path)
+        records: List[str] = [
+            json.dumps(dict(ID=i, Title=f"Ladestation {i % 7} – Süd"))
+            for i in range(150)
+        ]
+        hashes: List[str] = store.put(records + records[:3])
+        assert hashes[-3:] == hashes[:3]
+        assert hashes[0] == RawStore.hash(records[0])
+        assert store.get(hashes[42]) == records[42]
+        assert store.get("unknown") is None
+
+        # records are only stored once, also by another connection to the same file
+        copied_store: RawStore = pickle.loads(pickle.dumps(store))
+        assert copied_store.put(records[: BLOCK_SIZE + 1]) == hashes[: BLOCK_SIZE + 1]
+        assert copied_store.get_many(hashes[::-1] + ["unknown"]) == (
+            records + records[:3]
+        )[::-1] + [None]
+        store.close()
+        copied_store.close()
+        with sqlite3.connect(file_path) as connection:
+            no_blocks: int = connection.execute(
+                "SELECT COUNT(*) FROM blocks"
+            ).fetchone()[0]
+        assert no_blocks == math.ceil(len(records) / BLOCK_SIZE)
+
+    def test_connector(self, tmp_path):
+        stations_raw: List[Dict] = [
+            dict(
+                AddressInfo=dict(
+                    ID=i,
+                    Latitude=52.5 + i * 1e-3,
+                    Longitude=13.4,
+                    Postcode="10115",
+                    Town="Berlin",
+                    StateOrProvince="Berlin",
+                    Country=dict(ISOCode="DE"),
+                ),
+                Connections=[dict(CurrentType=dict(Title="DC"), PowerKW=50.0)],
+                NumberOfPoints=1,
+                UsageType=None,
+                OperatorInfo=dict(Title="Stromnetz Berlin"),
+                UsageCost=None,
+            )
+            for i in range(5)
+        ]
+        connector: OCMConnector = OCMConnector(base_path=str(tmp_path), **Config.OCM)
+        connector.raw_data = stations_raw
+        connector.process(to_disk=True)
+        assert "raw_data" not in connector.processed_data[0]
+        assert [
+            connector.get_raw_data(station) for station in connector.processed_data
+        ] == [
+            json.dumps(station_raw, sort_keys=True, ensure_ascii=True, default=default)
+            for station_raw in stations_raw
+        ]
+
+        # processed stations are only read from the processed file
+        connector = OCMConnector(base_path=str(tmp_path), **Config.OCM)
+        connector.load(is_processed=True)
+        assert json.loads(connector.get_raw_data(connector.processed_data[3])) == (
+            stations_raw[3]
+        )
@@ -0,0 +1,145 @@
+import io
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape
+import pytest
+from charging_stations.helpers import iter_xlsx_records, iter_xlsx_rows
+
+NS: str = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+WORKBOOK: str = f"""<?xml version="1.0" encoding="UTF-8"?>
+<workbook {NS} xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Ladepunkte" sheetId="1" r:id="rId2"/></sheets></workbook>"""
+RELATIONS: str = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="styles" Target="styles.xml"/>
+<Relationship Id="rId2" Type="worksheet" Target="worksheets/data.xml"/>
+</Relationships>"""
+# style 1 is a built-in date format, style 2 a custom date format and style 3 a number format with a quoted "d"
+STYLES: str = f"""<?xml version="1.0" encoding="UTF-8"?>
+<styleSheet {NS}>
+<numFmts count="2"><numFmt numFmtId="164" formatCode="dd/mm/yyyy\\ hh:mm"/>
+<numFmt numFmtId="165" formatCode="0.0&quot; kWd&quot;"/></numFmts>
+<cellXfs count="4"><xf numFmtId="0"/><xf numFmtId="14"/><xf numFmtId="164"/><xf numFmtId="165"/></cellXfs>
+</styleSheet>"""
+
+
+def _column_name(index: int) -> str:
+    name: str = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def write_xlsx(rows: List[List[Any]]) -> bytes:
+    """
+    Writes rows to the first sheet of a minimal xlsx workbook. Strings are shared, datetimes are numbers with a date
+    style and None cells are left out.
+
+    :param rows: Rows of cell values
+    :return: Zipped workbook
+    """
+    strings: List[str] = []
+    sheet_rows: List[str] = []
+    for row_number, row in enumerate(rows, start=1):
+        cells: List[str] = []
+        for column, value in enumerate(row):
+            reference: str = f"{_column_name(column)}{row_number}"
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                cells += [f'<c r="{reference}" t="b"><v>{int(value)}</v></c>']
+            elif isinstance(value, str):
+                strings += [value]
+                cells += [f'<c r="{reference}" t="s"><v>{len(strings) - 1}</v></c>']
+            elif isinstance(value, datetime):
+                days: float = (value - datetime(1899, 12, 30)).total_seconds() / 86400
+                cells += [f'<c r="{reference}" s="1"><v>{days}</v></c>']
+            else:
+                cells += [f'<c r="{reference}"><v>{value}</v></c>']
+        sheet_rows += [f'<row r="{row_number}">{"".join(cells)}</row>']
+    shared_strings: str = "".join(f"<si><t>{escape(s)}</t></si>" for s in strings)
+    buffer: io.BytesIO = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr("xl/workbook.xml", WORKBOOK)
+        workbook.writestr("xl/_rels/workbook.xml.rels", RELATIONS)
+        workbook.writestr("xl/styles.xml", STYLES)
+        workbook.writestr(
+            "xl/sharedStrings.xml", f"<sst {NS}>{shared_strings}</sst>"
+        )
+        workbook.writestr(
+            "xl/worksheets/data.xml",
+            f'<worksheet {NS}><sheetData>{"".join(sheet_rows)}</sheetData></worksheet>',
+        )
+    return buffer.getvalue()
+
+
+class TestXlsxStream:
+    def test_iter_xlsx_rows(self):
+        content: bytes = write_xlsx(
+            [
+                ["Ladesäulenregister"],
+                [],
+                ["Betreiber", "Anzahl", "kW", "Datum", "Aktiv"],
+                ["EnBW", 2, 22.5, datetime(2021, 3, 4), True],
+                ["E.ON & Co", None, 11, None, False],
+            ]
+        )
+        assert list(iter_xlsx_rows(io.BytesIO(content))) == [
+            ["Ladesäulenregister"],
+            [],
+            ["Betreiber", "Anzahl", "kW", "Datum", "Aktiv"],
+            ["EnBW", 2, 22.5, datetime(2021, 3, 4), True],
+            ["E.ON & Co", None, 11, None, False],
+        ]
+
+    def test_cell_types(self):
+        buffer: io.BytesIO = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as workbook:
+            workbook.writestr(
+                "xl/workbook.xml",
+                WORKBOOK.replace("<sheets>", '<workbookPr date1904="1"/><sheets>'),
+            )
+            workbook.writestr("xl/_rels/workbook.xml.rels", RELATIONS)
+            workbook.writestr("xl/styles.xml", STYLES)
+            workbook.writestr(
+                "xl/sharedStrings.xml",
+                f"<sst {NS}><si><r><t>Lade</t></r><r><t>punkt</t></r>"
+                f'<rPh sb="0" eb="1"><t>x</t></rPh></si></sst>',
+            )
+            workbook.writestr(
+                "xl/worksheets/data.xml",
+                f"<worksheet {NS}><sheetData>"
+                '<row r="2"><c r="B2" t="s"><v>0</v></c><c r="D2" t="inlineStr"><is><t>inline</t></is></c>'
+                '<c r="E2" t="e"><v>#N/A</v></c><c r="F2" t="str"><v>formula</v></c></row>'
+                '<row r="3"><c r="A3" s="2"><v>1.5</v></c><c r="B3" s="3"><v>3</v></c>'
+                '<c r="C3"><v>1E-3</v></c><c r="D3"><v>4.0</v></c></row>'
+                "</sheetData></worksheet>",
+            )
+        assert list(iter_xlsx_rows(buffer)) == [
+            [],
+            [None, "Ladepunkt", None, "inline", None, "formula"],
+            [datetime(1904, 1, 2, 12), 3, 0.001, 4],
+        ]
+
+    def test_iter_xlsx_records(self):
+        content: bytes = write_xlsx(
+            [
+                ["Stand: 01.02.2021"],
+                ["Betreiber", "Adresse", None, "Anzahl"],
+                ["EnBW", "Hauptstraße 1", "ignored", 2],
+                [],
+                ["E.ON", None],
+            ]
+        )
+        records: List[Dict[str, Any]] = list(
+            iter_xlsx_records(io.BytesIO(content), first_header="Betreiber")
+        )
+        assert records == [
+            dict(Betreiber="EnBW", Adresse="Hauptstraße 1", Anzahl=2),
+            dict(Betreiber="E.ON", Adresse=None, Anzahl=None),
+        ]
+        with pytest.raises(RuntimeError):
+            next(iter_xlsx_records(io.BytesIO(content), first_header="Operator"))